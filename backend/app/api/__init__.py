@@ -5,6 +5,8 @@ from .mills import router as mills_router
 from .routine import router as routine_router
 from .production import router as production_router
 from .admin import router as admin_router
+from .events import router as events_router
+from .analytics import router as analytics_router
 
 # Create main API router
 api_router = APIRouter()
@@ -15,4 +17,6 @@ api_router.include_router(farmers_router, prefix="/farmers", tags=["Farmers"])
 api_router.include_router(mills_router, prefix="/mills", tags=["Mills"])
 api_router.include_router(routine_router, prefix="/routine", tags=["Routine Data"])
 api_router.include_router(production_router, prefix="/production", tags=["Production Reports"])
-api_router.include_router(admin_router, prefix="/admin", tags=["Admin"]) 
\ No newline at end of file
+api_router.include_router(admin_router, prefix="/admin", tags=["Admin"])
+api_router.include_router(events_router, prefix="/events", tags=["Events"])
+api_router.include_router(analytics_router, prefix="/analytics", tags=["Analytics"]) 
\ No newline at end of file
@@ -2,16 +2,17 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_
 from typing import List, Dict, Any, Optional
-from datetime import datetime, date, timedelta
+from datetime import date
 from app.database import get_db
 from app.models.user import User, UserRole
-from app.models.farmer import Farmer
-from app.models.mill import Mill, FeedOrder, OrderStatus
-from app.models.routine import RoutineData
-from app.models.production import ProductionReport, CostDetail
-from app.models.routine import MortalityRecord
 from app.models.admin import AdminLog, AdminAction
 from app.auth.dependencies import get_current_admin
+from app.models.aggregate import AggregateCounter
+from app.services import admin_stats
+from app.services.counters import reconcile_counters
+from app.services.analytics_series import get_series
+from app.services.audit import audit_action
+from app.services.log_partitions import maintain_partitions, query_logs
 
 router = APIRouter()
 
@@ -22,60 +23,41 @@ def get_admin_dashboard(
     db: Session = Depends(get_db)
 ):
     """Get admin dashboard statistics"""
-    # Get counts
-    total_farmers = db.query(Farmer).count()
-    total_mills = db.query(Mill).count()
-    total_orders = db.query(FeedOrder).count()
-    total_reports = db.query(ProductionReport).count()
-    
-    # Get pending orders
-    pending_orders = db.query(FeedOrder).filter(FeedOrder.status == OrderStatus.PENDING).count()
-    
-    # Get unapproved reports
-    unapproved_reports = db.query(ProductionReport).filter(ProductionReport.is_approved == False).count()
-    
-    # Get recent activity
-    recent_orders = db.query(FeedOrder).order_by(FeedOrder.created_at.desc()).limit(5).all()
-    recent_reports = db.query(ProductionReport).order_by(ProductionReport.created_at.desc()).limit(5).all()
-    
-    # Get monthly statistics
-    current_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    monthly_orders = db.query(FeedOrder).filter(FeedOrder.created_at >= current_month).count()
-    monthly_reports = db.query(ProductionReport).filter(ProductionReport.created_at >= current_month).count()
-    
+    return admin_stats.get_admin_dashboard(db)
+
+
+@router.get("/counters")
+def get_aggregate_counters(
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get the maintained aggregate counters"""
+    counters = db.query(AggregateCounter).order_by(AggregateCounter.name).all()
     return {
-        "total_farmers": total_farmers,
-        "total_mills": total_mills,
-        "total_orders": total_orders,
-        "total_reports": total_reports,
-        "pending_orders": pending_orders,
-        "unapproved_reports": unapproved_reports,
-        "monthly_orders": monthly_orders,
-        "monthly_reports": monthly_reports,
-        "recent_orders": [
-            {
-                "id": order.id,
-                "order_number": order.order_number,
-                "farmer_id": order.farmer_id,
-                "status": order.status,
-                "total_amount": order.total_amount,
-                "created_at": order.created_at
-            }
-            for order in recent_orders
-        ],
-        "recent_reports": [
-            {
-                "id": report.id,
-                "report_number": report.report_number,
-                "farmer_name": report.farmer_name,
-                "is_approved": report.is_approved,
-                "created_at": report.created_at
-            }
-            for report in recent_reports
-        ]
+        counter.name: {"value": counter.value, "updated_at": counter.updated_at}
+        for counter in counters
     }
 
 
+@router.post(
+    "/counters/reconcile",
+    dependencies=[Depends(audit_action(AdminAction.SYSTEM_CONFIG, "aggregate_counters", description="Reconciled aggregate counters"))]
+)
+def reconcile_aggregate_counters(
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Recompute the aggregate counters and repair any drift"""
+    try:
+        return reconcile_counters(db)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to reconcile counters: {str(e)}"
+        )
+
+
 @router.get("/analytics/farmers")
 def get_farmer_analytics(
     start_date: Optional[date] = Query(None),
@@ -84,35 +66,7 @@ def get_farmer_analytics(
     db: Session = Depends(get_db)
 ):
     """Get farmer analytics"""
-    query = db.query(Farmer)
-    
-    if start_date:
-        query = query.filter(Farmer.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(Farmer.created_at <= end_date)
-    
-    farmers = query.all()
-    
-    # Group by farm type
-    farm_types = {}
-    for farmer in farmers:
-        farm_type = farmer.farm_type
-        if farm_type not in farm_types:
-            farm_types[farm_type] = 0
-        farm_types[farm_type] += 1
-    
-    # Get verification status
-    verified_farmers = sum(1 for f in farmers if f.is_verified)
-    unverified_farmers = len(farmers) - verified_farmers
-    
-    return {
-        "total_farmers": len(farmers),
-        "farm_types": farm_types,
-        "verified_farmers": verified_farmers,
-        "unverified_farmers": unverified_farmers,
-        "verification_rate": (verified_farmers / len(farmers) * 100) if farmers else 0
-    }
+    return admin_stats.farmer_analytics(db, start_date, end_date)
 
 
 @router.get("/analytics/orders")
@@ -123,36 +77,7 @@ def get_order_analytics(
     db: Session = Depends(get_db)
 ):
     """Get order analytics"""
-    query = db.query(FeedOrder)
-    
-    if start_date:
-        query = query.filter(FeedOrder.created_at >= start_date)
-    
-    if end_date:
-        query = query.filter(FeedOrder.created_at <= end_date)
-    
-    orders = query.all()
-    
-    # Group by status
-    status_counts = {}
-    for order in orders:
-        status = order.status.value
-        if status not in status_counts:
-            status_counts[status] = 0
-        status_counts[status] += 1
-    
-    # Calculate total revenue
-    total_revenue = sum(order.total_amount for order in orders)
-    
-    # Get average order value
-    avg_order_value = total_revenue / len(orders) if orders else 0
-    
-    return {
-        "total_orders": len(orders),
-        "status_distribution": status_counts,
-        "total_revenue": total_revenue,
-        "average_order_value": avg_order_value
-    }
+    return admin_stats.order_analytics(db, start_date, end_date)
 
 
 @router.get("/analytics/production")
@@ -163,42 +88,53 @@ def get_production_analytics(
     db: Session = Depends(get_db)
 ):
     """Get production analytics"""
-    query = db.query(ProductionReport)
-    
-    if start_date:
-        query = query.filter(ProductionReport.hatch_date >= start_date)
-    
-    if end_date:
-        query = query.filter(ProductionReport.hatch_date <= end_date)
-    
-    reports = query.all()
-    
-    if not reports:
-        return {
-            "total_reports": 0,
-            "approved_reports": 0,
-            "approval_rate": 0,
-            "average_mortality": 0,
-            "average_fcr": 0,
-            "average_weight": 0
-        }
-    
-    # Calculate statistics
-    approved_reports = sum(1 for r in reports if r.is_approved)
-    approval_rate = (approved_reports / len(reports)) * 100
-    
-    avg_mortality = sum(r.total_mortality_percent for r in reports) / len(reports)
-    avg_fcr = sum(r.fcr_percent for r in reports) / len(reports)
-    avg_weight = sum(r.avg_weight_kg for r in reports) / len(reports)
-    
-    return {
-        "total_reports": len(reports),
-        "approved_reports": approved_reports,
-        "approval_rate": approval_rate,
-        "average_mortality": avg_mortality,
-        "average_fcr": avg_fcr,
-        "average_weight": avg_weight
-    }
+    return admin_stats.production_analytics(db, start_date, end_date)
+
+
+def _series(db: Session, series: str, period: str, start_date: Optional[date], end_date: Optional[date]) -> dict:
+    try:
+        return get_series(db, series, period, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/analytics/orders/series")
+def get_order_series(
+    period: str = Query("month", pattern="^(day|week|month)$", description="Bucket size"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get order analytics as a day, week or month series"""
+    return _series(db, "orders", period, start_date, end_date)
+
+
+@router.get("/analytics/production/series")
+def get_production_series(
+    period: str = Query("month", pattern="^(day|week|month)$", description="Bucket size"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get production analytics as a day, week or month series"""
+    return _series(db, "production", period, start_date, end_date)
+
+
+@router.get("/analytics/routine/series")
+def get_routine_series(
+    period: str = Query("month", pattern="^(day|week|month)$", description="Bucket size"),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get routine data analytics as a day, week or month series"""
+    return _series(db, "routine", period, start_date, end_date)
 
 
 @router.get("/logs", response_model=List[Dict[str, Any]])
@@ -207,19 +143,19 @@ def get_admin_logs(
     limit: int = Query(100, ge=1, le=100),
     action: Optional[AdminAction] = Query(None),
     user_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Get admin activity logs"""
-    query = db.query(AdminLog)
-    
-    if action:
-        query = query.filter(AdminLog.action == action)
+    """Get admin activity logs, reading only the monthly partitions in the date range"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
     
-    if user_id:
-        query = query.filter(AdminLog.user_id == user_id)
-    
-    logs = query.order_by(AdminLog.created_at.desc()).offset(skip).limit(limit).all()
+    logs = query_logs(db, action, user_id, start_date, end_date, skip, limit)
     
     return [
         {
@@ -263,42 +199,27 @@ def create_admin_log(
     return {"message": "Log created successfully", "log_id": log.id}
 
 
+@router.post(
+    "/logs/maintenance",
+    dependencies=[Depends(audit_action(AdminAction.SYSTEM_CONFIG, "admin_logs", description="Ran admin log partition maintenance"))]
+)
+def run_admin_log_maintenance(
+    current_admin: User = Depends(get_current_admin)
+):
+    """Create or rotate the monthly admin log partitions and archive expired ones"""
+    try:
+        return maintain_partitions()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to maintain admin log partitions: {str(e)}"
+        )
+
+
 @router.get("/system-stats")
 def get_system_stats(
-    current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    exact: bool = Query(False, description="Count every table instead of using planner estimates"),
+    current_admin: User = Depends(get_current_admin)
 ):
     """Get system statistics"""
-    # Database statistics
-    total_users = db.query(User).count()
-    active_users = db.query(User).filter(User.is_active == True).count()
-    
-    # Storage statistics (approximate)
-    total_routine_records = db.query(RoutineData).count()
-    total_mortality_records = db.query(MortalityRecord).count()
-    total_production_reports = db.query(ProductionReport).count()
-    total_cost_details = db.query(CostDetail).count()
-    
-    # Recent activity (last 7 days)
-    week_ago = datetime.now() - timedelta(days=7)
-    recent_users = db.query(User).filter(User.created_at >= week_ago).count()
-    recent_orders = db.query(FeedOrder).filter(FeedOrder.created_at >= week_ago).count()
-    recent_reports = db.query(ProductionReport).filter(ProductionReport.created_at >= week_ago).count()
-    
-    return {
-        "users": {
-            "total": total_users,
-            "active": active_users,
-            "recent": recent_users
-        },
-        "data": {
-            "routine_records": total_routine_records,
-            "mortality_records": total_mortality_records,
-            "production_reports": total_production_reports,
-            "cost_details": total_cost_details
-        },
-        "activity": {
-            "recent_orders": recent_orders,
-            "recent_reports": recent_reports
-        }
-    } 
\ No newline at end of file
+    return admin_stats.get_system_stats(exact)
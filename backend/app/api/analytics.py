@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List, Optional
+from app.models.user import User
+from app.models.admin import AdminAction
+from app.auth.dependencies import get_current_admin, get_current_report_viewer
+from app.services.audit import audit_action
+from app.services.columnar import DATASETS, columnar_store, dimension_names, drilldown
+
+router = APIRouter()
+
+
+def _dataset(dataset: str) -> str:
+    if dataset not in DATASETS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dataset: {dataset}"
+        )
+    return dataset
+
+
+@router.get("/datasets")
+def list_datasets(
+    current_user: User = Depends(get_current_report_viewer)
+):
+    """List the drill-down datasets with their dimensions, measures and snapshot age"""
+    datasets = {}
+    for name, spec in DATASETS.items():
+        snapshot = columnar_store.load(name)
+        datasets[name] = {
+            "dimensions": dimension_names(spec),
+            "measures": list(spec.measures),
+            "snapshot": {
+                "rows": snapshot.rows,
+                "watermark": snapshot.meta["watermark"],
+                "refreshed_at": snapshot.meta["refreshed_at"]
+            } if snapshot else None
+        }
+    return datasets
+
+
+@router.get("/{dataset}/drilldown")
+def get_drilldown(
+    dataset: str,
+    group_by: List[str] = Query([], description="Dimensions to group by, e.g. place, lot_grade, month"),
+    measure: List[str] = Query([], description="Measures to aggregate (default: all)"),
+    filter: List[str] = Query([], description="dimension:value, repeatable; values of one dimension are OR-ed"),
+    start_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    current_user: User = Depends(get_current_report_viewer)
+):
+    """Slice a dataset from the columnar snapshot without querying the database"""
+    filters = {}
+    for condition in filter:
+        name, separator, value = condition.partition(":")
+        if not separator:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Filter must be dimension:value, got {condition}"
+            )
+        filters.setdefault(name, []).append(value)
+
+    try:
+        snapshot = columnar_store.snapshot(_dataset(dataset))
+        return drilldown(snapshot, group_by, measure, filters, start_month, end_month)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post(
+    "/refresh",
+    dependencies=[Depends(audit_action(AdminAction.SYSTEM_CONFIG, "analytics_snapshot", description="Refreshed analytics snapshots"))]
+)
+def refresh_snapshots(
+    dataset: Optional[str] = Query(None),
+    full: bool = Query(False, description="Rebuild from scratch instead of reading changed rows only"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Refresh the columnar analytics snapshots now"""
+    try:
+        return columnar_store.refresh([_dataset(dataset)] if dataset else None, full)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to refresh analytics snapshots: {str(e)}"
+        )
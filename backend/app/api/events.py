@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.database import SessionLocal
+from app.models.user import User, UserRole
+from app.models.farmer import Farmer
+from app.models.mill import Mill
+from app.auth.security import get_current_user
+from app.services.events import ADMIN_CHANNEL, event_bus, farmer_channel, mill_channel
+
+router = APIRouter()
+
+
+def _channels_for_token(token: Optional[str]) -> List[str]:
+    """Resolve a bearer token to the event channels its user may follow.
+
+    Blocking (database lookups); async handlers call it via run_in_threadpool.
+    """
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    user_id = get_current_user(token)
+    
+    # Short-lived session: streams stay open far longer than a request
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user or not user.is_active:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found or inactive"
+            )
+        
+        if user.role == UserRole.ADMIN:
+            return [ADMIN_CHANNEL]
+        if user.role == UserRole.FARMER:
+            farmer_id = db.query(Farmer.id).filter(Farmer.user_id == user.id).scalar()
+            if farmer_id is not None:
+                return [farmer_channel(farmer_id)]
+        if user.role == UserRole.MILL:
+            mill_id = db.query(Mill.id).filter(Mill.user_id == user.id).scalar()
+            if mill_id is not None:
+                return [mill_channel(mill_id)]
+    finally:
+        db.close()
+    
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="No event channel for this user"
+    )
+
+
+def _request_token(request: Request, token: Optional[str]) -> Optional[str]:
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:]
+    return token
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot send headers")
+):
+    """Server-Sent Events stream of order and report events for the current user"""
+    channels = await run_in_threadpool(_channels_for_token, _request_token(request, token))
+    subscription = event_bus.subscribe(channels)
+    
+    async def event_stream():
+        try:
+            yield f"event: ready\ndata: {json.dumps({'channels': channels})}\n\n"
+            while not await request.is_disconnected():
+                message = await subscription.get(settings.event_heartbeat_seconds)
+                if message is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    yield f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def websocket_events(websocket: WebSocket, token: Optional[str] = Query(None)):
+    """WebSocket stream of order and report events for the current user"""
+    try:
+        channels = await run_in_threadpool(_channels_for_token, token)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+    
+    await websocket.accept()
+    subscription = event_bus.subscribe(channels)
+    
+    async def send_events():
+        await websocket.send_json({"type": "ready", "data": {"channels": channels}})
+        while True:
+            message = await subscription.get(settings.event_heartbeat_seconds)
+            await websocket.send_json(message or {"type": "ping"})
+    
+    async def receive_until_closed():
+        # Client messages are ignored; this only notices the disconnect
+        while True:
+            await websocket.receive_text()
+    
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_until_closed())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        for task in tasks:
+            task.cancel()
+        event_bus.unsubscribe(subscription)
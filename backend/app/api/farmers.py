@@ -1,16 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import func, insert, update
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
+from datetime import datetime
 from app.database import get_db
 from app.models.user import User, UserRole
+from app.models.admin import AdminAction
 from app.models.farmer import Farmer, Farm
+from app.models.mill import Mill, FeedOrder, FeedOrderItem, OrderStatus
+from app.schemas.mill import FeedOrderCreate, FeedOrderResponse
+from app.services import admin_stats
+from app.services.catalogue import feed_catalogue
+from app.services.concurrency import check_if_match, commit_or_conflict, set_etag
+from app.services.counters import FARMERS_VERIFIED, adjust_counters, row_deltas
+from app.services.analytics_series import mark_series_dirty
+from app.services.audit import AuditEntry, audit_action
+from app.services.events import publish_order_created
+from app.services.dispatch_scheduler import ScheduledOrder, dispatch_scheduler
 from app.schemas.farmer import (
     FarmerCreate, FarmerUpdate, FarmerResponse, FarmCreate, FarmUpdate, FarmResponse, 
     FarmerWithFarms, AdminFarmerCreate, AdminFarmerUpdate, FarmerListResponse
 )
 from app.auth.dependencies import get_current_active_user, get_current_farmer, get_current_admin
 from app.auth.security import get_password_hash
+import uuid
 
 router = APIRouter()
 
@@ -19,6 +34,7 @@ router = APIRouter()
 def admin_create_farmer(
     farmer_data: AdminFarmerCreate,
     current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.CREATE_FARMER, "farmer", description="Created farmer {target_id}")),
     db: Session = Depends(get_db)
 ):
     """Create a new farmer with user account (Admin only)"""
@@ -56,6 +72,7 @@ def admin_create_farmer(
         db.add(db_farmer)
         db.commit()
         db.refresh(db_farmer)
+        audit.add(db_farmer.id)
         
         # Return comprehensive farmer data
         farmer_response = FarmerListResponse(
@@ -68,6 +85,7 @@ def admin_create_farmer(
             is_verified=db_farmer.is_verified,
             created_at=db_farmer.created_at,
             updated_at=db_farmer.updated_at,
+            version=db_farmer.version,
             user_email=db_user.email,
             user_full_name=db_user.full_name,
             user_is_active=db_user.is_active,
@@ -76,11 +94,11 @@ def admin_create_farmer(
         
         return farmer_response
         
-    except Exception as e:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to create farmer: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Farmer conflicts with existing data"
         )
 
 
@@ -88,6 +106,7 @@ def admin_create_farmer(
 def create_farmer(
     farmer_data: FarmerCreate,
     current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.CREATE_FARMER, "farmer", description="Created farmer {target_id}")),
     db: Session = Depends(get_db)
 ):
     """Create a new farmer profile (Admin only)"""
@@ -118,28 +137,34 @@ def create_farmer(
     db.add(db_farmer)
     db.commit()
     db.refresh(db_farmer)
+    audit.add(db_farmer.id)
     
     return db_farmer
 
 
 @router.get("/me", response_model=FarmerWithFarms)
-def get_my_farmer_profile(current_farmer: Farmer = Depends(get_current_farmer)):
+def get_my_farmer_profile(response: Response, current_farmer: Farmer = Depends(get_current_farmer)):
     """Get current farmer's profile with farms"""
+    set_etag(response, current_farmer)
     return current_farmer
 
 
 @router.put("/me", response_model=FarmerResponse)
 def update_my_farmer_profile(
     farmer_data: FarmerUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_farmer: Farmer = Depends(get_current_farmer),
     db: Session = Depends(get_db)
 ):
-    """Update current farmer's profile"""
+    """Update current farmer's profile (honours If-Match)"""
+    check_if_match(if_match, current_farmer)
     for field, value in farmer_data.dict(exclude_unset=True).items():
         setattr(current_farmer, field, value)
     
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(current_farmer)
+    set_etag(response, current_farmer)
     
     return current_farmer
 
@@ -182,7 +207,7 @@ def get_all_farmers(
     query = query.group_by(
         Farmer.id, Farmer.user_id, Farmer.phone, Farmer.address, 
         Farmer.farm_type, Farmer.experience_years, Farmer.is_verified,
-        Farmer.created_at, Farmer.updated_at,
+        Farmer.created_at, Farmer.updated_at, Farmer.version,
         User.email, User.full_name, User.is_active
     )
     
@@ -203,6 +228,7 @@ def get_all_farmers(
             "is_verified": farmer.is_verified,
             "created_at": farmer.created_at,
             "updated_at": farmer.updated_at,
+            "version": farmer.version,
             "user_email": result.user_email,
             "user_full_name": result.user_full_name,
             "user_is_active": result.user_is_active,
@@ -216,6 +242,7 @@ def get_all_farmers(
 @router.get("/{farmer_id}", response_model=FarmerListResponse)
 def get_farmer_by_id(
     farmer_id: int,
+    response: Response,
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -231,7 +258,7 @@ def get_farmer_by_id(
     ).group_by(
         Farmer.id, Farmer.user_id, Farmer.phone, Farmer.address, 
         Farmer.farm_type, Farmer.experience_years, Farmer.is_verified,
-        Farmer.created_at, Farmer.updated_at,
+        Farmer.created_at, Farmer.updated_at, Farmer.version,
         User.email, User.full_name, User.is_active
     ).first()
     
@@ -252,29 +279,38 @@ def get_farmer_by_id(
         is_verified=farmer.is_verified,
         created_at=farmer.created_at,
         updated_at=farmer.updated_at,
+        version=farmer.version,
         user_email=result.user_email,
         user_full_name=result.user_full_name,
         user_is_active=result.user_is_active,
         farm_count=result.farm_count or 0
     )
+    set_etag(response, farmer)
     
     return farmer_response
 
 
-@router.put("/{farmer_id}", response_model=FarmerListResponse)
+@router.put(
+    "/{farmer_id}",
+    response_model=FarmerListResponse,
+    dependencies=[Depends(audit_action(AdminAction.UPDATE_FARMER, "farmer", "farmer_id", "Updated farmer {target_id}"))]
+)
 def update_farmer(
     farmer_id: int,
     farmer_data: AdminFarmerUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Update farmer profile and user data (Admin only)"""
+    """Update farmer profile and user data (Admin only, honours If-Match)"""
     farmer = db.query(Farmer).filter(Farmer.id == farmer_id).first()
     if not farmer:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Farmer not found"
         )
+    check_if_match(if_match, farmer)
     
     user = db.query(User).filter(User.id == farmer.user_id).first()
     if not user:
@@ -302,7 +338,7 @@ def update_farmer(
         if farmer_data.is_verified is not None:
             farmer.is_verified = farmer_data.is_verified
         
-        db.commit()
+        commit_or_conflict(db)
         db.refresh(farmer)
         db.refresh(user)
         
@@ -320,23 +356,28 @@ def update_farmer(
             is_verified=farmer.is_verified,
             created_at=farmer.created_at,
             updated_at=farmer.updated_at,
+            version=farmer.version,
             user_email=user.email,
             user_full_name=user.full_name,
             user_is_active=user.is_active,
             farm_count=farm_count
         )
         
+        set_etag(response, farmer)
         return farmer_response
         
-    except Exception as e:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update farmer: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Farmer conflicts with existing data"
         )
 
 
-@router.delete("/{farmer_id}")
+@router.delete(
+    "/{farmer_id}",
+    dependencies=[Depends(audit_action(AdminAction.DELETE_FARMER, "farmer", "farmer_id", "Deleted farmer {target_id}"))]
+)
 def delete_farmer(
     farmer_id: int,
     delete_user_account: bool = Query(False, description="Also delete the associated user account"),
@@ -371,11 +412,11 @@ def delete_farmer(
         
         return {"message": message, "farmer_id": farmer_id, "user_deleted": delete_user_account}
         
-    except Exception as e:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to delete farmer: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Farmer still has related records"
         )
 
 
@@ -462,30 +503,92 @@ def delete_farm(
     return {"message": "Farm deleted successfully"}
 
 
+# Feed order routes
+def _generate_order_number() -> str:
+    """Generate an order number; 44 random bits per day make collisions negligible"""
+    return f"ORD{datetime.now().strftime('%y%m%d')}{uuid.uuid4().hex[:11].upper()}"
+
+
+@router.post("/orders", response_model=FeedOrderResponse)
+def place_feed_order(
+    order_data: FeedOrderCreate,
+    current_farmer: Farmer = Depends(get_current_farmer),
+    db: Session = Depends(get_db)
+):
+    """Place a feed order with a mill for current farmer"""
+    mill = db.query(Mill.id, Mill.is_active).filter(Mill.id == order_data.mill_id).first()
+    if not mill or not mill.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Mill not found"
+        )
+    
+    # Price every item from the catalogue snapshot in one pass
+    catalogue = feed_catalogue.snapshot().entries
+    item_rows = []
+    total_amount = 0.0
+    for item in order_data.items:
+        feed_type = catalogue.get(item.feed_type_id)
+        if not feed_type or not feed_type.is_available:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Feed type {item.feed_type_id} is not available"
+            )
+        total_price = round(feed_type.price_per_kg * item.quantity, 2)
+        total_amount += total_price
+        item_rows.append({
+            "feed_type_id": item.feed_type_id,
+            "quantity": item.quantity,
+            "unit_price": feed_type.price_per_kg,
+            "total_price": total_price
+        })
+    
+    try:
+        order = db.scalars(
+            insert(FeedOrder).returning(FeedOrder),
+            [{
+                **order_data.dict(exclude={"items", "farmer_id"}),
+                "order_number": _generate_order_number(),
+                "farmer_id": current_farmer.id,
+                "status": OrderStatus.PENDING,
+                "total_amount": round(total_amount, 2)
+            }]
+        ).one()
+        adjust_counters(db, row_deltas(FeedOrder, [{"status": order.status, "created_at": order.created_at}]))
+        mark_series_dirty(db, "orders", [order.created_at])
+        items = db.scalars(
+            insert(FeedOrderItem).returning(FeedOrderItem, sort_by_parameter_order=True),
+            [{**row, "order_id": order.id} for row in item_rows]
+        ).all()
+        set_committed_value(order, "items", items)
+        response = FeedOrderResponse.model_validate(order)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Order conflicts with existing data"
+        )
+    
+    publish_order_created(response)
+    dispatch_scheduler.order_added(response.mill_id, ScheduledOrder(
+        response.id,
+        response.order_number,
+        response.status,
+        sum(item.quantity for item in response.items),
+        response.expected_delivery_date.date() if response.expected_delivery_date else None,
+        response.created_at
+    ))
+    return response
+
+
 # Additional admin endpoints
 @router.get("/admin/count")
 def get_farmers_count(
-    current_admin: User = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    current_admin: User = Depends(get_current_admin)
 ):
     """Get farmers count and statistics (Admin only)"""
-    total_farmers = db.query(Farmer).count()
-    verified_farmers = db.query(Farmer).filter(Farmer.is_verified == True).count()
-    active_users = db.query(Farmer).join(User).filter(User.is_active == True).count()
-    
-    # Farm type distribution
-    farm_types = db.query(Farmer.farm_type, func.count(Farmer.id)).group_by(Farmer.farm_type).all()
-    farm_type_distribution = {farm_type: count for farm_type, count in farm_types}
-    
-    return {
-        "total_farmers": total_farmers,
-        "verified_farmers": verified_farmers,
-        "unverified_farmers": total_farmers - verified_farmers,
-        "active_users": active_users,
-        "inactive_users": total_farmers - active_users,
-        "verification_rate": (verified_farmers / total_farmers * 100) if total_farmers > 0 else 0,
-        "farm_type_distribution": farm_type_distribution
-    }
+    return admin_stats.get_farmers_count()
 
 
 @router.put("/admin/bulk-verify")
@@ -493,6 +596,7 @@ def bulk_verify_farmers(
     farmer_ids: List[int],
     is_verified: bool = True,
     current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.VERIFY_FARMER, "farmer")),
     db: Session = Depends(get_db)
 ):
     """Bulk verify/unverify farmers (Admin only)"""
@@ -503,29 +607,37 @@ def bulk_verify_farmers(
         )
     
     try:
-        # Update verification status for specified farmers
-        updated_count = db.query(Farmer).filter(
-            Farmer.id.in_(farmer_ids)
-        ).update(
-            {"is_verified": is_verified},
-            synchronize_session=False
-        )
+        # Only rows whose state changes are touched; their ids drive the
+        # counter delta, the version bump and the audit targets
+        changes_state = Farmer.is_verified.is_not(True) if is_verified else Farmer.is_verified == True
+        updated_ids = db.scalars(
+            update(Farmer)
+            .where(Farmer.id.in_(farmer_ids), changes_state)
+            .values(is_verified=is_verified, version=Farmer.version + 1)
+            .returning(Farmer.id)
+            .execution_options(synchronize_session=False)
+        ).all()
         
+        adjust_counters(db, {FARMERS_VERIFIED: len(updated_ids) if is_verified else -len(updated_ids)})
         db.commit()
+        admin_stats.invalidate_admin_stats()
         
         action = "verified" if is_verified else "unverified"
+        for farmer_id in updated_ids:
+            audit.add(farmer_id, f"Bulk {action} farmer {{target_id}}")
+        audit.skip = not updated_ids
         return {
-            "message": f"Successfully {action} {updated_count} farmers",
-            "updated_count": updated_count,
-            "farmer_ids": farmer_ids,
+            "message": f"Successfully {action} {len(updated_ids)} farmers",
+            "updated_count": len(updated_ids),
+            "farmer_ids": updated_ids,
             "is_verified": is_verified
         }
         
-    except Exception as e:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to update farmers: {str(e)}"
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Farmers conflict with existing data"
         )
 
 
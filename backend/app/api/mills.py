@@ -1,12 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File, Header
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from app.database import get_db
 from app.models.user import User
+from app.models.admin import AdminAction
 from app.models.mill import Mill, FeedOrder, FeedOrderItem, FeedType, OrderStatus
-from app.schemas.mill import MillCreate, MillUpdate, MillResponse, FeedOrderCreate, FeedOrderUpdate, FeedOrderResponse
+from app.schemas.mill import MillCreate, MillUpdate, MillResponse, FeedOrderCreate, FeedOrderUpdate, FeedOrderResponse, FeedOrderPage, FeedQueueSummary, FeedOrderBulkStatusUpdate, FeedOrderBulkStatusResponse, DispatchSchedule, MillFeedForecast, MillDashboard
 from app.auth.dependencies import get_current_active_user, get_current_mill, get_current_admin
-from datetime import datetime
+from app.services.catalogue import feed_catalogue
+from app.services.pagination import keyset_page
+from app.services.orders import OPEN_ORDER_STATUSES, apply_transitions, parse_dispatch_sheet
+from app.services.concurrency import check_if_match, commit_or_conflict, set_etag
+from app.services.events import publish_order_status
+from app.services.dispatch_scheduler import dispatch_scheduler
+from app.services.forecast import get_mill_forecast
+from app.services.mill_analytics import get_mill_dashboard
+from app.services.audit import AuditEntry, audit_action
+from datetime import datetime, date
 import uuid
 
 router = APIRouter()
@@ -16,6 +28,7 @@ router = APIRouter()
 def create_mill(
     mill_data: MillCreate,
     current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.CREATE_MILL, "mill", description="Created mill {target_id}")),
     db: Session = Depends(get_db)
 ):
     """Create a new mill profile (Admin only)"""
@@ -46,6 +59,7 @@ def create_mill(
     db.add(db_mill)
     db.commit()
     db.refresh(db_mill)
+    audit.add(db_mill.id)
     
     return db_mill
 
@@ -79,7 +93,7 @@ def get_my_orders(
     db: Session = Depends(get_db)
 ):
     """Get all orders for current mill"""
-    query = db.query(FeedOrder).filter(FeedOrder.mill_id == current_mill.id)
+    query = db.query(FeedOrder).options(selectinload(FeedOrder.items)).filter(FeedOrder.mill_id == current_mill.id)
     
     if status_filter:
         query = query.filter(FeedOrder.status == status_filter)
@@ -88,9 +102,177 @@ def get_my_orders(
     return orders
 
 
+@router.get("/orders/queue", response_model=FeedOrderPage)
+def get_order_queue(
+    statuses: Optional[List[OrderStatus]] = Query(None, alias="status", description="Defaults to pending and processing"),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Get one keyset page of the current mill's work queue, oldest first"""
+    query = db.query(FeedOrder).options(selectinload(FeedOrder.items)).filter(
+        FeedOrder.mill_id == current_mill.id,
+        FeedOrder.status.in_(statuses or OPEN_ORDER_STATUSES)
+    ).order_by(FeedOrder.id.asc())  # same key as the cursor; ids follow insertion order
+    
+    orders, next_cursor = keyset_page(query, FeedOrder.id, cursor, limit, descending=False)
+    return {"items": orders, "next_cursor": next_cursor}
+
+
+@router.get("/orders/queue/summary", response_model=FeedQueueSummary)
+def get_order_queue_summary(
+    statuses: Optional[List[OrderStatus]] = Query(None, alias="status", description="Defaults to pending and processing"),
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Get per-feed-type quantities for the current mill's work queue"""
+    statuses = statuses or OPEN_ORDER_STATUSES
+    rows = db.query(
+        FeedOrderItem.feed_type_id,
+        FeedType.name.label("feed_type_name"),
+        func.count(func.distinct(FeedOrderItem.order_id)).label("order_count"),
+        func.coalesce(func.sum(FeedOrderItem.quantity), 0).label("total_quantity"),
+        func.coalesce(func.sum(FeedOrderItem.total_price), 0).label("total_amount")
+    ).join(FeedOrder, FeedOrder.id == FeedOrderItem.order_id).join(
+        FeedType, FeedType.id == FeedOrderItem.feed_type_id
+    ).filter(
+        FeedOrder.mill_id == current_mill.id,
+        FeedOrder.status.in_(statuses)
+    ).group_by(FeedOrderItem.feed_type_id, FeedType.name).order_by(FeedType.name).all()
+    
+    order_count = db.query(func.count(FeedOrder.id)).filter(
+        FeedOrder.mill_id == current_mill.id,
+        FeedOrder.status.in_(statuses)
+    ).scalar()
+    
+    return {
+        "statuses": statuses,
+        "order_count": order_count,
+        "total_quantity": sum(row.total_quantity for row in rows),
+        "feed_types": [row._asdict() for row in rows]
+    }
+
+
+@router.get("/schedule", response_model=DispatchSchedule)
+def get_dispatch_schedule(
+    days: int = Query(14, ge=1, le=365, description="Days of the plan to list orders for"),
+    start_date: Optional[date] = Query(None, description="First production day, defaults to today"),
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Plan pending orders into production days within the mill's daily capacity"""
+    if not current_mill.capacity_per_day or current_mill.capacity_per_day <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Mill capacity per day must be set to plan dispatches"
+        )
+    
+    return dispatch_scheduler.plan(
+        db,
+        current_mill.id,
+        current_mill.capacity_per_day,
+        start_date or date.today(),
+        days
+    )
+
+
+@router.get("/dashboard", response_model=MillDashboard)
+def get_my_dashboard(
+    period: str = Query("month", pattern="^(day|week|month)$", description="Revenue period"),
+    start_date: Optional[date] = Query(None, description="Orders created on or after this date"),
+    end_date: Optional[date] = Query(None, description="Orders created on or before this date"),
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Order counts, revenue, pending feed and delivery times for current mill"""
+    return get_mill_dashboard(db, current_mill.id, period, start_date, end_date)
+
+
+@router.get("/forecast", response_model=MillFeedForecast)
+def get_feed_forecast(current_mill: Mill = Depends(get_current_mill)):
+    """Forecast daily feed demand per feed type from the mill's farmers' routine data"""
+    return get_mill_forecast(current_mill.id)
+
+
+def _bulk_transition(db: Session, mill: Mill, transitions: List[dict]) -> dict:
+    """Apply status transitions for the mill in one UPDATE and report per-order outcomes"""
+    try:
+        results = apply_transitions(db, mill.id, transitions)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Orders conflict with existing data"
+        )
+    
+    for result in results:
+        if result["outcome"] == "updated":
+            dispatch_scheduler.status_changed(mill.id, result["order_id"], result["to_status"])
+    publish_order_status([
+        {
+            "id": result["order_id"],
+            "order_number": result["order_number"],
+            "farmer_id": result["farmer_id"],
+            "mill_id": mill.id,
+            "from_status": result["from_status"].value,
+            "status": result["to_status"].value
+        }
+        for result in results
+        if result["outcome"] == "updated"
+    ])
+    return {
+        "updated_count": sum(1 for result in results if result["outcome"] == "updated"),
+        "results": results
+    }
+
+
+@router.put("/orders/bulk-status", response_model=FeedOrderBulkStatusResponse)
+def bulk_update_order_status(
+    bulk_data: FeedOrderBulkStatusUpdate,
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Change the status of many orders at once (must belong to current mill)"""
+    for transition in bulk_data.transitions:
+        if transition.order_id is None and not transition.order_number:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Each transition needs an order_id or order_number"
+            )
+    
+    return _bulk_transition(db, current_mill, [transition.dict() for transition in bulk_data.transitions])
+
+
+@router.post("/orders/bulk-status/csv", response_model=FeedOrderBulkStatusResponse)
+def upload_dispatch_sheet(
+    file: UploadFile = File(...),
+    current_mill: Mill = Depends(get_current_mill),
+    db: Session = Depends(get_db)
+):
+    """Apply a CSV dispatch sheet with order_number, status and optional notes columns"""
+    try:
+        transitions = parse_dispatch_sheet(file.file.read())
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid dispatch sheet: {str(e)}"
+        )
+    
+    if not transitions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Dispatch sheet has no rows"
+        )
+    
+    return _bulk_transition(db, current_mill, transitions)
+
+
 @router.get("/orders/{order_id}", response_model=FeedOrderResponse)
 def get_order_by_id(
     order_id: int,
+    response: Response,
     current_mill: Mill = Depends(get_current_mill),
     db: Session = Depends(get_db)
 ):
@@ -106,6 +288,7 @@ def get_order_by_id(
             detail="Order not found"
         )
     
+    set_etag(response, order)
     return order
 
 
@@ -113,10 +296,12 @@ def get_order_by_id(
 def update_order_status(
     order_id: int,
     order_data: FeedOrderUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_mill: Mill = Depends(get_current_mill),
     db: Session = Depends(get_db)
 ):
-    """Update order status (must belong to current mill)"""
+    """Update order status (must belong to current mill, honours If-Match)"""
     order = db.query(FeedOrder).filter(
         FeedOrder.id == order_id,
         FeedOrder.mill_id == current_mill.id
@@ -127,6 +312,8 @@ def update_order_status(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Order not found"
         )
+    check_if_match(if_match, order)
+    previous_status = order.status
     
     # Update status
     if order_data.status:
@@ -134,6 +321,9 @@ def update_order_status(
         
         # If status is dispatched, set actual delivery date
         if order_data.status == OrderStatus.DISPATCHED:
+            order.dispatched_at = datetime.utcnow()
+            order.actual_delivery_date = order.dispatched_at
+        elif order_data.status == OrderStatus.DELIVERED and order_data.status != previous_status:
             order.actual_delivery_date = datetime.utcnow()
     
     if order_data.actual_delivery_date:
@@ -142,25 +332,39 @@ def update_order_status(
     if order_data.notes:
         order.notes = order_data.notes
     
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(order)
+    set_etag(response, order)
+    if order.status != previous_status:
+        dispatch_scheduler.status_changed(order.mill_id, order.id, order.status)
+        publish_order_status([{
+            "id": order.id,
+            "order_number": order.order_number,
+            "farmer_id": order.farmer_id,
+            "mill_id": order.mill_id,
+            "from_status": previous_status.value,
+            "status": order.status.value
+        }])
     
     return order
 
 
 @router.get("/feed-types", response_model=List[dict])
-def get_feed_types(db: Session = Depends(get_db)):
-    """Get all available feed types"""
-    feed_types = db.query(FeedType).filter(FeedType.is_available == True).all()
-    return [
-        {
-            "id": ft.id,
-            "name": ft.name,
-            "description": ft.description,
-            "price_per_kg": ft.price_per_kg
-        }
-        for ft in feed_types
-    ]
+def get_feed_types(request: Request, response: Response):
+    """Get all available feed types (supports If-None-Match / 304)"""
+    catalogue = feed_catalogue.snapshot()
+    headers = {
+        "ETag": catalogue.etag,
+        "Cache-Control": "no-cache",
+        "X-Catalogue-Version": str(catalogue.version)
+    }
+    
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and catalogue.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    response.headers.update(headers)
+    return catalogue.available
 
 
 # Admin routes for mill management
@@ -193,7 +397,27 @@ def get_mill_by_id(
     return mill
 
 
-@router.put("/{mill_id}", response_model=MillResponse)
+@router.get("/{mill_id}/forecast", response_model=MillFeedForecast)
+def get_mill_feed_forecast(
+    mill_id: int,
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Forecast daily feed demand per feed type for a mill (Admin only)"""
+    if not db.query(Mill.id).filter(Mill.id == mill_id).first():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Mill not found"
+        )
+    
+    return get_mill_forecast(mill_id)
+
+
+@router.put(
+    "/{mill_id}",
+    response_model=MillResponse,
+    dependencies=[Depends(audit_action(AdminAction.UPDATE_MILL, "mill", "mill_id", "Updated mill {target_id}"))]
+)
 def update_mill(
     mill_id: int,
     mill_data: MillUpdate,
@@ -217,7 +441,10 @@ def update_mill(
     return mill
 
 
-@router.delete("/{mill_id}")
+@router.delete(
+    "/{mill_id}",
+    dependencies=[Depends(audit_action(AdminAction.DELETE_MILL, "mill", "mill_id", "Deleted mill {target_id}"))]
+)
 def delete_mill(
     mill_id: int,
     current_admin: User = Depends(get_current_admin),
@@ -1,18 +1,101 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Header
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import func, insert, update
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from datetime import datetime, date
 from app.database import get_db
 from app.models.farmer import Farmer
 from app.models.production import ProductionReport, CostDetail
-from app.schemas.production import ProductionReportCreate, ProductionReportUpdate, ProductionReportResponse, CostDetailCreate, CostDetailResponse
-from app.auth.dependencies import get_current_farmer, get_current_admin
-from app.models.user import User
+from app.schemas.production import (
+    ProductionReportCreate, ProductionReportUpdate, ProductionReportResponse, CostDetailCreate, CostDetailResponse,
+    ProductionReportBatchCreate, ProductionReportBatchResponse, ProductionReportSummary, ProductionReportPage,
+    ProductionReportSummaryPage, CostBreakdownItem
+)
+from app.auth.dependencies import get_current_active_user, get_current_farmer, get_current_admin
+from app.models.user import User, UserRole
+from app.models.admin import AdminAction
+from app.models.settlement import SettlementRule
+from app.schemas.settlement import (
+    SettlementRuleCreate, SettlementRuleResponse, SettlementRecomputeRequest, SettlementRecomputeResponse
+)
+from app.services.pagination import keyset_page
+from app.services.reports import filter_reports, stream_csv, stream_xlsx
+from app.services.statements import get_statement_pdf
+from app.services.settlement import get_rule, recompute_settlements
+from app.services.costs import parse_cost_detail, parse_settlement_fields
+from app.services.sql_helpers import period_bucket
+from app.services.rankings import METRICS, RANKING_COLUMNS, ranking_entry, report_rankings
+from app.services.concurrency import CONFLICT_DETAIL, check_if_match, commit_or_conflict, set_etag
+from app.services.events import publish_report_approval
+from app.services.counters import REPORTS_UNAPPROVED, adjust_counters, row_deltas
+from app.services.analytics_series import mark_series_dirty
+from app.services.audit import AuditEntry, audit_action
 import uuid
 
 router = APIRouter()
 
 
+def _generate_report_number() -> str:
+    """Generate a unique production report number"""
+    return f"RPT{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:8].upper()}"
+
+
+def _insert_production_reports(
+    db: Session,
+    reports_data: List[ProductionReportCreate],
+    farmer_ids: List[int]
+) -> List[ProductionReport]:
+    """Insert reports and their cost details using two bulk INSERT ... RETURNING statements.
+
+    Runs inside the caller's transaction; nothing is committed here.
+    """
+    report_rows = []
+    for report_data, farmer_id in zip(reports_data, farmer_ids):
+        values = report_data.dict(exclude={'cost_details', 'farmer_id'})
+        report_rows.append({
+            **values,
+            **parse_settlement_fields(values),
+            "farmer_id": farmer_id,
+            "report_number": _generate_report_number()
+        })
+    reports = db.scalars(
+        insert(ProductionReport).returning(ProductionReport, sort_by_parameter_order=True),
+        report_rows
+    ).all()
+    adjust_counters(db, row_deltas(
+        ProductionReport,
+        [{"is_approved": report.is_approved, "created_at": report.created_at} for report in reports]
+    ))
+    mark_series_dirty(db, "production", [report.hatch_date for report in reports])
+
+    cost_rows = [
+        {
+            **cost_detail.dict(),
+            **parse_cost_detail(cost_detail.quantity, cost_detail.rate),
+            "production_report_id": report.id
+        }
+        for report, report_data in zip(reports, reports_data)
+        for cost_detail in report_data.cost_details
+    ]
+    cost_details = db.scalars(
+        insert(CostDetail).returning(CostDetail, sort_by_parameter_order=True),
+        cost_rows
+    ).all() if cost_rows else []
+
+    # Attach the returned cost details so serialization does not lazy-load them
+    details_by_report = {report.id: [] for report in reports}
+    for cost_detail in cost_details:
+        details_by_report[cost_detail.production_report_id].append(cost_detail)
+    for report in reports:
+        set_committed_value(report, "cost_details", details_by_report[report.id])
+
+    return reports
+
+
 @router.post("/reports", response_model=ProductionReportResponse)
 def create_production_report(
     report_data: ProductionReportCreate,
@@ -20,30 +103,20 @@ def create_production_report(
     db: Session = Depends(get_db)
 ):
     """Create new production report for current farmer"""
-    # Generate unique report number
-    report_number = f"RPT{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:8].upper()}"
-    
-    # Create production report
-    db_report = ProductionReport(
-        **report_data.dict(exclude={'cost_details'}),
-        report_number=report_number
-    )
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
-    
-    # Create cost details
-    for cost_detail in report_data.cost_details:
-        db_cost_detail = CostDetail(
-            **cost_detail.dict(),
-            production_report_id=db_report.id
+    try:
+        report = _insert_production_reports(db, [report_data], [current_farmer.id])[0]
+        response = ProductionReportResponse.model_validate(report)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Production report conflicts with existing data"
         )
-        db.add(db_cost_detail)
     
-    db.commit()
-    db.refresh(db_report)
+    report_rankings.record_created([ranking_entry(response)])
     
-    return db_report
+    return response
 
 
 @router.get("/reports", response_model=List[ProductionReportResponse])
@@ -55,7 +128,9 @@ def get_my_production_reports(
     db: Session = Depends(get_db)
 ):
     """Get production reports for current farmer with optional filters"""
-    query = db.query(ProductionReport).filter(ProductionReport.farmer_id == current_farmer.id)
+    query = db.query(ProductionReport).options(selectinload(ProductionReport.cost_details)).filter(
+        ProductionReport.farmer_id == current_farmer.id
+    )
     
     if start_date:
         query = query.filter(ProductionReport.hatch_date >= start_date)
@@ -70,9 +145,77 @@ def get_my_production_reports(
     return reports
 
 
+def _month_range(start_month: str, end_month: str) -> List[str]:
+    start = datetime.strptime(start_month, "%Y-%m")
+    end = datetime.strptime(end_month, "%Y-%m")
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+@router.get("/rankings")
+def get_report_ranking(
+    metric: str = Query(..., pattern="^(fcr|mortality|weight)$"),
+    value: Optional[float] = Query(None, description="Value to rank; defaults to the report's own value"),
+    report_id: Optional[int] = Query(None),
+    place: Optional[str] = Query(None, description="Rank within a region; all regions when omitted"),
+    start_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    end_month: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}$"),
+    approved_only: bool = Query(False),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Percentile rank of an FCR, mortality or weight value among production lots
+
+    Months refer to the hatch date. Farmers may only rank their own reports.
+    """
+    if report_id is not None:
+        query = db.query(*RANKING_COLUMNS).filter(ProductionReport.id == report_id)
+        if current_user.role != UserRole.ADMIN:
+            query = query.join(Farmer, Farmer.id == ProductionReport.farmer_id).filter(
+                Farmer.user_id == current_user.id
+            )
+        row = query.first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Production report not found"
+            )
+        _, _, values = ranking_entry(row)
+        if value is None:
+            value = values[metric]
+    
+    if value is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Either value or report_id is required"
+        )
+    
+    months = None
+    if start_month or end_month:
+        months = _month_range(start_month or end_month, end_month or start_month)
+    
+    rank, sample_size = report_rankings.rank(metric, value, place, months, approved_only)
+    lower_is_better = METRICS[metric][3]
+    
+    return {
+        "metric": metric,
+        "value": value,
+        "place": place,
+        "months": months,
+        "sample_size": sample_size,
+        "percentile": rank * 100,
+        "better_than_percent": (1 - rank) * 100 if lower_is_better else rank * 100
+    }
+
+
 @router.get("/reports/{report_id}", response_model=ProductionReportResponse)
 def get_production_report_by_id(
     report_id: int,
+    response: Response,
     current_farmer: Farmer = Depends(get_current_farmer),
     db: Session = Depends(get_db)
 ):
@@ -88,17 +231,46 @@ def get_production_report_by_id(
             detail="Production report not found"
         )
     
+    set_etag(response, report)
     return report
 
 
+def _statement_response(report: ProductionReport) -> FileResponse:
+    path = get_statement_pdf(report)
+    return FileResponse(path, media_type="application/pdf", filename=f"{report.report_number}.pdf")
+
+
+@router.get("/reports/{report_id}/statement")
+def get_settlement_statement(
+    report_id: int,
+    current_farmer: Farmer = Depends(get_current_farmer),
+    db: Session = Depends(get_db)
+):
+    """Download the settlement statement PDF for a report (must belong to current farmer)"""
+    report = db.query(ProductionReport).options(selectinload(ProductionReport.cost_details)).filter(
+        ProductionReport.id == report_id,
+        ProductionReport.farmer_id == current_farmer.id
+    ).first()
+    
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Production report not found"
+        )
+    
+    return _statement_response(report)
+
+
 @router.put("/reports/{report_id}", response_model=ProductionReportResponse)
 def update_production_report(
     report_id: int,
     report_data: ProductionReportUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_farmer: Farmer = Depends(get_current_farmer),
     db: Session = Depends(get_db)
 ):
-    """Update production report (must belong to current farmer)"""
+    """Update production report (must belong to current farmer, honours If-Match)"""
     report = db.query(ProductionReport).filter(
         ProductionReport.id == report_id,
         ProductionReport.farmer_id == current_farmer.id
@@ -116,12 +288,36 @@ def update_production_report(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot update approved report"
         )
+    check_if_match(if_match, report)
+    
+    update_data = report_data.dict(exclude_unset=True)
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No fields to update"
+        )
+    required = [
+        field for field, value in update_data.items()
+        if value is None and not ProductionReport.__table__.columns[field].nullable
+    ]
+    if required:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fields cannot be null: {', '.join(required)}"
+        )
     
-    for field, value in report_data.dict(exclude_unset=True).items():
+    old_entry = ranking_entry(report)
+    for field, value in {**update_data, **parse_settlement_fields(update_data)}.items():
         setattr(report, field, value)
+    new_entry = ranking_entry(report)
     
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(report)
+    set_etag(response, report)
+    if new_entry != old_entry:
+        # Unapproved, so only the "all" population holds this report
+        report_rankings.record_deleted([old_entry])
+        report_rankings.record_created([new_entry])
     
     return report
 
@@ -151,13 +347,18 @@ def delete_production_report(
             detail="Cannot delete approved report"
         )
     
+    entry = ranking_entry(report)
     db.delete(report)
     db.commit()
+    report_rankings.record_deleted([entry])
     
     return {"message": "Production report deleted successfully"}
 
 
 # Admin routes for production reports
+REPORT_SUMMARY_COLUMNS = [getattr(ProductionReport, field) for field in ProductionReportSummary.model_fields]
+
+
 @router.get("/admin/reports", response_model=List[ProductionReportResponse])
 def get_all_production_reports(
     farmer_id: Optional[int] = Query(None),
@@ -168,27 +369,185 @@ def get_all_production_reports(
     db: Session = Depends(get_db)
 ):
     """Get all production reports (Admin only)"""
-    query = db.query(ProductionReport)
+    query = db.query(ProductionReport).options(selectinload(ProductionReport.cost_details))
+    query = filter_reports(query, farmer_id, start_date, end_date, is_approved)
     
-    if farmer_id:
-        query = query.filter(ProductionReport.farmer_id == farmer_id)
+    reports = query.order_by(ProductionReport.created_at.desc()).all()
+    return reports
+
+
+@router.get("/admin/reports/page", response_model=ProductionReportPage)
+def get_production_reports_page(
+    farmer_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    is_approved: Optional[bool] = Query(None),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get one keyset page of production reports with cost details (Admin only)"""
+    query = db.query(ProductionReport).options(selectinload(ProductionReport.cost_details))
+    query = filter_reports(query, farmer_id, start_date, end_date, is_approved)
+    query = query.order_by(ProductionReport.id.desc())
     
-    if start_date:
-        query = query.filter(ProductionReport.hatch_date >= start_date)
+    reports, next_cursor = keyset_page(query, ProductionReport.id, cursor, limit)
+    return {"items": reports, "next_cursor": next_cursor}
+
+
+@router.get("/admin/reports/summary", response_model=ProductionReportSummaryPage)
+def get_production_reports_summary(
+    farmer_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    is_approved: Optional[bool] = Query(None),
+    cursor: Optional[int] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(100, ge=1, le=500),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get one keyset page of report summaries without cost details (Admin only)"""
+    query = db.query(*REPORT_SUMMARY_COLUMNS)
+    query = filter_reports(query, farmer_id, start_date, end_date, is_approved)
+    query = query.order_by(ProductionReport.id.desc())
     
-    if end_date:
-        query = query.filter(ProductionReport.hatch_date <= end_date)
+    rows, next_cursor = keyset_page(query, ProductionReport.id, cursor, limit)
+    return {"items": [row._asdict() for row in rows], "next_cursor": next_cursor}
+
+
+@router.get("/admin/reports/export")
+def export_production_reports(
+    format: str = Query("csv", pattern="^(csv|xlsx)$"),
+    farmer_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    is_approved: Optional[bool] = Query(None),
+    current_admin: User = Depends(get_current_admin)
+):
+    """Stream production reports joined with their cost details as CSV or XLSX (Admin only)"""
+    filters = {
+        "farmer_id": farmer_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "is_approved": is_approved
+    }
+    filename = f"production_reports_{datetime.now().strftime('%Y%m%d%H%M%S')}.{format}"
+    
+    if format == "xlsx":
+        content = stream_xlsx(**filters)
+        media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    else:
+        content = stream_csv(**filters)
+        media_type = "text/csv"
+    
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@router.get("/admin/cost-breakdown", response_model=List[CostBreakdownItem])
+def get_cost_breakdown(
+    period: Optional[str] = Query(None, pattern="^(day|week|month)$", description="Group by hatch date period"),
+    farmer_id: Optional[int] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    is_approved: Optional[bool] = Query(None),
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Aggregate cost details by item (and optionally period) across reports (Admin only)"""
+    item = func.upper(func.trim(CostDetail.item))
+    bucket = period_bucket(db, ProductionReport.hatch_date, period) if period else None
+    group_columns = ([bucket] if period else []) + [item]
+    
+    query = db.query(
+        *group_columns,
+        func.count(func.distinct(CostDetail.production_report_id)),
+        func.sum(CostDetail.amount),
+        func.sum(CostDetail.quantity_value),
+        func.sum(CostDetail.quantity_value * CostDetail.rate_value)
+    ).join(ProductionReport, ProductionReport.id == CostDetail.production_report_id).filter(item != "TOTAL")
+    query = filter_reports(query, farmer_id, start_date, end_date, is_approved)
+    rows = query.group_by(*group_columns).order_by(*group_columns).all()
+    
+    # Live weight per period, summed once per report
+    weight_query = db.query(*([bucket] if period else []), func.sum(ProductionReport.bird_weight_kg))
+    weight_query = filter_reports(weight_query, farmer_id, start_date, end_date, is_approved)
+    if period:
+        weights = dict(weight_query.group_by(bucket).all())
+    else:
+        weights = {None: weight_query.scalar()}
+    
+    breakdown = []
+    for row in rows:
+        row_period = row[0] if period else None
+        item_name, report_count, total_amount, total_quantity, extended_amount = row[-5:]
+        weight = weights.get(row_period)
+        breakdown.append({
+            "period": row_period,
+            "item": item_name,
+            "report_count": report_count,
+            "total_amount": total_amount or 0,
+            "total_quantity": total_quantity,
+            "average_rate": (extended_amount / total_quantity) if extended_amount and total_quantity else None,
+            "cost_per_kg": (total_amount / weight) if total_amount and weight else None
+        })
+    
+    return breakdown
+
+
+@router.post("/admin/reports/batch", response_model=ProductionReportBatchResponse)
+def create_production_reports_batch(
+    batch_data: ProductionReportBatchCreate,
+    current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.CREATE_REPORT, "report", description="Created production report {target_id} in a batch")),
+    db: Session = Depends(get_db)
+):
+    """Submit many production reports in a single transaction (Admin only)"""
+    farmer_ids = {report.farmer_id for report in batch_data.reports}
+    existing_ids = {
+        farmer_id for (farmer_id,) in db.query(Farmer.id).filter(Farmer.id.in_(farmer_ids)).all()
+    }
+    missing_ids = sorted(farmer_ids - existing_ids)
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Farmers not found: {missing_ids}"
+        )
     
-    if is_approved is not None:
-        query = query.filter(ProductionReport.is_approved == is_approved)
+    try:
+        reports = _insert_production_reports(
+            db,
+            batch_data.reports,
+            [report.farmer_id for report in batch_data.reports]
+        )
+        created = [
+            {"id": report.id, "farmer_id": report.farmer_id, "report_number": report.report_number}
+            for report in reports
+        ]
+        entries = [ranking_entry(report) for report in reports]
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Production reports conflict with existing data"
+        )
     
-    reports = query.order_by(ProductionReport.created_at.desc()).all()
-    return reports
+    report_rankings.record_created(entries)
+    for report in created:
+        audit.add(report["id"])
+    
+    return {"created_count": len(created), "reports": created}
 
 
 @router.get("/admin/reports/{report_id}", response_model=ProductionReportResponse)
 def get_production_report_admin(
     report_id: int,
+    response: Response,
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
@@ -201,16 +560,142 @@ def get_production_report_admin(
             detail="Production report not found"
         )
     
+    set_etag(response, report)
     return report
 
 
-@router.put("/admin/reports/{report_id}/approve", response_model=ProductionReportResponse)
+@router.get("/admin/reports/{report_id}/statement")
+def get_settlement_statement_admin(
+    report_id: int,
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Download the settlement statement PDF for any report (Admin only)"""
+    report = db.query(ProductionReport).options(selectinload(ProductionReport.cost_details)).filter(
+        ProductionReport.id == report_id
+    ).first()
+    
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Production report not found"
+        )
+    
+    return _statement_response(report)
+
+
+def _approval_event(report) -> dict:
+    return {"id": report.id, "report_number": report.report_number, "farmer_id": report.farmer_id}
+
+
+def _bulk_set_approval(
+    db: Session,
+    audit: AuditEntry,
+    report_ids: List[int],
+    approve: bool,
+    current_admin: User
+) -> dict:
+    """Approve or reject many reports with one conditional UPDATE; audit records are queued per report"""
+    if not report_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Report IDs list cannot be empty"
+        )
+    
+    report_ids = list(dict.fromkeys(report_ids))
+    
+    try:
+        updated = db.execute(
+            update(ProductionReport)
+            .where(
+                ProductionReport.id.in_(report_ids),
+                ProductionReport.is_approved == (not approve)
+            )
+            .values(
+                is_approved=approve,
+                approved_by=current_admin.id if approve else None,
+                approved_at=datetime.utcnow() if approve else None,
+                version=ProductionReport.version + 1
+            )
+            .returning(ProductionReport.id, ProductionReport.report_number, ProductionReport.farmer_id, ProductionReport.hatch_date)
+            .execution_options(synchronize_session=False)
+        ).all()
+        updated_ids = [row.id for row in updated]
+        mark_series_dirty(db, "production", [row.hatch_date for row in updated])
+        adjust_counters(db, {REPORTS_UNAPPROVED: -len(updated_ids) if approve else len(updated_ids)})
+        
+        entries = [
+            ranking_entry(row)
+            for row in db.query(*RANKING_COLUMNS).filter(ProductionReport.id.in_(updated_ids)).all()
+        ] if updated_ids else []
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Reports conflict with existing data"
+        )
+    
+    for report_id in updated_ids:
+        audit.add(report_id)
+    audit.skip = not updated_ids
+    if approve:
+        report_rankings.record_approved(entries)
+    else:
+        report_rankings.record_rejected(entries)
+    publish_report_approval([_approval_event(row) for row in updated], approve)
+    
+    updated = set(updated_ids)
+    verb = "approved" if approve else "rejected"
+    return {
+        "message": f"Successfully {verb} {len(updated_ids)} reports",
+        "updated_count": len(updated_ids),
+        "updated_ids": sorted(updated),
+        "skipped_ids": [report_id for report_id in report_ids if report_id not in updated]
+    }
+
+
+@router.put("/admin/reports/bulk-approve")
+def bulk_approve_production_reports(
+    report_ids: List[int],
+    current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.APPROVE_REPORT, "report", description="Bulk approve of production report {target_id}")),
+    db: Session = Depends(get_db)
+):
+    """Approve many production reports at once (Admin only)
+
+    Reports that do not exist or are already approved are returned in skipped_ids.
+    """
+    return _bulk_set_approval(db, audit, report_ids, True, current_admin)
+
+
+@router.put("/admin/reports/bulk-reject")
+def bulk_reject_production_reports(
+    report_ids: List[int],
+    current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.REJECT_REPORT, "report", description="Bulk reject of production report {target_id}")),
+    db: Session = Depends(get_db)
+):
+    """Reject (un-approve) many production reports at once (Admin only)
+
+    Reports that do not exist or are not approved are returned in skipped_ids.
+    """
+    return _bulk_set_approval(db, audit, report_ids, False, current_admin)
+
+
+@router.put(
+    "/admin/reports/{report_id}/approve",
+    response_model=ProductionReportResponse,
+    dependencies=[Depends(audit_action(AdminAction.APPROVE_REPORT, "report", "report_id", "Approved production report {target_id}"))]
+)
 def approve_production_report(
     report_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Approve production report (Admin only)"""
+    """Approve production report (Admin only, honours If-Match)"""
     report = db.query(ProductionReport).filter(ProductionReport.id == report_id).first()
     
     if not report:
@@ -218,6 +703,7 @@ def approve_production_report(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Production report not found"
         )
+    check_if_match(if_match, report)
     
     if report.is_approved:
         raise HTTPException(
@@ -228,20 +714,30 @@ def approve_production_report(
     report.is_approved = True
     report.approved_by = current_admin.id
     report.approved_at = datetime.utcnow()
+    entry = ranking_entry(report)
     
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(report)
+    set_etag(response, report)
+    report_rankings.record_approved([entry])
+    publish_report_approval([_approval_event(report)], True)
     
     return report
 
 
-@router.put("/admin/reports/{report_id}/reject", response_model=ProductionReportResponse)
+@router.put(
+    "/admin/reports/{report_id}/reject",
+    response_model=ProductionReportResponse,
+    dependencies=[Depends(audit_action(AdminAction.REJECT_REPORT, "report", "report_id", "Rejected production report {target_id}"))]
+)
 def reject_production_report(
     report_id: int,
+    response: Response,
+    if_match: Optional[str] = Header(None),
     current_admin: User = Depends(get_current_admin),
     db: Session = Depends(get_db)
 ):
-    """Reject production report (Admin only)"""
+    """Reject production report (Admin only, honours If-Match)"""
     report = db.query(ProductionReport).filter(ProductionReport.id == report_id).first()
     
     if not report:
@@ -249,6 +745,7 @@ def reject_production_report(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Production report not found"
         )
+    check_if_match(if_match, report)
     
     if not report.is_approved:
         raise HTTPException(
@@ -259,13 +756,103 @@ def reject_production_report(
     report.is_approved = False
     report.approved_by = None
     report.approved_at = None
+    entry = ranking_entry(report)
     
-    db.commit()
+    commit_or_conflict(db)
     db.refresh(report)
+    set_etag(response, report)
+    report_rankings.record_rejected([entry])
+    publish_report_approval([_approval_event(report)], False)
     
     return report
 
 
+# Settlement rules and recomputation (Admin only)
+@router.post("/admin/settlement-rules", response_model=SettlementRuleResponse)
+def create_settlement_rule(
+    rule_data: SettlementRuleCreate,
+    current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.SYSTEM_CONFIG, "settlement_rule")),
+    db: Session = Depends(get_db)
+):
+    """Publish a new version of the settlement rate and grade rules (Admin only)"""
+    latest = get_rule(db)
+    rule = SettlementRule(
+        **rule_data.dict(),
+        version=(latest.version + 1) if latest else 1,
+        created_by=current_admin.id
+    )
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    audit.add(rule.id, f"Published settlement rule version {rule.version}")
+    
+    return rule
+
+
+@router.get("/admin/settlement-rules", response_model=List[SettlementRuleResponse])
+def get_settlement_rules(
+    current_admin: User = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Get all settlement rule versions, newest first (Admin only)"""
+    return db.query(SettlementRule).order_by(SettlementRule.version.desc()).all()
+
+
+@router.post("/admin/settlements/recompute", response_model=SettlementRecomputeResponse)
+def recompute_production_settlements(
+    request_data: SettlementRecomputeRequest,
+    current_admin: User = Depends(get_current_admin),
+    audit: AuditEntry = Depends(audit_action(AdminAction.SYSTEM_CONFIG, "settlement_rule")),
+    db: Session = Depends(get_db)
+):
+    """Recompute grade and settlement amounts of unapproved reports (Admin only)
+
+    Returns a before/after diff; changes are only written when apply is true.
+    """
+    rule = get_rule(db, request_data.rule_version)
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Settlement rule not found"
+        )
+    
+    try:
+        result = recompute_settlements(
+            db,
+            rule,
+            report_ids=request_data.report_ids,
+            place=request_data.place,
+            start_date=request_data.start_date,
+            end_date=request_data.end_date,
+            apply=request_data.apply
+        )
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=CONFLICT_DETAIL
+        )
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Settlements conflict with existing data"
+        )
+    
+    if request_data.apply:
+        description = f"Applied settlement rule version {rule.version} to {result['reports_changed']} reports"
+        if result["skipped_report_ids"]:
+            description += f", skipped {len(result['skipped_report_ids'])} changed since they were read"
+        audit.add(rule.id, description)
+    else:
+        # A dry run changes nothing
+        audit.skip = True
+    
+    return result
+
+
 # Cost detail routes
 @router.post("/cost-details", response_model=CostDetailResponse)
 def create_cost_detail(
@@ -293,7 +880,10 @@ def create_cost_detail(
             detail="Cannot add cost details to approved report"
         )
     
-    db_cost_detail = CostDetail(**cost_detail.dict())
+    db_cost_detail = CostDetail(
+        **cost_detail.dict(),
+        **parse_cost_detail(cost_detail.quantity, cost_detail.rate)
+    )
     db.add(db_cost_detail)
     db.commit()
     db.refresh(db_cost_detail)
@@ -75,6 +75,19 @@ def get_current_mill(
     return mill
 
 
+def get_current_report_viewer(
+    current_user: User = Depends(get_current_active_user)
+) -> User:
+    """Get current user allowed to query reporting analytics"""
+    if current_user.role not in (UserRole.REPORT, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied. Report or admin role required."
+        )
+    
+    return current_user
+
+
 def get_current_admin(
     current_user: User = Depends(get_current_active_user)
 ) -> User:
@@ -17,6 +17,57 @@ class Settings(BaseSettings):
     upload_dir: str = "uploads"
     max_file_size: int = 10485760  # 10MB
     
+    # Settlement statements (kept outside the public uploads mount)
+    statement_cache_dir: str = "cache/statements"
+    statement_render_workers: int = 2
+    
+    # Feed type catalogue cache
+    catalogue_ttl_seconds: int = 300
+    
+    # Report percentile rankings
+    ranking_rebuild_seconds: int = 3600
+    
+    # Mill dispatch schedules (reloaded to pick up other workers' changes)
+    dispatch_schedule_ttl_seconds: int = 300
+    
+    # Mill dashboard cache
+    mill_dashboard_ttl_seconds: int = 60
+    
+    # Admin dashboard snapshots (served stale while refreshing in the background)
+    admin_snapshot_fresh_seconds: int = 30
+    admin_snapshot_max_stale_seconds: int = 900
+    
+    # Aggregate counter reconciliation (0 disables the background job)
+    counter_reconcile_seconds: int = 3600
+    
+    # Audit log batching (admin mutations are recorded off the request path)
+    audit_flush_interval_ms: int = 500
+    audit_batch_size: int = 200
+    audit_queue_size: int = 10000
+    
+    # Admin log partitions (monthly; months past retention are archived as
+    # gzipped CSV and dropped, 0 keeps everything)
+    admin_log_retention_months: int = 12
+    admin_log_archive_dir: str = "archive/admin_logs"
+    admin_log_partitions_ahead: int = 2  # PostgreSQL partitions created in advance
+    admin_log_maintenance_seconds: int = 86400  # 0 disables the background job
+    
+    # Row count estimates for the system stats (SQLite statistics refresh interval)
+    row_estimate_analyze_seconds: int = 3600
+    
+    # Columnar analytics snapshot for drill-down queries (optionally exported
+    # from a read replica)
+    analytics_store_dir: str = "cache/analytics"
+    analytics_refresh_seconds: int = 600  # 0 disables the background job
+    analytics_full_refresh_seconds: int = 86400
+    analytics_database_url: Optional[str] = None
+    
+    # Feed demand forecast
+    forecast_ttl_seconds: int = 900
+    forecast_horizon_days: int = 7
+    forecast_lookback_days: int = 14
+    forecast_max_age_days: int = 45  # Flocks are lifted by this age
+    
     # AWS S3
     aws_access_key_id: Optional[str] = None
     aws_secret_access_key: Optional[str] = None
@@ -26,6 +77,12 @@ class Settings(BaseSettings):
     # Redis
     redis_url: str = "redis://localhost:6379"
     
+    # Real-time events (SSE / WebSocket); Redis fan-out for multiple workers
+    event_bus_redis: bool = False
+    event_redis_prefix: str = "kukkuta:events:"
+    event_queue_size: int = 100
+    event_heartbeat_seconds: int = 15
+    
     # Email
     smtp_host: str = "smtp.gmail.com"
     smtp_port: int = 587
@@ -5,6 +5,8 @@ from .mill import Mill, FeedOrder, FeedType
 from .routine import RoutineData, MortalityRecord
 from .production import ProductionReport, CostDetail
 from .admin import AdminLog
+from .settlement import SettlementRule
+from .aggregate import AggregateCounter
 
 __all__ = [
     "Base",
@@ -18,5 +20,7 @@ __all__ = [
     "MortalityRecord",
     "ProductionReport",
     "CostDetail",
-    "AdminLog"
+    "AdminLog",
+    "SettlementRule",
+    "AggregateCounter"
 ] 
\ No newline at end of file
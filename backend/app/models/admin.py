@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,6 +15,7 @@ class AdminAction(str, enum.Enum):
     DELETE_MILL = "delete_mill"
     APPROVE_REPORT = "approve_report"
     REJECT_REPORT = "reject_report"
+    CREATE_REPORT = "create_report"
     SYSTEM_CONFIG = "system_config"
 
 
@@ -31,6 +32,15 @@ class AdminLog(Base):
     user_agent = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # Log browsing: newest first, optionally by action or admin
+        Index("ix_admin_logs_created_at", "created_at"),
+        Index("ix_admin_logs_action_created", "action", "created_at"),
+        Index("ix_admin_logs_user_created", "user_id", "created_at"),
+        # Ids must not be reused once rows are rotated out (see log_partitions)
+        {"sqlite_autoincrement": True},
+    )
+
     # Relationships
     user = relationship("User", back_populates="admin_logs")
 
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AggregateCounter(Base):
+    __tablename__ = "aggregate_counters"
+
+    name = Column(String(100), primary_key=True)  # e.g. feed_orders.status.PENDING
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AggregateCounter(name='{self.name}', value={self.value})>"
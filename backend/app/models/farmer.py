@@ -16,6 +16,9 @@ class Farmer(Base):
     is_verified = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Optimistic concurrency
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     user = relationship("User", back_populates="farmer")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -64,9 +64,21 @@ class FeedOrder(Base):
     delivery_address = Column(Text, nullable=False)
     expected_delivery_date = Column(DateTime(timezone=True))
     actual_delivery_date = Column(DateTime(timezone=True))
+    dispatched_at = Column(DateTime(timezone=True))
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Optimistic concurrency
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Mill work queue: one mill's orders by status
+        Index("ix_feed_orders_mill_status_created", "mill_id", "status", "created_at"),
+        # Recent activity counts in the system stats
+        Index("ix_feed_orders_created_at", "created_at"),
+        # Incremental analytics snapshot refresh
+        Index("ix_feed_orders_updated_at", "updated_at"),
+    )
 
     # Relationships
     farmer = relationship("Farmer", back_populates="feed_orders")
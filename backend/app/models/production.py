@@ -1,7 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean, Enum, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+import enum
+
+
+class CostBasis(str, enum.Enum):
+    ACTUAL = "actual"  # Billed at actual cost, no quantity or rate
+    FIXED = "fixed"  # Lump sum amount
+    PER_UNIT = "per_unit"  # Quantity x rate
 
 
 class ProductionReport(Base):
@@ -43,6 +50,12 @@ class ProductionReport(Base):
     minimum_growing_charge = Column(String(100))
     final_amount = Column(Float, nullable=False)
     
+    # Numeric amounts parsed from the text settlement fields above
+    performance_bonus_value = Column(Float)
+    shorting_bird_value = Column(Float)
+    extra_mortality_value = Column(Float)
+    minimum_growing_charge_value = Column(Float)
+    
     # Report Status
     is_approved = Column(Boolean, default=False)
     approved_by = Column(Integer, ForeignKey("users.id"))
@@ -50,6 +63,15 @@ class ProductionReport(Base):
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # Optimistic concurrency
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Recent activity counts in the system stats
+        Index("ix_production_reports_created_at", "created_at"),
+        # Incremental analytics snapshot refresh
+        Index("ix_production_reports_updated_at", "updated_at"),
+    )
 
     # Relationships
     farmer = relationship("Farmer", back_populates="production_reports")
@@ -68,6 +90,12 @@ class CostDetail(Base):
     quantity = Column(String(50))  # Can be number or "ACTUAL"
     rate = Column(String(50))  # Can be number or empty
     amount = Column(Float, nullable=False)
+    
+    # Typed values parsed from quantity/rate
+    basis = Column(Enum(CostBasis))
+    quantity_value = Column(Float)
+    rate_value = Column(Float)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
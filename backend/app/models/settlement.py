@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Float, JSON
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SettlementRule(Base):
+    __tablename__ = "settlement_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    version = Column(Integer, unique=True, nullable=False)
+    name = Column(String(100), nullable=False)
+    
+    # Growing charge (all rates per kg of live weight lifted unless noted)
+    basic_rate = Column(Float, nullable=False)
+    standard_cost_per_kg = Column(Float, nullable=False)
+    performance_share = Column(Float, nullable=False, default=0.5)  # Share of cost over/under standard
+    minimum_growing_charge_per_kg = Column(Float, nullable=False, default=0)
+    
+    # Deductions
+    allowed_mortality_percent = Column(Float, nullable=False, default=5)
+    extra_mortality_rate = Column(Float, nullable=False, default=0)  # per bird above the allowance
+    
+    # Ordered list of {"grade", "max_fcr", "max_mortality_percent", "bonus_per_kg"}
+    grade_slabs = Column(JSON, nullable=False)
+    
+    created_by = Column(Integer, ForeignKey("users.id"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SettlementRule(id={self.id}, version={self.version}, name='{self.name}')>"
@@ -1,14 +1,17 @@
 from .farmer import FarmerCreate, FarmerUpdate, FarmerResponse, FarmCreate, FarmUpdate, FarmResponse, FarmerWithFarms, AdminFarmerCreate, AdminFarmerUpdate, FarmerListResponse
-from .mill import MillCreate, MillUpdate, MillResponse, FeedOrderCreate, FeedOrderUpdate, FeedOrderResponse
+from .mill import MillCreate, MillUpdate, MillResponse, FeedOrderCreate, FeedOrderUpdate, FeedOrderResponse, FeedOrderPage, FeedQueueSummary, FeedOrderBulkStatusUpdate, FeedOrderBulkStatusResponse
 from .routine import RoutineDataCreate, RoutineDataUpdate, RoutineDataResponse, MortalityRecordCreate, MortalityRecordResponse, RoutineDataWithMortality
-from .production import ProductionReportCreate, ProductionReportUpdate, ProductionReportResponse, CostDetailCreate, CostDetailResponse
+from .production import ProductionReportCreate, ProductionReportUpdate, ProductionReportResponse, CostDetailCreate, CostDetailResponse, ProductionReportBatchCreate, ProductionReportBatchResponse, ProductionReportSummary, ProductionReportPage, ProductionReportSummaryPage
 from .user import UserCreate, UserUpdate, UserLogin, Token, UserResponse
 
 __all__ = [
     "FarmerCreate", "FarmerUpdate", "FarmerResponse", "FarmCreate", "FarmUpdate", "FarmResponse", "FarmerWithFarms",
     "AdminFarmerCreate", "AdminFarmerUpdate", "FarmerListResponse",
     "MillCreate", "MillUpdate", "MillResponse", "FeedOrderCreate", "FeedOrderUpdate", "FeedOrderResponse",
+    "FeedOrderPage", "FeedQueueSummary", "FeedOrderBulkStatusUpdate", "FeedOrderBulkStatusResponse",
     "RoutineDataCreate", "RoutineDataUpdate", "RoutineDataResponse", "MortalityRecordCreate", "MortalityRecordResponse", "RoutineDataWithMortality",
     "ProductionReportCreate", "ProductionReportUpdate", "ProductionReportResponse", "CostDetailCreate", "CostDetailResponse",
+    "ProductionReportBatchCreate", "ProductionReportBatchResponse", "ProductionReportSummary", "ProductionReportPage",
+    "ProductionReportSummaryPage",
     "UserCreate", "UserUpdate", "UserLogin", "Token", "UserResponse"
 ] 
\ No newline at end of file
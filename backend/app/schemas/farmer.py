@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, EmailStr
 from typing import Optional, List
 from datetime import datetime
 
@@ -22,6 +22,7 @@ class FarmerResponse(FarmerBase):
     id: int
     user_id: int
     is_verified: bool
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     class Config:
@@ -55,4 +56,24 @@ class FarmResponse(FarmBase):
         from_attributes = True
 
 class FarmerWithFarms(FarmerResponse):
-    farms: List[FarmResponse] = [] 
\ No newline at end of file
+    farms: List[FarmResponse] = [] 
+class AdminFarmerCreate(FarmerBase):
+    email: EmailStr
+    password: str
+    full_name: str
+    is_verified: Optional[bool] = True
+
+class AdminFarmerUpdate(BaseModel):
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = None
+    phone: Optional[str] = None
+    address: Optional[str] = None
+    farm_type: Optional[str] = None
+    experience_years: Optional[int] = None
+    is_verified: Optional[bool] = None
+
+class FarmerListResponse(FarmerResponse):
+    user_email: str
+    user_full_name: str
+    user_is_active: bool
+    farm_count: int = 0
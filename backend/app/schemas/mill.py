@@ -1,6 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Dict, Optional, List
+from datetime import datetime, date
 from app.models.mill import OrderStatus
 
 
@@ -36,7 +36,7 @@ class MillResponse(MillBase):
 
 class FeedOrderItemBase(BaseModel):
     feed_type_id: int
-    quantity: float
+    quantity: float = Field(..., gt=0)
 
 
 class FeedOrderItemCreate(FeedOrderItemBase):
@@ -61,9 +61,9 @@ class FeedOrderBase(BaseModel):
 
 
 class FeedOrderCreate(FeedOrderBase):
-    farmer_id: int
+    farmer_id: Optional[int] = None  # Taken from the authenticated farmer
     mill_id: int
-    items: List[FeedOrderItemCreate]
+    items: List[FeedOrderItemCreate] = Field(..., min_length=1)
 
 
 class FeedOrderUpdate(BaseModel):
@@ -80,9 +80,120 @@ class FeedOrderResponse(FeedOrderBase):
     status: OrderStatus
     total_amount: float
     actual_delivery_date: Optional[datetime] = None
+    dispatched_at: Optional[datetime] = None
+    version: int = 1
     created_at: datetime
     updated_at: Optional[datetime] = None
     items: List[FeedOrderItemResponse] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class FeedOrderPage(BaseModel):
+    items: List[FeedOrderResponse]
+    next_cursor: Optional[int] = None
+
+
+class FeedQueueItem(BaseModel):
+    feed_type_id: int
+    feed_type_name: str
+    order_count: int
+    total_quantity: float  # in kg
+    total_amount: float
+
+
+class FeedQueueSummary(BaseModel):
+    statuses: List[OrderStatus]
+    order_count: int
+    total_quantity: float
+    feed_types: List[FeedQueueItem]
+
+
+class FeedOrderTransition(BaseModel):
+    order_id: Optional[int] = None
+    order_number: Optional[str] = None
+    status: OrderStatus
+    notes: Optional[str] = None
+
+
+class FeedOrderBulkStatusUpdate(BaseModel):
+    transitions: List[FeedOrderTransition] = Field(..., min_length=1, max_length=1000)
+
+
+class FeedOrderTransitionResult(BaseModel):
+    order_id: Optional[int] = None
+    order_number: Optional[str] = None
+    farmer_id: Optional[int] = None
+    from_status: Optional[OrderStatus] = None
+    to_status: Optional[OrderStatus] = None
+    outcome: str  # updated, not_found, invalid_status, invalid_transition, duplicate, conflict
+    detail: Optional[str] = None
+
+
+class FeedOrderBulkStatusResponse(BaseModel):
+    updated_count: int
+    results: List[FeedOrderTransitionResult]
+
+
+class DispatchScheduleDay(BaseModel):
+    date: date
+    planned_quantity: float  # kg produced that day, never above capacity
+    orders_finishing: int
+
+
+class DispatchScheduleOrder(BaseModel):
+    order_id: int
+    order_number: str
+    status: OrderStatus
+    quantity: float
+    requested_date: Optional[date] = None
+    production_date: date
+    late: bool
+
+
+class DispatchSchedule(BaseModel):
+    capacity_per_day: float
+    start_date: date
+    total_quantity: float
+    order_count: int
+    days_needed: int
+    days: List[DispatchScheduleDay]
+    orders: List[DispatchScheduleOrder]
+
+
+class FeedForecastDay(BaseModel):
+    date: date
+    feed_types: Dict[str, float]  # kg per feed type
+
+
+class MillFeedForecast(BaseModel):
+    mill_id: int
+    generated_at: datetime
+    horizon_days: int
+    farmers_included: int
+    days: List[FeedForecastDay]
+    totals: Dict[str, float]
+
+
+class MillRevenuePeriod(BaseModel):
+    period: str
+    order_count: int
+    revenue: float
+
+
+class MillPendingFeed(BaseModel):
+    feed_type_id: int
+    feed_type_name: str
+    quantity_kg: float
+
+
+class MillDashboard(BaseModel):
+    mill_id: int
+    period: str
+    generated_at: datetime
+    status_counts: Dict[str, int]
+    revenue: List[MillRevenuePeriod]
+    pending_feed: List[MillPendingFeed]
+    delivered_with_dispatch_time: int
+    avg_dispatch_to_delivery_hours: Optional[float] = None
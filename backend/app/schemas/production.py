@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
 from datetime import datetime
+from app.models.production import CostBasis
 
 
 class CostDetailBase(BaseModel):
@@ -17,6 +18,9 @@ class CostDetailCreate(CostDetailBase):
 class CostDetailResponse(CostDetailBase):
     id: int
     production_report_id: int
+    basis: Optional[CostBasis] = None
+    quantity_value: Optional[float] = None
+    rate_value: Optional[float] = None
     created_at: datetime
 
     class Config:
@@ -52,18 +56,53 @@ class ProductionReportBase(BaseModel):
 
 class ProductionReportCreate(ProductionReportBase):
     farmer_id: int
-    cost_details: List[CostDetailCreate]
+    cost_details: List[CostDetailBase]
 
 
 class ProductionReportUpdate(BaseModel):
-    is_approved: Optional[bool] = None
-    approved_by: Optional[int] = None
+    """Figures a farmer may correct on an unapproved report.
+
+    Approval fields are not accepted here; they change through the admin
+    approve and reject endpoints only.
+    """
+    farmer_name: Optional[str] = None
+    place: Optional[str] = None
+    hatch_date: Optional[datetime] = None
+    total_mortality_percent: Optional[float] = None
+    chicks_housed: Optional[int] = None
+    mortality_nos: Optional[int] = None
+    bird_lifted: Optional[int] = None
+    shortage: Optional[int] = None
+    bird_weight_kg: Optional[float] = None
+    fcr_percent: Optional[float] = None
+    lifting_percent: Optional[float] = None
+    avg_weight_kg: Optional[float] = None
+    mean_age_days: Optional[int] = None
+    farmer_profit_kg: Optional[float] = None
+    msp_kg: Optional[float] = None
+    lot_grade: Optional[str] = None
+    production_cost_per_kg: Optional[float] = None
+    basic_rate: Optional[float] = None
+    performance_bonus: Optional[str] = None
+    balance: Optional[float] = None
+    shorting_bird_kg: Optional[str] = None
+    extra_mortality: Optional[str] = None
+    minimum_growing_charge: Optional[str] = None
+    final_amount: Optional[float] = None
+
+    class Config:
+        extra = "forbid"
 
 
 class ProductionReportResponse(ProductionReportBase):
     id: int
     farmer_id: int
     report_number: str
+    version: int = 1
+    performance_bonus_value: Optional[float] = None
+    shorting_bird_value: Optional[float] = None
+    extra_mortality_value: Optional[float] = None
+    minimum_growing_charge_value: Optional[float] = None
     is_approved: bool
     approved_by: Optional[int] = None
     approved_at: Optional[datetime] = None
@@ -72,4 +111,59 @@ class ProductionReportResponse(ProductionReportBase):
     cost_details: List[CostDetailResponse] = []
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class ProductionReportBatchCreate(BaseModel):
+    reports: List[ProductionReportCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class ProductionReportBatchItem(BaseModel):
+    id: int
+    farmer_id: int
+    report_number: str
+
+
+class ProductionReportBatchResponse(BaseModel):
+    created_count: int
+    reports: List[ProductionReportBatchItem]
+
+
+class ProductionReportSummary(BaseModel):
+    id: int
+    farmer_id: int
+    report_number: str
+    farmer_name: str
+    place: str
+    hatch_date: datetime
+    chicks_housed: int
+    total_mortality_percent: float
+    fcr_percent: float
+    avg_weight_kg: float
+    lot_grade: str
+    final_amount: float
+    is_approved: bool
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ProductionReportPage(BaseModel):
+    items: List[ProductionReportResponse]
+    next_cursor: Optional[int] = None
+
+
+class ProductionReportSummaryPage(BaseModel):
+    items: List[ProductionReportSummary]
+    next_cursor: Optional[int] = None
+
+
+class CostBreakdownItem(BaseModel):
+    period: Optional[str] = None
+    item: str
+    report_count: int
+    total_amount: float
+    total_quantity: Optional[float] = None
+    average_rate: Optional[float] = None
+    cost_per_kg: Optional[float] = None
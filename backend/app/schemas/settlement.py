@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any
+from datetime import datetime, date
+
+
+class GradeSlab(BaseModel):
+    grade: str
+    max_fcr: float
+    max_mortality_percent: float
+    bonus_per_kg: float = 0
+
+
+class SettlementRuleBase(BaseModel):
+    name: str
+    basic_rate: float
+    standard_cost_per_kg: float
+    performance_share: float = 0.5
+    minimum_growing_charge_per_kg: float = 0
+    allowed_mortality_percent: float = 5
+    extra_mortality_rate: float = 0
+    grade_slabs: List[GradeSlab] = Field(..., min_length=1)
+
+
+class SettlementRuleCreate(SettlementRuleBase):
+    pass
+
+
+class SettlementRuleResponse(SettlementRuleBase):
+    id: int
+    version: int
+    created_by: Optional[int] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class SettlementRecomputeRequest(BaseModel):
+    rule_version: Optional[int] = None  # Latest version when omitted
+    report_ids: Optional[List[int]] = None
+    place: Optional[str] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    apply: bool = False
+
+
+class SettlementDiff(BaseModel):
+    id: int
+    report_number: str
+    changes: Dict[str, Dict[str, Any]]
+
+
+class SettlementRecomputeResponse(BaseModel):
+    rule_version: int
+    applied: bool
+    reports_evaluated: int
+    reports_changed: int
+    skipped_report_ids: List[int] = []  # Approved or edited since they were read; not written
+    final_amount_before: float
+    final_amount_after: float
+    diffs: List[SettlementDiff]
@@ -0,0 +1,231 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.farmer import Farmer
+from app.models.mill import FeedOrder, OrderStatus
+from app.models.production import ProductionReport, CostDetail
+from app.models.routine import RoutineData, MortalityRecord
+from app.models.user import User
+from app.services.cache import SnapshotCache
+from app.services.row_estimates import EXACT, table_counts
+from app.services.counters import (
+    FARMERS_TOTAL, MILLS_TOTAL, ORDERS_TOTAL, REPORTS_TOTAL, REPORTS_UNAPPROVED,
+    month_counter, order_status_counter, read_counters
+)
+
+_snapshots = SnapshotCache(settings.admin_snapshot_fresh_seconds, settings.admin_snapshot_max_stale_seconds)
+
+
+def dashboard_counts(db: Session) -> dict:
+    """Dashboard totals read from the maintained aggregate counters"""
+    orders_month = month_counter("feed_orders", datetime.utcnow())
+    reports_month = month_counter("production_reports", datetime.utcnow())
+    values = read_counters(db, [
+        FARMERS_TOTAL, MILLS_TOTAL, ORDERS_TOTAL, REPORTS_TOTAL,
+        order_status_counter(OrderStatus.PENDING), REPORTS_UNAPPROVED, orders_month, reports_month
+    ])
+    return {
+        "total_farmers": values[FARMERS_TOTAL],
+        "total_mills": values[MILLS_TOTAL],
+        "total_orders": values[ORDERS_TOTAL],
+        "total_reports": values[REPORTS_TOTAL],
+        "pending_orders": values[order_status_counter(OrderStatus.PENDING)],
+        "unapproved_reports": values[REPORTS_UNAPPROVED],
+        "monthly_orders": values[orders_month],
+        "monthly_reports": values[reports_month]
+    }
+
+
+def compute_recent_activity(db: Session) -> dict:
+    """The latest orders and reports shown on the dashboard"""
+    recent_orders = db.query(
+        FeedOrder.id,
+        FeedOrder.order_number,
+        FeedOrder.farmer_id,
+        FeedOrder.status,
+        FeedOrder.total_amount,
+        FeedOrder.created_at
+    ).order_by(FeedOrder.created_at.desc()).limit(5).all()
+    recent_reports = db.query(
+        ProductionReport.id,
+        ProductionReport.report_number,
+        ProductionReport.farmer_name,
+        ProductionReport.is_approved,
+        ProductionReport.created_at
+    ).order_by(ProductionReport.created_at.desc()).limit(5).all()
+
+    return {
+        "recent_orders": [row._asdict() for row in recent_orders],
+        "recent_reports": [row._asdict() for row in recent_reports],
+        "generated_at": datetime.utcnow()
+    }
+
+
+def compute_system_stats(db: Session, exact: bool = False) -> dict:
+    """User, data volume and last-7-days activity counts.
+
+    Data volumes are planner estimates unless `exact` is set, so the largest
+    tables are not scanned; `count_accuracy` says which counts are exact.
+    Recent activity is counted through the created_at indexes.
+    """
+    week_ago = datetime.now() - timedelta(days=7)
+    users = select(
+        func.count().label("total"),
+        func.count().filter(User.is_active == True).label("active"),
+        func.count().filter(User.created_at >= week_ago).label("recent")
+    ).select_from(User).subquery()
+    row = db.execute(select(
+        users.c.total,
+        users.c.active,
+        users.c.recent,
+        select(func.count()).select_from(FeedOrder).where(FeedOrder.created_at >= week_ago).scalar_subquery().label("recent_orders"),
+        select(func.count()).select_from(ProductionReport).where(ProductionReport.created_at >= week_ago).scalar_subquery().label("recent_reports")
+    ).select_from(users)).one()
+    volumes, accuracy = table_counts(db, [RoutineData, MortalityRecord, ProductionReport, CostDetail], exact)
+
+    return {
+        "users": {
+            "total": row.total,
+            "active": row.active,
+            "recent": row.recent
+        },
+        "data": {
+            "routine_records": volumes[RoutineData.__tablename__],
+            "mortality_records": volumes[MortalityRecord.__tablename__],
+            "production_reports": volumes[ProductionReport.__tablename__],
+            "cost_details": volumes[CostDetail.__tablename__]
+        },
+        "activity": {
+            "recent_orders": row.recent_orders,
+            "recent_reports": row.recent_reports
+        },
+        "count_accuracy": {
+            "users": EXACT,
+            "data.routine_records": accuracy[RoutineData.__tablename__],
+            "data.mortality_records": accuracy[MortalityRecord.__tablename__],
+            "data.production_reports": accuracy[ProductionReport.__tablename__],
+            "data.cost_details": accuracy[CostDetail.__tablename__],
+            "activity": EXACT
+        },
+        "generated_at": datetime.utcnow()
+    }
+
+
+def compute_farmers_count(db: Session) -> dict:
+    """Farmer verification and activity counts in one query, plus the farm type distribution"""
+    row = db.query(
+        func.count(Farmer.id).label("total"),
+        func.count(Farmer.id).filter(Farmer.is_verified == True).label("verified"),
+        func.count(Farmer.id).filter(User.is_active == True).label("active")
+    ).outerjoin(User, User.id == Farmer.user_id).one()
+    farm_types = db.query(Farmer.farm_type, func.count(Farmer.id)).group_by(Farmer.farm_type).all()
+
+    return {
+        "total_farmers": row.total,
+        "verified_farmers": row.verified,
+        "unverified_farmers": row.total - row.verified,
+        "active_users": row.active,
+        "inactive_users": row.total - row.active,
+        "verification_rate": (row.verified / row.total * 100) if row.total > 0 else 0,
+        "farm_type_distribution": {farm_type: count for farm_type, count in farm_types},
+        "generated_at": datetime.utcnow()
+    }
+
+
+def _date_range(query, column, start_date: Optional[date], end_date: Optional[date]):
+    if start_date:
+        query = query.filter(column >= start_date)
+    if end_date:
+        query = query.filter(column <= end_date)
+    return query
+
+
+def farmer_analytics(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+    """Farm type distribution and verification counts, grouped in SQL"""
+    rows = _date_range(db.query(
+        Farmer.farm_type,
+        func.count(Farmer.id).label("farmers"),
+        func.count(Farmer.id).filter(Farmer.is_verified == True).label("verified")
+    ), Farmer.created_at, start_date, end_date).group_by(Farmer.farm_type).all()
+
+    total = sum(row.farmers for row in rows)
+    verified = sum(row.verified for row in rows)
+    return {
+        "total_farmers": total,
+        "farm_types": {row.farm_type: row.farmers for row in rows},
+        "verified_farmers": verified,
+        "unverified_farmers": total - verified,
+        "verification_rate": (verified / total * 100) if total else 0
+    }
+
+
+def order_analytics(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+    """Status distribution and revenue, grouped in SQL"""
+    rows = _date_range(db.query(
+        FeedOrder.status,
+        func.count(FeedOrder.id).label("orders"),
+        func.coalesce(func.sum(FeedOrder.total_amount), 0).label("revenue")
+    ), FeedOrder.created_at, start_date, end_date).group_by(FeedOrder.status).all()
+
+    total = sum(row.orders for row in rows)
+    revenue = sum(row.revenue for row in rows)
+    return {
+        "total_orders": total,
+        "status_distribution": {row.status.value: row.orders for row in rows},
+        "total_revenue": revenue,
+        "average_order_value": revenue / total if total else 0
+    }
+
+
+def production_analytics(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None) -> dict:
+    """Approval rate and average mortality, FCR and weight in one aggregate row"""
+    row = _date_range(db.query(
+        func.count(ProductionReport.id).label("reports"),
+        func.count(ProductionReport.id).filter(ProductionReport.is_approved == True).label("approved"),
+        func.coalesce(func.avg(ProductionReport.total_mortality_percent), 0).label("mortality"),
+        func.coalesce(func.avg(ProductionReport.fcr_percent), 0).label("fcr"),
+        func.coalesce(func.avg(ProductionReport.avg_weight_kg), 0).label("weight")
+    ), ProductionReport.hatch_date, start_date, end_date).one()
+
+    return {
+        "total_reports": row.reports,
+        "approved_reports": row.approved,
+        "approval_rate": (row.approved / row.reports * 100) if row.reports else 0,
+        "average_mortality": row.mortality,
+        "average_fcr": row.fcr,
+        "average_weight": row.weight
+    }
+
+
+def _with_session(compute):
+    def factory():
+        db = SessionLocal()
+        try:
+            return compute(db)
+        finally:
+            db.close()
+    return factory
+
+
+def get_admin_dashboard(db: Session) -> dict:
+    """Live counters plus the recent activity snapshot"""
+    return {**dashboard_counts(db), **_snapshots.get("recent_activity", _with_session(compute_recent_activity))}
+
+
+def get_system_stats(exact: bool = False) -> dict:
+    """Snapshot with estimated data volumes, or exact counts computed now"""
+    if exact:
+        return _with_session(lambda db: compute_system_stats(db, exact=True))()
+    return _snapshots.get("system_stats", _with_session(compute_system_stats))
+
+
+def get_farmers_count() -> dict:
+    return _snapshots.get("farmers_count", _with_session(compute_farmers_count))
+
+
+def invalidate_admin_stats():
+    """Mark every admin snapshot stale so the next read refreshes it in the background"""
+    _snapshots.invalidate()
@@ -0,0 +1,315 @@
+import threading
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session, object_session
+from app.models.aggregate import AggregateCounter
+from app.models.mill import FeedOrder
+from app.models.production import ProductionReport
+from app.models.routine import RoutineData
+from app.services.counters import GENERATION_PREFIX, adjust_counters
+from app.services.sql_helpers import PERIODS, period_bucket
+
+# Longest series served in one request, in buckets
+MAX_BUCKETS = 3660
+
+_DIRTY_KEY = "analytics_series_dirty"
+
+
+class SeriesSpec(NamedTuple):
+    model: type
+    column: object  # timestamp the rows are bucketed by
+    sums: List[Tuple[str, Callable]]  # raw additive values stored per bucket
+    finish: Callable[[dict], dict]  # raw sums -> reported metrics
+
+
+def _average(total: float, count: int) -> float:
+    return total / count if count else 0
+
+
+SERIES: Dict[str, SeriesSpec] = {
+    "orders": SeriesSpec(
+        FeedOrder,
+        FeedOrder.created_at,
+        [
+            ("orders", lambda: func.count(FeedOrder.id)),
+            ("revenue", lambda: func.coalesce(func.sum(FeedOrder.total_amount), 0)),
+        ],
+        lambda raw: {
+            "orders": raw["orders"],
+            "revenue": raw["revenue"],
+            "average_order_value": _average(raw["revenue"], raw["orders"]),
+        },
+    ),
+    "production": SeriesSpec(
+        ProductionReport,
+        ProductionReport.hatch_date,
+        [
+            ("reports", lambda: func.count(ProductionReport.id)),
+            ("approved", lambda: func.count(ProductionReport.id).filter(ProductionReport.is_approved == True)),
+            ("mortality", lambda: func.coalesce(func.sum(ProductionReport.total_mortality_percent), 0)),
+            ("fcr", lambda: func.coalesce(func.sum(ProductionReport.fcr_percent), 0)),
+            ("weight", lambda: func.coalesce(func.sum(ProductionReport.avg_weight_kg), 0)),
+        ],
+        lambda raw: {
+            "reports": raw["reports"],
+            "approved_reports": raw["approved"],
+            "approval_rate": _average(raw["approved"] * 100, raw["reports"]),
+            "average_mortality": _average(raw["mortality"], raw["reports"]),
+            "average_fcr": _average(raw["fcr"], raw["reports"]),
+            "average_weight": _average(raw["weight"], raw["reports"]),
+        },
+    ),
+    "routine": SeriesSpec(
+        RoutineData,
+        RoutineData.date,
+        [
+            ("records", lambda: func.count(RoutineData.id)),
+            ("feed", lambda: func.coalesce(func.sum(RoutineData.feed_consumption_kg), 0)),
+            ("mortality", lambda: func.coalesce(func.sum(RoutineData.mortality_count), 0)),
+            ("weight", lambda: func.coalesce(func.sum(RoutineData.average_bird_weight_g), 0)),
+        ],
+        lambda raw: {
+            "records": raw["records"],
+            "feed_consumption_kg": raw["feed"],
+            "mortality_count": raw["mortality"],
+            "average_bird_weight_g": _average(raw["weight"], raw["records"]),
+        },
+    ),
+}
+
+
+def bucket_start(day: date, period: str) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket(start: date, period: str) -> date:
+    if period == "week":
+        return start + timedelta(days=7)
+    if period == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def bucket_label(start: date, period: str) -> str:
+    """Same labels as sql_helpers.period_bucket"""
+    return start.strftime("%Y-%m") if period == "month" else start.isoformat()
+
+
+def bucket_starts(start_date: date, end_date: date, period: str) -> List[date]:
+    starts = []
+    current = bucket_start(start_date, period)
+    while current <= end_date:
+        starts.append(current)
+        current = next_bucket(current, period)
+    return starts
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _generation_prefix(series: str) -> str:
+    return f"{GENERATION_PREFIX}series.{series}."
+
+
+def generation_counter(series: str, day: date) -> str:
+    """Aggregate counter bumped by every write to the series in day's month"""
+    return f"{_generation_prefix(series)}{day.strftime('%Y-%m')}"
+
+
+def _month_days(month: str) -> List[date]:
+    start = datetime.strptime(month, "%Y-%m").date()
+    end = next_bucket(start, "month")
+    return [start + timedelta(days=offset) for offset in range((end - start).days)]
+
+
+class SeriesCache:
+    """Per-bucket results of the analytics series.
+
+    Closed buckets (ending before today, UTC) are computed once and kept
+    until a write touches their month; the bucket containing today is
+    always recomputed. Every write bumps a per-month generation counter in
+    aggregate_counters within its own transaction (see the hooks below),
+    and each request compares those with the generations this process last
+    saw, so edits made through any worker evict the affected buckets.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[str, str], Dict[str, dict]] = defaultdict(dict)
+        # Bumped on every eviction so a computation racing a write is not cached
+        self._generation: Dict[str, int] = defaultdict(int)
+        # Month -> last seen value of its generation counter, per series
+        self._seen: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def _sync(self, db: Session, series: str):
+        """Evict the months whose generation moved since this process last looked"""
+        prefix = _generation_prefix(series)
+        rows = db.query(AggregateCounter.name, AggregateCounter.value).filter(
+            AggregateCounter.name.like(f"{prefix}%")
+        ).all()
+        generations = {name[len(prefix):]: int(value) for name, value in rows}
+        with self._lock:
+            seen = self._seen[series]
+            changed = [month for month, value in generations.items() if value > seen.get(month, -1)]
+            for month in changed:
+                self._evict(series, _month_days(month))
+                seen[month] = generations[month]
+
+    @staticmethod
+    def _query(db: Session, spec: SeriesSpec, period: str, start: date, end: date) -> Dict[str, dict]:
+        """Raw sums for every bucket with rows in [start, end), in one GROUP BY"""
+        bucket = period_bucket(db, spec.column, period)
+        rows = db.query(bucket, *[expression().label(name) for name, expression in spec.sums]).filter(
+            spec.column >= _midnight(start),
+            spec.column < _midnight(end)
+        ).group_by(bucket).all()
+        return {row[0]: {name: row[i + 1] or 0 for i, (name, _) in enumerate(spec.sums)} for row in rows}
+
+    def buckets(self, db: Session, series: str, period: str, starts: List[date], today: date) -> Dict[str, dict]:
+        spec = SERIES[series]
+        labels = {start: bucket_label(start, period) for start in starts}
+        empty = {name: 0 for name, _ in spec.sums}
+        self._sync(db, series)
+        with self._lock:
+            cached = dict(self._buckets[(series, period)])
+            generation = self._generation[series]
+
+        missing = [start for start in starts if next_bucket(start, period) <= today and labels[start] not in cached]
+        if missing:
+            computed = self._query(db, spec, period, missing[0], next_bucket(missing[-1], period))
+            closed = {labels[start]: computed.get(labels[start], empty) for start in missing}
+            with self._lock:
+                if self._generation[series] == generation:
+                    self._buckets[(series, period)].update(closed)
+            cached.update(closed)
+
+        open_starts = [start for start in starts if next_bucket(start, period) > today]
+        if open_starts:
+            computed = self._query(db, spec, period, open_starts[0], next_bucket(open_starts[-1], period))
+            for start in open_starts:
+                cached[labels[start]] = computed.get(labels[start], empty)
+
+        return {labels[start]: cached[labels[start]] for start in starts}
+
+    def _evict(self, series: str, days: Iterable[date]):
+        """Drop the cached buckets, of every period, containing these days; holds _lock"""
+        days = set(days)
+        self._generation[series] += 1
+        for period in PERIODS:
+            labels = {bucket_label(bucket_start(day, period), period) for day in days}
+            cached = self._buckets.get((series, period))
+            if cached:
+                for label in labels:
+                    cached.pop(label, None)
+
+
+series_cache = SeriesCache()
+
+
+def get_series(
+    db: Session,
+    series: str,
+    period: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """Day, week or month buckets of one analytics series plus range totals.
+
+    Raises ValueError for an unknown series or period, or an invalid range.
+    """
+    if series not in SERIES:
+        raise ValueError(f"Unknown series: {series}")
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    today = datetime.utcnow().date()
+    end_date = end_date or today
+    start_date = start_date or end_date - timedelta(days=365)
+    if start_date > end_date:
+        raise ValueError("start_date must not be after end_date")
+    starts = bucket_starts(start_date, end_date, period)
+    if len(starts) > MAX_BUCKETS:
+        raise ValueError(f"Range spans more than {MAX_BUCKETS} {period} buckets")
+
+    spec = SERIES[series]
+    raw_buckets = series_cache.buckets(db, series, period, starts, today)
+    totals = {name: 0 for name, _ in spec.sums}
+    buckets = []
+    for start in starts:
+        raw = raw_buckets[bucket_label(start, period)]
+        for name in totals:
+            totals[name] += raw[name]
+        buckets.append({
+            "bucket": bucket_label(start, period),
+            "start_date": start,
+            "closed": next_bucket(start, period) <= today,
+            **spec.finish(raw)
+        })
+
+    return {
+        "series": series,
+        "period": period,
+        "start_date": start_date,
+        "end_date": end_date,
+        "buckets": buckets,
+        "totals": spec.finish(totals)
+    }
+
+
+# Row-level hooks: rows written through the ORM bump the generation of
+# their months at the end of the flush, in the same transaction. Bulk
+# statements call mark_series_dirty().
+
+def _row_day(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    return value if isinstance(value, date) else None
+
+
+def _generation_deltas(series: str, timestamps: Iterable) -> Dict[str, int]:
+    return {
+        generation_counter(series, day): 1
+        for day in map(_row_day, timestamps) if day is not None
+    }
+
+
+def mark_series_dirty(db: Session, series: str, timestamps: Iterable):
+    """Bump the generation of these timestamps' months inside the caller's transaction"""
+    adjust_counters(db, _generation_deltas(series, timestamps))
+
+
+def _mark_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    state = inspect(target)
+    for series, spec in SERIES.items():
+        if spec.model is mapper.class_:
+            name = spec.column.key
+            # Current and previous timestamp, so a moved row evicts both buckets
+            timestamps = [state.dict.get(name)] + list(state.attrs[name].history.deleted or ())
+            session.info.setdefault(_DIRTY_KEY, {}).update(_generation_deltas(series, timestamps))
+
+
+for _spec in SERIES.values():
+    event.listen(_spec.model, "after_insert", _mark_dirty)
+    event.listen(_spec.model, "after_update", _mark_dirty)
+    event.listen(_spec.model, "after_delete", _mark_dirty)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_dirty_generations(session, flush_context):
+    deltas = session.info.pop(_DIRTY_KEY, None)
+    if deltas:
+        adjust_counters(session, deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_dirty_series(session):
+    session.info.pop(_DIRTY_KEY, None)
@@ -0,0 +1,174 @@
+import queue
+import threading
+from datetime import datetime
+from typing import List, Optional
+from fastapi import Depends, Request
+from sqlalchemy import insert
+from app.auth.dependencies import get_current_admin
+from app.config import settings
+from app.database import SessionLocal
+from app.models.admin import AdminLog, AdminAction
+from app.models.user import User
+
+
+class AuditLogger:
+    """Batches AdminLog rows off the request path.
+
+    record() only enqueues; a flusher thread inserts whatever has queued up
+    every settings.audit_flush_interval_ms, or as soon as
+    settings.audit_batch_size records are waiting, in one multi-row INSERT.
+    A failed batch is retried on the next flush; records beyond
+    settings.audit_queue_size are dropped with a warning rather than
+    blocking requests.
+    """
+
+    def __init__(self):
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=settings.audit_queue_size)
+        self._stopping = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._retry: List[dict] = []
+        self.dropped = 0
+
+    def record(
+        self,
+        user_id: int,
+        action: AdminAction,
+        target_type: Optional[str] = None,
+        target_id: Optional[int] = None,
+        description: str = "",
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ):
+        self.start()
+        try:
+            self._queue.put_nowait({
+                "user_id": user_id,
+                "action": action,
+                "target_type": target_type,
+                "target_id": target_id,
+                "description": description,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "created_at": datetime.utcnow()
+            })
+            if self._queue.qsize() >= settings.audit_batch_size:
+                self._wake.set()
+        except queue.Full:
+            self.dropped += 1
+            print(f"⚠️ Audit queue full, dropped {action.value} record ({self.dropped} dropped so far)")
+
+    def _drain(self, batch: List[dict]) -> List[dict]:
+        while len(batch) < settings.audit_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> int:
+        """Insert everything queued so far; returns the number of rows written"""
+        written = 0
+        with self._lock:
+            while True:
+                batch = self._drain(self._retry)
+                self._retry = []
+                if not batch:
+                    return written
+                db = SessionLocal()
+                try:
+                    db.execute(insert(AdminLog), batch)
+                    db.commit()
+                    written += len(batch)
+                except Exception as e:
+                    db.rollback()
+                    print(f"⚠️ Failed to write {len(batch)} audit records, will retry: {e}")
+                    self._retry = batch
+                    return written
+                finally:
+                    db.close()
+
+    def _run(self):
+        interval = settings.audit_flush_interval_ms / 1000
+        while not self._stopping.is_set():
+            # Woken early by record() once a full batch is waiting
+            self._wake.wait(interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="audit-flusher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write out anything still queued"""
+        self._stopping.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=5)
+        self.flush()
+
+
+audit_log = AuditLogger()
+
+
+class AuditEntry:
+    """Audit record(s) for one request; endpoints may add targets or skip it"""
+
+    def __init__(self, action: AdminAction, target_type: Optional[str], description: str):
+        self.action = action
+        self.target_type = target_type
+        self.description = description
+        self.targets: List[tuple] = []
+        self.skip = False
+
+    def add(self, target_id: Optional[int], description: Optional[str] = None):
+        """Record one target; `{target_id}` in the description is filled in"""
+        self.targets.append((target_id, (description or self.description).format(target_id=target_id)))
+
+
+def audit_action(
+    action: AdminAction,
+    target_type: Optional[str] = None,
+    target_param: Optional[str] = None,
+    description: Optional[str] = None
+):
+    """Dependency recording an admin mutation once the endpoint succeeds.
+
+    The target id is taken from the `target_param` path parameter when
+    given, and `{target_id}` in the description is filled in; endpoints can also take the yielded AuditEntry and add targets
+    (e.g. ids created or changed in bulk) or set `skip`. Requests that
+    raise are not recorded. The record is queued after the response has
+    been produced and written by the background flusher.
+    """
+    def dependency(request: Request, current_admin: User = Depends(get_current_admin)):
+        admin_id = current_admin.id  # read before the endpoint commits and expires it
+        entry = AuditEntry(action, target_type, description or f"{request.method} {request.url.path}")
+        if target_param and target_param in request.path_params:
+            entry.add(int(request.path_params[target_param]))
+
+        yield entry
+
+        if entry.skip:
+            return
+        ip_address = request.client.host if request.client else None
+        user_agent = request.headers.get("user-agent")
+        for target_id, target_description in entry.targets or [(None, entry.description)]:
+            audit_log.record(
+                admin_id,
+                entry.action,
+                entry.target_type,
+                target_id,
+                target_description,
+                ip_address,
+                user_agent
+            )
+
+    return dependency
@@ -0,0 +1,120 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+
+class TTLCache:
+    """Small thread-safe cache whose entries expire after `ttl_seconds`.
+
+    get_or_compute() runs the factory once per key even when several
+    requests miss at the same time; the others wait for its result.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and time.monotonic() - entry[0] <= self.ttl_seconds:
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+
+    def get_or_compute(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or everything when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class SnapshotCache:
+    """Stale-while-revalidate cache for expensive read-only aggregates.
+
+    A snapshot younger than `fresh_seconds` is served as is; an older one is
+    still served immediately while one background thread recomputes it, so
+    readers only wait on a cold cache or once a snapshot is older than
+    `max_stale_seconds`. Factories run outside the request and must open
+    their own database session.
+    """
+
+    def __init__(self, fresh_seconds: float, max_stale_seconds: float):
+        self.fresh_seconds = fresh_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._refreshing: Set[Hashable] = set()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _refresh(self, key: Hashable, factory: Callable[[], Any]):
+        try:
+            value = factory()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), value)
+        except Exception as e:
+            print(f"⚠️ Snapshot refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _load(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Compute synchronously, once per key however many callers miss"""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and time.monotonic() - entry[0] <= self.max_stale_seconds:
+                return entry[1]
+            value = factory()
+            with self._lock:
+                self._entries[key] = (time.monotonic(), value)
+            return value
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return self._load(key, factory)
+
+        age = time.monotonic() - entry[0]
+        if age > self.max_stale_seconds:
+            return self._load(key, factory)
+        if age > self.fresh_seconds:
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                threading.Thread(target=self._refresh, args=(key, factory), daemon=True).start()
+        return entry[1]
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Mark one key, or everything, stale; stale values are still served while refreshing"""
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for stale_key in keys:
+                entry = self._entries.get(stale_key)
+                if entry:
+                    self._entries[stale_key] = (entry[0] - self.fresh_seconds - 1, entry[1])
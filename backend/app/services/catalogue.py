@@ -0,0 +1,117 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.mill import FeedType
+
+
+class FeedTypeEntry(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    price_per_kg: float
+    is_available: bool
+
+
+class CatalogueSnapshot(NamedTuple):
+    version: int
+    entries: Dict[int, FeedTypeEntry]  # All feed types keyed by id
+    available: List[dict]  # Public listing of available feed types
+    etag: str  # Strong ETag derived from the listing content
+
+
+class FeedCatalogue:
+    """Process-local snapshot of the feed type catalogue and its prices.
+
+    The version counter is bumped whenever a FeedType change is committed
+    in this process, which drops the snapshot. Changes made by other
+    processes are picked up once the snapshot is older than
+    settings.catalogue_ttl_seconds. The ETag is a digest of the content, so
+    every worker serves the same ETag for the same catalogue.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._loaded_at = 0.0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _load(self) -> CatalogueSnapshot:
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                FeedType.id, FeedType.name, FeedType.description, FeedType.price_per_kg, FeedType.is_available
+            ).order_by(FeedType.id).all()
+        finally:
+            db.close()
+        
+        entries = {row.id: FeedTypeEntry(*row) for row in rows}
+        available = [
+            {
+                "id": entry.id,
+                "name": entry.name,
+                "description": entry.description,
+                "price_per_kg": entry.price_per_kg
+            }
+            for entry in entries.values()
+            if entry.is_available
+        ]
+        digest = hashlib.sha256(json.dumps(available, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+        return CatalogueSnapshot(self._version, entries, available, f'"{digest}"')
+
+    def _stale(self) -> bool:
+        return self._snapshot is None or time.time() - self._loaded_at > settings.catalogue_ttl_seconds
+
+    def snapshot(self) -> CatalogueSnapshot:
+        """Current catalogue snapshot, reloading it if invalidated or expired"""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - self._loaded_at > settings.catalogue_ttl_seconds:
+            with self._lock:
+                # Checked again: another thread may have reloaded or invalidated it meanwhile
+                if self._stale():
+                    self._snapshot = self._load()
+                    self._loaded_at = time.time()
+                snapshot = self._snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Bump the version and drop the snapshot so the next read reloads it"""
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+
+feed_catalogue = FeedCatalogue()
+
+
+# Invalidate after commit rather than at flush, so the reload sees the change
+_DIRTY_KEY = "feed_catalogue_dirty"
+
+
+@event.listens_for(FeedType, "after_insert")
+@event.listens_for(FeedType, "after_update")
+@event.listens_for(FeedType, "after_delete")
+def _mark_catalogue_dirty(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info[_DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_catalogue_on_commit(session):
+    if session.info.pop(_DIRTY_KEY, False):
+        feed_catalogue.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_catalogue_flag(session):
+    session.info.pop(_DIRTY_KEY, None)
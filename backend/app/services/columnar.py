@@ -0,0 +1,426 @@
+import enum
+import fcntl
+import json
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from sqlalchemy import create_engine, func, or_, select
+from sqlalchemy.orm import Session, sessionmaker
+from app.config import settings
+from app.database import SessionLocal
+from app.models.mill import FeedOrder
+from app.models.production import ProductionReport
+
+# Drill-down queries are answered from a column-per-file snapshot of the
+# reporting tables under settings.analytics_store_dir, memory-mapped with
+# NumPy, so slicing the data never touches the OLTP database. Dimensions are
+# dictionary-encoded to int32 codes, measures are float64 with NaN for
+# NULL. Each refresh reads only the rows changed since the previous one and
+# writes a new version directory; current.json names the live version.
+
+MAX_GROUPS = 10000
+_FETCH_CHUNK = 10000
+# Rows committed just after the previous refresh read the clock are re-read
+_WATERMARK_OVERLAP = timedelta(minutes=5)
+_POINTER = "current.json"
+_LOCKFILE = ".refresh.lock"
+_KEEP_VERSIONS = 2
+
+
+class DatasetSpec(NamedTuple):
+    model: type
+    month: object  # timestamp bucketed into the `month` dimension
+    dimensions: Dict[str, object]
+    measures: Dict[str, object]
+
+
+DATASETS: Dict[str, DatasetSpec] = {
+    "production": DatasetSpec(
+        ProductionReport,
+        ProductionReport.hatch_date,
+        {
+            "place": ProductionReport.place,
+            "lot_grade": ProductionReport.lot_grade,
+            "farmer_id": ProductionReport.farmer_id,
+            "is_approved": ProductionReport.is_approved,
+        },
+        {
+            "fcr_percent": ProductionReport.fcr_percent,
+            "total_mortality_percent": ProductionReport.total_mortality_percent,
+            "avg_weight_kg": ProductionReport.avg_weight_kg,
+            "chicks_housed": ProductionReport.chicks_housed,
+            "bird_lifted": ProductionReport.bird_lifted,
+            "bird_weight_kg": ProductionReport.bird_weight_kg,
+            "production_cost_per_kg": ProductionReport.production_cost_per_kg,
+            "final_amount": ProductionReport.final_amount,
+        },
+    ),
+    "orders": DatasetSpec(
+        FeedOrder,
+        FeedOrder.created_at,
+        {
+            "status": FeedOrder.status,
+            "mill_id": FeedOrder.mill_id,
+            "farmer_id": FeedOrder.farmer_id,
+        },
+        {
+            "total_amount": FeedOrder.total_amount,
+        },
+    ),
+}
+
+
+def dimension_names(spec: DatasetSpec) -> List[str]:
+    return ["month"] + list(spec.dimensions)
+
+
+def _label(value):
+    """JSON-safe dictionary label for a dimension value"""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m")
+    return value
+
+
+def _filter_text(label) -> str:
+    if label is None:
+        return "null"
+    if isinstance(label, bool):
+        return "true" if label else "false"
+    return str(label)
+
+
+def _encode(values: list, labels: list) -> np.ndarray:
+    """Dictionary-encode values, appending labels not seen before to `labels`"""
+    codes = {label: code for code, label in enumerate(labels)}
+    encoded = np.empty(len(values), dtype=np.int32)
+    for position, value in enumerate(values):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(labels)
+            labels.append(value)
+        encoded[position] = code
+    return encoded
+
+
+class Snapshot:
+    """One version of a dataset, columns memory-mapped on first use"""
+
+    def __init__(self, dataset: str, version: str, path: str, meta: dict):
+        self.dataset = dataset
+        self.version = version
+        self.path = path
+        self.meta = meta
+        self.rows: int = meta["rows"]
+        self.labels: Dict[str, list] = meta["dictionaries"]
+        self._columns: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def column(self, name: str) -> np.ndarray:
+        with self._lock:
+            array = self._columns.get(name)
+            if array is None:
+                # Zero-length files cannot be memory-mapped
+                array = np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r" if self.rows else None)
+                self._columns[name] = array
+            return array
+
+
+class ColumnarStore:
+    """Loads the current snapshot versions and rebuilds them from the database"""
+
+    def __init__(self):
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._source: Optional[sessionmaker] = None
+
+    @staticmethod
+    def _root(dataset: str) -> str:
+        return os.path.join(settings.analytics_store_dir, dataset)
+
+    def load(self, dataset: str) -> Optional[Snapshot]:
+        """The current snapshot on disk, or None if none has been written yet"""
+        root = self._root(dataset)
+        while True:
+            try:
+                with open(os.path.join(root, _POINTER)) as pointer:
+                    version = json.load(pointer)["version"]
+            except FileNotFoundError:
+                return None
+            with self._lock:
+                snapshot = self._snapshots.get(dataset)
+                if snapshot is not None and snapshot.version == version:
+                    return snapshot
+            path = os.path.join(root, version)
+            try:
+                with open(os.path.join(path, "meta.json")) as meta:
+                    snapshot = Snapshot(dataset, version, path, json.load(meta))
+            except FileNotFoundError:
+                # Pruned after newer versions were written since the pointer was read
+                continue
+            with self._lock:
+                self._snapshots[dataset] = snapshot
+            return snapshot
+
+    def snapshot(self, dataset: str) -> Snapshot:
+        """Current snapshot, built on first use"""
+        snapshot = self.load(dataset)
+        if snapshot is None:
+            self.refresh([dataset])
+            snapshot = self.load(dataset)
+        return snapshot
+
+    def _session(self) -> Session:
+        """Session on settings.analytics_database_url (e.g. a read replica), else the primary"""
+        if not settings.analytics_database_url:
+            return SessionLocal()
+        if self._source is None:
+            self._source = sessionmaker(bind=create_engine(settings.analytics_database_url, pool_pre_ping=True))
+        return self._source()
+
+    def refresh(self, datasets: Optional[List[str]] = None, full: bool = False) -> Dict[str, dict]:
+        """Bring the snapshots up to date; returns the new metadata per dataset"""
+        results = {}
+        with self._refresh_lock:
+            db = self._session()
+            try:
+                for dataset in datasets or list(DATASETS):
+                    with _dataset_lock(dataset):
+                        meta = _refresh_dataset(db, dataset, self.load(dataset), full)
+                    results[dataset] = {key: value for key, value in meta.items() if key != "dictionaries"}
+            finally:
+                db.close()
+        return results
+
+
+columnar_store = ColumnarStore()
+
+
+@contextmanager
+def _dataset_lock(dataset: str):
+    """Exclusive lock on a dataset's store shared by every worker process,
+    held while a new version is built, published and old ones pruned"""
+    root = ColumnarStore._root(dataset)
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, _LOCKFILE), "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def _fetch(db: Session, spec: DatasetSpec, since: Optional[datetime]):
+    """Rows created or updated since `since` (every row if None), by column"""
+    statement = select(spec.model.id, spec.month, *spec.dimensions.values(), *spec.measures.values())
+    if since is not None:
+        statement = statement.where(or_(spec.model.updated_at >= since, spec.model.created_at >= since))
+    names = ["id", "month"] + list(spec.dimensions) + list(spec.measures)
+    values: Dict[str, list] = {name: [] for name in names}
+    for row in db.execute(statement.execution_options(yield_per=_FETCH_CHUNK)):
+        for name, value in zip(names, row):
+            values[name].append(value)
+    return values
+
+
+def _write(dataset: str, columns: Dict[str, np.ndarray], meta: dict) -> str:
+    """Publish a new version; the caller holds _dataset_lock(dataset)"""
+    root = ColumnarStore._root(dataset)
+    version = f"{datetime.utcnow():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(root, version)
+    os.makedirs(path)
+    for name, array in columns.items():
+        np.save(os.path.join(path, f"{name}.npy"), array)
+    with open(os.path.join(path, "meta.json"), "w") as handle:
+        json.dump(meta, handle)
+
+    pointer = os.path.join(root, f".{version}.json")
+    with open(pointer, "w") as handle:
+        json.dump({"version": version}, handle)
+    os.replace(pointer, os.path.join(root, _POINTER))
+
+    # Older versions may still be mapped by readers; unlinked files stay readable
+    versions = sorted(
+        name for name in os.listdir(root)
+        if name != version and os.path.isdir(os.path.join(root, name))
+    )
+    # The version just published is the one current.json names
+    for old in versions[:max(len(versions) - (_KEEP_VERSIONS - 1), 0)]:
+        shutil.rmtree(os.path.join(root, old), ignore_errors=True)
+    return version
+
+
+def _refresh_dataset(db: Session, dataset: str, previous: Optional[Snapshot], full: bool) -> dict:
+    """Write a new version of one dataset.
+
+    Incremental unless `full`, there is no previous version, or the last
+    full rebuild is older than settings.analytics_full_refresh_seconds:
+    only rows changed since the previous watermark are read, merged over
+    the previous columns, and rows deleted since are dropped.
+    """
+    spec = DATASETS[dataset]
+    started = db.execute(select(func.now())).scalar()
+    if previous is not None and not full:
+        last_full = datetime.fromisoformat(previous.meta["full_refresh_at"])
+        full = (started - last_full).total_seconds() > settings.analytics_full_refresh_seconds
+    if previous is None:
+        full = True
+
+    since = None if full else datetime.fromisoformat(previous.meta["watermark"]) - _WATERMARK_OVERLAP
+    fetched = _fetch(db, spec, since)
+    dictionaries = {
+        name: [] if full else list(previous.labels[name])
+        for name in dimension_names(spec)
+    }
+    columns = {"id": np.array(fetched["id"], dtype=np.int64)}
+    for name in dimension_names(spec):
+        columns[name] = _encode([_label(value) for value in fetched[name]], dictionaries[name])
+    for name in spec.measures:
+        columns[name] = np.array([np.nan if value is None else value for value in fetched[name]], dtype=np.float64)
+
+    if not full:
+        live_ids = np.fromiter(db.execute(select(spec.model.id)).scalars(), dtype=np.int64)
+        previous_ids = previous.column("id")
+        keep = np.isin(previous_ids, live_ids) & ~np.isin(previous_ids, columns["id"])
+        for name in list(columns):
+            columns[name] = np.concatenate([previous.column(name)[keep], columns[name]])
+        order = np.argsort(columns["id"], kind="stable")
+        columns = {name: array[order] for name, array in columns.items()}
+
+    meta = {
+        "dataset": dataset,
+        "rows": int(len(columns["id"])),
+        "changed_rows": len(fetched["id"]),
+        "full": full,
+        "watermark": started.isoformat(),
+        "full_refresh_at": started.isoformat() if full else previous.meta["full_refresh_at"],
+        "refreshed_at": datetime.utcnow().isoformat(),
+        "dictionaries": dictionaries,
+    }
+    _write(dataset, columns, meta)
+    return meta
+
+
+def drilldown(
+    snapshot: Snapshot,
+    group_by: List[str],
+    measures: Optional[List[str]] = None,
+    filters: Optional[Dict[str, List[str]]] = None,
+    start_month: Optional[str] = None,
+    end_month: Optional[str] = None
+) -> dict:
+    """Row counts and measure sums/averages grouped by any dimensions.
+
+    Filters match dimension values by their text ("true"/"false" for flags,
+    "null" for missing); months are "YYYY-MM". Raises ValueError for
+    unknown dimensions or measures, or too many groups.
+    """
+    spec = DATASETS[snapshot.dataset]
+    dimensions = dimension_names(spec)
+    filters = filters or {}
+    measures = measures or list(spec.measures)
+    for name in list(group_by) + list(filters):
+        if name not in dimensions:
+            raise ValueError(f"Unknown dimension: {name}")
+    for name in measures:
+        if name not in spec.measures:
+            raise ValueError(f"Unknown measure: {name}")
+    if len(set(group_by)) != len(group_by):
+        raise ValueError("Each dimension can only be grouped by once")
+
+    mask = np.ones(snapshot.rows, dtype=bool)
+    for name, wanted in filters.items():
+        codes = [code for code, label in enumerate(snapshot.labels[name]) if _filter_text(label) in wanted]
+        mask &= np.isin(snapshot.column(name), codes)
+    if start_month or end_month:
+        codes = [
+            code for code, label in enumerate(snapshot.labels["month"])
+            if label is not None and (not start_month or label >= start_month) and (not end_month or label <= end_month)
+        ]
+        mask &= np.isin(snapshot.column("month"), codes)
+
+    # One int64 key per row combining the codes of the grouped dimensions
+    cardinalities = [max(len(snapshot.labels[name]), 1) for name in group_by]
+    if np.prod(cardinalities, dtype=float) >= 2 ** 62:
+        raise ValueError("Too many dimension combinations")
+    keys = np.zeros(int(mask.sum()), dtype=np.int64)
+    for name, cardinality in zip(group_by, cardinalities):
+        keys = keys * cardinality + snapshot.column(name)[mask]
+    groups, inverse = np.unique(keys, return_inverse=True)
+    if len(groups) > MAX_GROUPS:
+        raise ValueError(f"More than {MAX_GROUPS} groups; add filters or group by fewer dimensions")
+
+    counts = np.bincount(inverse, minlength=len(groups))
+    aggregates = {}
+    for name in measures:
+        values = snapshot.column(name)[mask]
+        valid = ~np.isnan(values)
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=len(groups))
+        present = np.bincount(inverse[valid], minlength=len(groups))
+        aggregates[name] = (sums, present)
+
+    rows = []
+    for position, key in enumerate(groups.tolist()):
+        codes = []
+        for cardinality in reversed(cardinalities):
+            key, code = divmod(key, cardinality)
+            codes.append(code)
+        row = {name: snapshot.labels[name][code] for name, code in zip(group_by, reversed(codes))}
+        row["count"] = int(counts[position])
+        for name, (sums, present) in aggregates.items():
+            row[name] = {
+                "sum": float(sums[position]),
+                "avg": float(sums[position] / present[position]) if present[position] else None
+            }
+        rows.append(row)
+    rows.sort(key=lambda row: tuple((row[name] is None, row[name] if row[name] is not None else 0) for name in group_by))
+
+    return {
+        "dataset": snapshot.dataset,
+        "group_by": group_by,
+        "measures": measures,
+        "matched_rows": int(mask.sum()),
+        "rows": rows,
+        "snapshot": {
+            "rows": snapshot.rows,
+            "watermark": snapshot.meta["watermark"],
+            "refreshed_at": snapshot.meta["refreshed_at"]
+        }
+    }
+
+
+class AnalyticsRefresher:
+    """Background thread refreshing the snapshots at startup and then every
+    settings.analytics_refresh_seconds"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                columnar_store.refresh()
+            except Exception as e:
+                print(f"⚠️ Analytics snapshot refresh failed: {e}")
+            self._stop.wait(settings.analytics_refresh_seconds)
+
+    def start(self):
+        if self._thread is None and settings.analytics_refresh_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="analytics-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+
+analytics_refresher = AnalyticsRefresher()
@@ -0,0 +1,43 @@
+from typing import Optional
+from fastapi import HTTPException, Response, status
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+CONFLICT_DETAIL = "Resource was modified by another request; reload it and retry"
+
+
+def etag_for(obj) -> str:
+    """Strong ETag for a versioned row (its version_id_col value)"""
+    return f'"{obj.version}"'
+
+
+def set_etag(response: Response, obj):
+    response.headers["ETag"] = etag_for(obj)
+
+
+def check_if_match(if_match: Optional[str], obj):
+    """Raise 409 when an If-Match header names a different version of obj"""
+    if not if_match:
+        return
+    
+    tags = [tag.strip() for tag in if_match.split(",")]
+    if "*" in tags:
+        return
+    if etag_for(obj) not in [tag[2:] if tag.startswith("W/") else tag for tag in tags]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=CONFLICT_DETAIL,
+            headers={"ETag": etag_for(obj)}
+        )
+
+
+def commit_or_conflict(db: Session):
+    """Commit, turning a lost version race (StaleDataError) into 409"""
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=CONFLICT_DETAIL
+        )
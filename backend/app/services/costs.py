@@ -0,0 +1,70 @@
+import re
+from typing import Optional
+from app.models.production import CostBasis
+
+# "<standard cost>-<cost difference>-<adjustment per kg>", e.g. "82-10.01-5.006";
+# recomputed settlements use " / " so negative amounts read unambiguously
+PERFORMANCE_PATTERN = re.compile(r"^\s*(-?[\d.]+)\s*[-/]\s*(-?[\d.]+)\s*[-/]\s*(-?[\d.]+)\s*$")
+NUMBER_PATTERN = re.compile(r"-?\d+(?:\.\d+)?")
+
+# Text settlement fields on ProductionReport and their numeric columns
+SETTLEMENT_VALUE_FIELDS = {
+    "performance_bonus": "performance_bonus_value",
+    "shorting_bird_kg": "shorting_bird_value",
+    "extra_mortality": "extra_mortality_value",
+    "minimum_growing_charge": "minimum_growing_charge_value",
+}
+
+
+def parse_number(value) -> Optional[float]:
+    """Parse a plain number, returning None for text such as "ACTUAL" """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace(",", "").strip())
+    except ValueError:
+        return None
+
+
+def parse_cost_detail(quantity: Optional[str], rate: Optional[str]) -> dict:
+    """Typed basis, quantity and rate for a cost detail line"""
+    quantity_value = parse_number(quantity)
+    rate_value = parse_number(rate)
+    
+    if quantity and str(quantity).strip().upper() == "ACTUAL":
+        basis = CostBasis.ACTUAL
+    elif quantity_value is not None and rate_value is not None:
+        basis = CostBasis.PER_UNIT
+    else:
+        basis = CostBasis.FIXED
+    
+    return {"basis": basis, "quantity_value": quantity_value, "rate_value": rate_value}
+
+
+def parse_settlement_value(field: str, text: Optional[str]) -> Optional[float]:
+    """Amount held in a text settlement field.
+
+    The performance field is "standard-difference-adjustment" (or
+    "standard / difference / adjustment") and yields the
+    per-kg adjustment; the other fields end with the resulting amount.
+    """
+    if text is None or not str(text).strip():
+        return None
+    text = str(text)
+    if field == "performance_bonus":
+        match = PERFORMANCE_PATTERN.match(text)
+        if match:
+            return float(match.group(3))
+    numbers = NUMBER_PATTERN.findall(text)
+    return float(numbers[-1]) if numbers else None
+
+
+def parse_settlement_fields(values: dict) -> dict:
+    """Numeric settlement columns for a dict of report values"""
+    return {
+        value_field: parse_settlement_value(field, values.get(field))
+        for field, value_field in SETTLEMENT_VALUE_FIELDS.items()
+        if field in values
+    }
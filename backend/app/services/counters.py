@@ -0,0 +1,336 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, object_session
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.aggregate import AggregateCounter
+from app.models.farmer import Farmer
+from app.models.mill import Mill, FeedOrder, OrderStatus
+from app.models.production import ProductionReport
+from app.models.routine import RoutineData
+from app.services.sql_helpers import period_bucket
+
+FARMERS_TOTAL = "farmers.total"
+FARMERS_VERIFIED = "farmers.verified"
+MILLS_TOTAL = "mills.total"
+ORDERS_TOTAL = "feed_orders.total"
+REPORTS_TOTAL = "production_reports.total"
+REPORTS_UNAPPROVED = "production_reports.unapproved"
+ROUTINE_TOTAL = "routine_data.total"
+
+# Counters under this prefix only ever increase (see analytics_series);
+# they have no base rows to recompute them from and are not reconciled
+GENERATION_PREFIX = "generation."
+
+_PENDING_KEY = "aggregate_counter_deltas"
+# Columns whose changes move a row between counters
+_STATE_ATTRIBUTES = ("status", "is_verified", "is_approved")
+_ADVISORY_LOCK_KEY = 480_220_045
+# Held for the life of the worker whose reconciler thread does the work
+_LEADER_LOCK_KEY = 480_220_046
+
+
+def order_status_counter(order_status: OrderStatus) -> str:
+    return f"feed_orders.status.{order_status.name}"
+
+
+def month_counter(table: str, when: datetime) -> str:
+    return f"{table}.month.{when.strftime('%Y-%m')}"
+
+
+def counters_for(model, values: dict) -> List[str]:
+    """Counters one row of `model` contributes to, given its column values.
+
+    Monthly counters use the creation month in UTC (the timestamps are
+    stored by the database's now()); rows whose creation time is not
+    known are left to reconciliation.
+    """
+    if model is Farmer:
+        return [FARMERS_TOTAL] + ([FARMERS_VERIFIED] if values.get("is_verified") else [])
+    if model is Mill:
+        return [MILLS_TOTAL]
+    if model is FeedOrder:
+        names = [ORDERS_TOTAL, order_status_counter(values.get("status") or OrderStatus.PENDING)]
+        if values.get("created_at"):
+            names.append(month_counter("feed_orders", values["created_at"]))
+        return names
+    if model is ProductionReport:
+        names = [REPORTS_TOTAL] + ([REPORTS_UNAPPROVED] if values.get("is_approved", False) == False else [])
+        if values.get("created_at"):
+            names.append(month_counter("production_reports", values["created_at"]))
+        return names
+    if model is RoutineData:
+        return [ROUTINE_TOTAL]
+    return []
+
+
+def row_deltas(model, rows: Iterable[dict], sign: int = 1) -> Dict[str, int]:
+    """Counter deltas for rows inserted (sign=1) or deleted (sign=-1) in bulk"""
+    deltas = defaultdict(int)
+    for values in rows:
+        for name in counters_for(model, values):
+            deltas[name] += sign
+    return deltas
+
+
+def _upsert_statement(dialect_name: str):
+    dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+    statement = dialect_insert(AggregateCounter.__table__)
+    return statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": AggregateCounter.value + statement.excluded.value, "updated_at": func.now()}
+    )
+
+
+def _apply(connection, deltas: Dict[str, int]):
+    # Sorted so concurrent transactions lock counter rows in the same order
+    rows = [{"name": name, "value": delta} for name, delta in sorted(deltas.items()) if delta]
+    if rows:
+        connection.execute(_upsert_statement(connection.dialect.name), rows)
+
+
+def adjust_counters(db: Session, deltas: Dict[str, int]):
+    """Apply counter deltas inside the caller's transaction.
+
+    For bulk INSERT/UPDATE statements, which bypass the mapper events below.
+    """
+    _apply(db.connection(), deltas)
+
+
+def read_counters(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    names = list(names)
+    rows = db.query(AggregateCounter.name, AggregateCounter.value).filter(AggregateCounter.name.in_(names)).all()
+    values = dict.fromkeys(names, 0)
+    values.update({name: int(value) for name, value in rows})
+    return values
+
+
+# Row-level hooks: deltas are collected per session while flushing and
+# written in one upsert at the end of the flush, in the same transaction
+
+def _pending(target) -> Optional[Dict[str, int]]:
+    session = object_session(target)
+    if session is None:
+        return None
+    return session.info.setdefault(_PENDING_KEY, defaultdict(int))
+
+
+def _row_values(target) -> dict:
+    # Only already-loaded attributes; loading during a flush is not allowed
+    return dict(inspect(target).dict)
+
+
+def _on_insert(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        values = _row_values(target)
+        values.setdefault("created_at", datetime.utcnow())
+        for name in counters_for(mapper.class_, values):
+            pending[name] += 1
+
+
+def _on_update(mapper, connection, target):
+    pending = _pending(target)
+    if pending is None:
+        return
+    state = inspect(target)
+    new_values = _row_values(target)
+    old_values = dict(new_values)
+    for attribute in _STATE_ATTRIBUTES:
+        if attribute in mapper.attrs:
+            history = state.attrs[attribute].history
+            if history.deleted:
+                old_values[attribute] = history.deleted[0]
+    for name in counters_for(mapper.class_, old_values):
+        pending[name] -= 1
+    for name in counters_for(mapper.class_, new_values):
+        pending[name] += 1
+
+
+def _on_delete(mapper, connection, target):
+    pending = _pending(target)
+    if pending is not None:
+        for name in counters_for(mapper.class_, _row_values(target)):
+            pending[name] -= 1
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+_COUNTED_MODELS = (Farmer, Mill, FeedOrder, ProductionReport, RoutineData)
+
+for _model in _COUNTED_MODELS:
+    event.listen(_model, "after_insert", _on_insert)
+    event.listen(_model, "after_update", _on_update)
+    event.listen(_model, "after_delete", _on_delete)
+    for _attribute in _STATE_ATTRIBUTES:
+        if hasattr(_model, _attribute):
+            # Load the replaced value even when the attribute was expired
+            # (e.g. by a commit), so _on_update sees the old state
+            event.listen(getattr(_model, _attribute), "set", _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, "before_flush")
+def _load_deleted_state(session, flush_context, instances):
+    # Expired rows being deleted would otherwise reach _on_delete without
+    # the values that decide their counters; loading is not allowed later
+    for target in session.deleted:
+        if isinstance(target, _COUNTED_MODELS):
+            for attribute in _STATE_ATTRIBUTES + ("created_at",):
+                if hasattr(target, attribute):
+                    getattr(target, attribute)
+
+
+@event.listens_for(Session, "after_flush")
+def _write_pending_counters(session, flush_context):
+    deltas = session.info.pop(_PENDING_KEY, None)
+    if deltas:
+        _apply(session.connection(), deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_pending_counters(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def compute_counters(db: Session) -> Dict[str, int]:
+    """Every counter recomputed from the base tables"""
+    values = {}
+    farmers = db.query(
+        func.count(Farmer.id),
+        func.count(Farmer.id).filter(Farmer.is_verified == True)
+    ).one()
+    values[FARMERS_TOTAL], values[FARMERS_VERIFIED] = farmers
+    values[MILLS_TOTAL] = db.query(func.count(Mill.id)).scalar()
+    values[ROUTINE_TOTAL] = db.query(func.count(RoutineData.id)).scalar()
+
+    reports = db.query(
+        func.count(ProductionReport.id),
+        func.count(ProductionReport.id).filter(ProductionReport.is_approved == False)
+    ).one()
+    values[REPORTS_TOTAL], values[REPORTS_UNAPPROVED] = reports
+
+    status_rows = db.query(FeedOrder.status, func.count(FeedOrder.id)).group_by(FeedOrder.status).all()
+    values[ORDERS_TOTAL] = sum(count for _, count in status_rows)
+    for order_status, count in status_rows:
+        name = order_status_counter(order_status or OrderStatus.PENDING)
+        values[name] = values.get(name, 0) + count
+
+    for model, table in ((FeedOrder, "feed_orders"), (ProductionReport, "production_reports")):
+        month = period_bucket(db, model.created_at, "month")
+        for bucket, count in db.query(month, func.count(model.id)).filter(model.created_at.isnot(None)).group_by(month).all():
+            values[f"{table}.month.{bucket}"] = count
+    return values
+
+
+def _lock(db: Session):
+    """Transaction-scoped advisory lock so only one reconciliation runs at a time"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def reconcile_counters(db: Session) -> dict:
+    """Repair every counter that drifted from its recomputed value.
+
+    The stored counters are locked FOR UPDATE before the base tables are
+    counted, so writers that commit meanwhile wait for this transaction,
+    and the drift is applied as a delta. Counters with no rows behind them
+    any more are brought to zero. Runs in the caller's session and commits.
+    """
+    _lock(db)
+    # Same order as _apply(), so this cannot deadlock with a writer
+    stored = {
+        name: int(value)
+        for name, value in db.query(AggregateCounter.name, AggregateCounter.value).filter(
+            AggregateCounter.name.notlike(f"{GENERATION_PREFIX}%")
+        ).order_by(AggregateCounter.name).with_for_update()
+    }
+    actual = compute_counters(db)
+    for order_status in OrderStatus:
+        actual.setdefault(order_status_counter(order_status), 0)
+    for name in stored:
+        actual.setdefault(name, 0)
+
+    repaired = {
+        name: {"stored": stored.get(name), "actual": value}
+        for name, value in sorted(actual.items())
+        if stored.get(name) != value
+    }
+    if repaired:
+        # value = value + (actual - stored); also inserts the counters not stored yet
+        connection = db.connection()
+        connection.execute(_upsert_statement(connection.dialect.name), [
+            {"name": name, "value": actual[name] - stored.get(name, 0)} for name in repaired
+        ])
+    db.commit()
+    return {"checked": len(actual), "repaired": repaired, "reconciled_at": datetime.utcnow()}
+
+
+class CounterReconciler:
+    """Background thread running reconcile_counters() at startup and then
+    every settings.counter_reconcile_seconds, so counters are seeded on a
+    fresh table and any drift is repaired.
+
+    Every worker process starts one; on PostgreSQL only the worker holding
+    a session advisory lock reconciles, and the others keep retrying to
+    take over if it exits.
+    """
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._leader = None
+
+    def _is_leader(self) -> bool:
+        if engine.dialect.name != "postgresql":
+            return True
+        if self._leader is None:
+            connection = engine.connect()
+            acquired = connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": _LEADER_LOCK_KEY}).scalar()
+            connection.commit()
+            if not acquired:
+                connection.close()
+                return False
+            self._leader = connection
+        return True
+
+    def _release(self):
+        if self._leader is not None:
+            self._leader.close()
+            self._leader = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            db = SessionLocal()
+            try:
+                if self._is_leader():
+                    result = reconcile_counters(db)
+                    if result["repaired"]:
+                        print(f"🔧 Repaired {len(result['repaired'])} aggregate counters")
+            except Exception as e:
+                db.rollback()
+                # The lock may have gone with a dropped connection; take it again
+                self._release()
+                print(f"⚠️ Counter reconciliation failed: {e}")
+            finally:
+                db.close()
+            self._stop.wait(settings.counter_reconcile_seconds)
+        self._release()
+
+    def start(self):
+        if self._thread is None and settings.counter_reconcile_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="counter-reconciler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+
+counter_reconciler = CounterReconciler()
@@ -0,0 +1,254 @@
+import threading
+import time
+from bisect import bisect_left
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.mill import FeedOrder, FeedOrderItem, OrderStatus
+
+# Orders that still need production time at the mill
+SCHEDULED_STATUSES = (OrderStatus.PENDING, OrderStatus.PROCESSING)
+
+# Sorts orders without a requested date after every dated one
+_NO_REQUESTED_DATE = 10 ** 9
+
+
+class ScheduledOrder(NamedTuple):
+    order_id: int
+    order_number: str
+    status: OrderStatus
+    quantity: float
+    requested_date: Optional[date]
+    created_at: Optional[datetime]
+
+
+def _priority_key(order: ScheduledOrder) -> Tuple:
+    """Processing orders first, then by requested date, then oldest first"""
+    return (
+        0 if order.status == OrderStatus.PROCESSING else 1,
+        order.requested_date.toordinal() if order.requested_date else _NO_REQUESTED_DATE,
+        order.created_at.timestamp() if order.created_at else 0.0,
+        order.order_id,
+    )
+
+
+class MillSchedule:
+    """Priority-ordered production queue for one mill.
+
+    Orders are filled into days sequentially: `_end[i]` is the cumulative
+    quantity once order i is finished, so with capacity C it completes on
+    day ceil(_end[i] / C) - 1 and no day exceeds C. Inserting or removing
+    an order only recomputes the cumulative sums from that position on;
+    capacity changes need no recomputation at all.
+    """
+
+    def __init__(self, orders: Iterable[ScheduledOrder] = ()):
+        entries = sorted(((_priority_key(order), order) for order in orders), key=lambda entry: entry[0])
+        self._keys: List[Tuple] = [key for key, _ in entries]
+        self._orders: Dict[int, ScheduledOrder] = {order.order_id: order for _, order in entries}
+        self._quantity = np.fromiter((order.quantity for _, order in entries), dtype=float, count=len(entries))
+        self._end = np.cumsum(self._quantity)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._orders
+
+    def __iter__(self):
+        """Orders in production order"""
+        return (self._orders[key[-1]] for key in self._keys)
+
+    def order(self, order_id: int) -> Optional[ScheduledOrder]:
+        return self._orders.get(order_id)
+
+    @property
+    def total_quantity(self) -> float:
+        return float(self._end[-1]) if len(self._end) else 0.0
+
+    def _recompute_from(self, position: int):
+        start = self._end[position - 1] if position else 0.0
+        self._end[position:] = start + np.cumsum(self._quantity[position:])
+
+    def add(self, order: ScheduledOrder):
+        """Insert or replace an order and reschedule everything after it"""
+        if order.order_id in self._orders:
+            self.remove(order.order_id)
+        key = _priority_key(order)
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._orders[order.order_id] = order
+        self._quantity = np.insert(self._quantity, position, order.quantity)
+        self._end = np.insert(self._end, position, 0.0)
+        self._recompute_from(position)
+
+    def remove(self, order_id: int) -> bool:
+        """Drop an order and reschedule everything after it"""
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return False
+        position = bisect_left(self._keys, _priority_key(order))
+        del self._keys[position]
+        self._quantity = np.delete(self._quantity, position)
+        self._end = np.delete(self._end, position)
+        if position < len(self._keys):
+            self._recompute_from(position)
+        return True
+
+    def plan(self, capacity_per_day: float, start: date, horizon_days: Optional[int] = None) -> dict:
+        """Production day of each order and the load of each day.
+
+        Only orders finishing within horizon_days (if given) are listed;
+        the totals always cover the whole queue.
+        """
+        if capacity_per_day <= 0:
+            raise ValueError("Mill capacity per day must be positive")
+
+        count = len(self._keys)
+        if horizon_days is not None:
+            count = int(np.searchsorted(self._end, horizon_days * capacity_per_day, side="right"))
+        end = self._end[:count]
+        finish_day = np.maximum(np.ceil(end / capacity_per_day).astype(np.int64) - 1, 0)
+
+        total = self.total_quantity
+        days_needed = int(np.ceil(total / capacity_per_day)) if total else 0
+        listed_days = days_needed if horizon_days is None else min(days_needed, horizon_days)
+        day_load = np.clip(total - np.arange(listed_days) * capacity_per_day, 0, capacity_per_day)
+        orders_finishing = np.bincount(finish_day, minlength=listed_days)[:listed_days]
+
+        orders = []
+        for index in range(count):
+            order = self._orders[self._keys[index][-1]]
+            production_date = start + timedelta(days=int(finish_day[index]))
+            orders.append({
+                "order_id": order.order_id,
+                "order_number": order.order_number,
+                "status": order.status,
+                "quantity": order.quantity,
+                "requested_date": order.requested_date,
+                "production_date": production_date,
+                "late": order.requested_date is not None and production_date > order.requested_date,
+            })
+
+        return {
+            "capacity_per_day": capacity_per_day,
+            "start_date": start,
+            "total_quantity": total,
+            "order_count": len(self._keys),
+            "days_needed": days_needed,
+            "days": [
+                {
+                    "date": start + timedelta(days=day),
+                    "planned_quantity": float(day_load[day]),
+                    "orders_finishing": int(orders_finishing[day]),
+                }
+                for day in range(listed_days)
+            ],
+            "orders": orders,
+        }
+
+
+class DispatchScheduler:
+    """Process-local schedules for every mill, loaded on first use.
+
+    Order changes made through this process are applied incrementally.
+    Changes made by other workers are picked up when a schedule is older
+    than settings.dispatch_schedule_ttl_seconds and gets reloaded.
+    """
+
+    def __init__(self):
+        self._schedules: Dict[int, Tuple[MillSchedule, float]] = {}
+        # Bumped on every change so a load racing one is not cached
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self._lock = threading.RLock()
+
+    def _generation(self, mill_id: int) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(mill_id, 0)
+
+    def _changed(self, mill_id: int):
+        self._generations[mill_id] = self._generations.get(mill_id, 0) + 1
+
+    @staticmethod
+    def load_orders(db: Session, mill_id: int) -> List[ScheduledOrder]:
+        """Open orders of a mill with their total quantity, in one query"""
+        rows = db.query(
+            FeedOrder.id,
+            FeedOrder.order_number,
+            FeedOrder.status,
+            func.coalesce(func.sum(FeedOrderItem.quantity), 0).label("quantity"),
+            FeedOrder.expected_delivery_date,
+            FeedOrder.created_at
+        ).outerjoin(FeedOrderItem, FeedOrderItem.order_id == FeedOrder.id).filter(
+            FeedOrder.mill_id == mill_id,
+            FeedOrder.status.in_(SCHEDULED_STATUSES)
+        ).group_by(FeedOrder.id).all()
+        return [
+            ScheduledOrder(
+                row.id,
+                row.order_number,
+                row.status,
+                float(row.quantity),
+                row.expected_delivery_date.date() if row.expected_delivery_date else None,
+                row.created_at
+            )
+            for row in rows
+        ]
+
+    def get(self, db: Session, mill_id: int) -> MillSchedule:
+        with self._lock:
+            cached = self._schedules.get(mill_id)
+            if cached and time.time() - cached[1] <= settings.dispatch_schedule_ttl_seconds:
+                return cached[0]
+            generation = self._generation(mill_id)
+        schedule = MillSchedule(self.load_orders(db, mill_id))
+        with self._lock:
+            # An order changed while loading may be missing from this result
+            if self._generation(mill_id) == generation:
+                self._schedules[mill_id] = (schedule, time.time())
+        return schedule
+
+    def plan(self, db: Session, mill_id: int, capacity_per_day: float, start: date, horizon_days: Optional[int]) -> dict:
+        schedule = self.get(db, mill_id)
+        with self._lock:
+            return schedule.plan(capacity_per_day, start, horizon_days)
+
+    def order_added(self, mill_id: int, order: ScheduledOrder):
+        """Schedule a new order if the mill's schedule is loaded"""
+        with self._lock:
+            self._changed(mill_id)
+            cached = self._schedules.get(mill_id)
+            if cached:
+                cached[0].add(order)
+
+    def status_changed(self, mill_id: int, order_id: int, status: OrderStatus):
+        """Re-prioritise or drop an order after a status change"""
+        with self._lock:
+            self._changed(mill_id)
+            cached = self._schedules.get(mill_id)
+            if not cached:
+                return
+            schedule = cached[0]
+            order = schedule.order(order_id)
+            if status not in SCHEDULED_STATUSES:
+                schedule.remove(order_id)
+            elif order is None:
+                # Not known here (changed by another worker); reload on next use
+                del self._schedules[mill_id]
+            elif order.status != status:
+                schedule.add(order._replace(status=status))
+
+    def invalidate(self, mill_id: Optional[int] = None):
+        with self._lock:
+            if mill_id is None:
+                self._epoch += 1
+                self._schedules.clear()
+            else:
+                self._changed(mill_id)
+                self._schedules.pop(mill_id, None)
+
+
+dispatch_scheduler = DispatchScheduler()
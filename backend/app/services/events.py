@@ -0,0 +1,197 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from app.config import settings
+
+# Channels are "farmer:{farmer_id}", "mill:{mill_id}" and "admin"
+ADMIN_CHANNEL = "admin"
+
+
+def farmer_channel(farmer_id: int) -> str:
+    return f"farmer:{farmer_id}"
+
+
+def mill_channel(mill_id: int) -> str:
+    return f"mill:{mill_id}"
+
+
+class Subscription:
+    """Bounded queue of events for one connected client.
+
+    Owned by the event loop that created it; publishers on other threads
+    hand events over with call_soon_threadsafe. A client that falls too far
+    behind loses its oldest events rather than growing the queue.
+    """
+
+    def __init__(self, channels: Iterable[str], maxsize: int):
+        self.channels = frozenset(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = asyncio.get_running_loop()
+        self.dropped = 0
+
+    def _put(self, message: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def deliver(self, message: dict):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Event loop already closed; the subscriber is going away
+            pass
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Next event, or None if nothing arrived within timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """In-process publish/subscribe for order and report events.
+
+    With settings.event_bus_redis enabled, events are published to Redis and
+    every worker delivers what its listener thread receives, so clients see
+    events raised by any worker. Without Redis (or if publishing fails)
+    events only reach clients connected to the publishing process.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._listener: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        """Register a subscription (must be called from the event loop)"""
+        subscription = Subscription(channels, settings.event_queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def publish(self, channels: Iterable[str], event_type: str, data: dict):
+        """Publish one event to each channel; safe to call from any thread"""
+        for channel in set(channels):
+            message = {"type": event_type, "channel": channel, "data": data, "timestamp": time.time()}
+            if self._redis is not None:
+                try:
+                    self._redis.publish(settings.event_redis_prefix + channel, json.dumps(message, default=str))
+                    continue
+                except Exception as e:
+                    print(f"⚠️ Event publish to Redis failed, delivering locally: {e}")
+            self._deliver(channel, message)
+
+    def _deliver(self, channel: str, message: dict):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+
+    def start(self):
+        """Connect the Redis fan-out when enabled"""
+        if not settings.event_bus_redis or self._listener is not None:
+            return
+        try:
+            import redis
+            client = redis.Redis.from_url(settings.redis_url)
+            client.ping()
+        except Exception as e:
+            print(f"⚠️ Redis event fan-out unavailable, using in-process events only: {e}")
+            return
+
+        self._redis = client
+        self._stopping.clear()
+        self._listener = threading.Thread(target=self._listen, name="event-bus-redis", daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        """Deliver events published by any worker to local subscribers"""
+        prefix = settings.event_redis_prefix
+        while not self._stopping.is_set():
+            pubsub = None
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{prefix}*")
+                while not self._stopping.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if not message or message.get("type") != "pmessage":
+                        continue
+                    channel = message["channel"].decode("utf-8")[len(prefix):]
+                    self._deliver(channel, json.loads(message["data"]))
+            except Exception as e:
+                if not self._stopping.is_set():
+                    print(f"⚠️ Redis event listener error, reconnecting: {e}")
+                    self._stopping.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def stop(self):
+        self._stopping.set()
+        if self._listener is not None:
+            self._listener.join(timeout=5)
+        self._listener = None
+        self._redis = None
+
+
+event_bus = EventBus()
+
+
+def order_payload(order) -> dict:
+    """Event data for a feed order (ORM object or row with the same attributes)"""
+    return {
+        "id": order.id,
+        "order_number": order.order_number,
+        "farmer_id": order.farmer_id,
+        "mill_id": order.mill_id,
+        "status": order.status.value if hasattr(order.status, "value") else order.status,
+        "total_amount": order.total_amount,
+    }
+
+
+def publish_order_created(order):
+    event_bus.publish(
+        [farmer_channel(order.farmer_id), mill_channel(order.mill_id), ADMIN_CHANNEL],
+        "order.created",
+        order_payload(order)
+    )
+
+
+def publish_order_status(orders: List[dict]):
+    """Publish status changes; each dict has id, order_number, farmer_id, mill_id, from_status and status"""
+    for order in orders:
+        event_bus.publish(
+            [farmer_channel(order["farmer_id"]), mill_channel(order["mill_id"]), ADMIN_CHANNEL],
+            "order.status_changed",
+            order
+        )
+
+
+def publish_report_approval(reports: List[dict], approved: bool):
+    """Publish approval changes; each dict has id, report_number and farmer_id"""
+    event_type = "report.approved" if approved else "report.rejected"
+    for report in reports:
+        event_bus.publish(
+            [farmer_channel(report["farmer_id"]), ADMIN_CHANNEL],
+            event_type,
+            {**report, "is_approved": approved}
+        )
@@ -0,0 +1,204 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.farmer import Farmer
+from app.models.mill import FeedOrder
+from app.models.routine import RoutineData, MortalityRecord
+from app.models.user import User
+from app.services.cache import TTLCache
+
+# Feed phase by flock age in days (inclusive upper bounds)
+FEED_PHASES = [(10, "Prestarter"), (21, "Starter"), (None, "Finisher")]
+
+# Standard broiler live weight (g) by age (days), used to estimate the flock
+# age when no mortality record carries one
+STANDARD_AGE_DAYS = np.array([0, 7, 14, 21, 28, 35, 42, 49], dtype=float)
+STANDARD_WEIGHT_G = np.array([42, 180, 450, 900, 1450, 2000, 2600, 3100], dtype=float)
+
+_forecast_cache = TTLCache(settings.forecast_ttl_seconds)
+
+
+def feed_phase(age_days: np.ndarray) -> np.ndarray:
+    """Index into FEED_PHASES for each age"""
+    bounds = [limit for limit, _ in FEED_PHASES if limit is not None]
+    return np.searchsorted(np.array(bounds), age_days, side="left")
+
+
+def _to_ordinal(value) -> int:
+    return (value.date() if isinstance(value, datetime) else value).toordinal()
+
+
+def fit_consumption(farmer_index: np.ndarray, age: np.ndarray, consumption: np.ndarray, farmer_count: int):
+    """Least-squares line consumption = a + b * age for every farmer at once.
+
+    Observations are flat arrays tagged with their farmer index; the sums
+    behind the normal equations are taken with bincount, so the fit is one
+    vectorized pass however many farmers there are. Farmers with a single
+    observation (or no spread in age) get a flat line at their mean.
+    """
+    n = np.bincount(farmer_index, minlength=farmer_count).astype(float)
+    sx = np.bincount(farmer_index, age, minlength=farmer_count)
+    sy = np.bincount(farmer_index, consumption, minlength=farmer_count)
+    sxx = np.bincount(farmer_index, age * age, minlength=farmer_count)
+    sxy = np.bincount(farmer_index, age * consumption, minlength=farmer_count)
+
+    denominator = n * sxx - sx * sx
+    valid = (n >= 2) & (np.abs(denominator) > 1e-9)
+    slope = np.zeros(farmer_count)
+    np.divide(n * sxy - sx * sy, denominator, out=slope, where=valid)
+    intercept = np.zeros(farmer_count)
+    np.divide(sy - slope * sx, n, out=intercept, where=n > 0)
+    return intercept, slope
+
+
+def _load_observations(db: Session, since: datetime):
+    """Recent routine rows of active farmers, ordered by farmer and date"""
+    return db.query(
+        RoutineData.farmer_id,
+        RoutineData.date,
+        RoutineData.feed_consumption_kg,
+        RoutineData.average_bird_weight_g
+    ).join(Farmer, Farmer.id == RoutineData.farmer_id).join(User, User.id == Farmer.user_id).filter(
+        User.is_active == True,
+        RoutineData.date >= since
+    ).order_by(RoutineData.farmer_id, RoutineData.date).all()
+
+
+def _load_age_references(db: Session, farmer_ids: List[int]) -> Dict[int, tuple]:
+    """Latest (age_days, date) reported in a mortality record, per farmer"""
+    latest = db.query(
+        MortalityRecord.farmer_id,
+        func.max(MortalityRecord.id).label("record_id")
+    ).filter(
+        MortalityRecord.farmer_id.in_(farmer_ids),
+        MortalityRecord.age_days.isnot(None)
+    ).group_by(MortalityRecord.farmer_id).subquery()
+    rows = db.query(MortalityRecord.farmer_id, MortalityRecord.age_days, RoutineData.date).join(
+        latest, latest.c.record_id == MortalityRecord.id
+    ).join(RoutineData, RoutineData.id == MortalityRecord.routine_data_id).all()
+    return {row.farmer_id: (row.age_days, _to_ordinal(row.date)) for row in rows}
+
+
+def _load_farmer_mills(db: Session, farmer_ids: List[int]) -> Dict[int, int]:
+    """Mill of each farmer's most recent feed order"""
+    latest = db.query(
+        FeedOrder.farmer_id,
+        func.max(FeedOrder.id).label("order_id")
+    ).filter(FeedOrder.farmer_id.in_(farmer_ids)).group_by(FeedOrder.farmer_id).subquery()
+    rows = db.query(FeedOrder.farmer_id, FeedOrder.mill_id).join(latest, latest.c.order_id == FeedOrder.id).all()
+    return {row.farmer_id: row.mill_id for row in rows}
+
+
+def compute_forecasts(db: Session, today: Optional[date] = None) -> Dict[int, dict]:
+    """Per-mill daily feed demand by feed type for the next forecast_horizon_days.
+
+    Consumption is fitted against flock age per farmer, projected forward
+    (flocks stop eating once past forecast_max_age_days, i.e. lifted), split
+    into feed phases by the projected age and summed per mill.
+    """
+    today = today or date.today()
+    horizon = settings.forecast_horizon_days
+    max_age = settings.forecast_max_age_days
+    since = datetime.combine(today - timedelta(days=settings.forecast_lookback_days), datetime.min.time())
+
+    rows = _load_observations(db, since)
+    if not rows:
+        return {}
+
+    farmer_ids, farmer_index = np.unique(np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)), return_inverse=True)
+    farmer_count = len(farmer_ids)
+    day = np.fromiter((_to_ordinal(row[1]) for row in rows), dtype=np.int64, count=len(rows))
+    consumption = np.fromiter((row[2] or 0 for row in rows), dtype=float, count=len(rows))
+    weight = np.fromiter((row[3] or 0 for row in rows), dtype=float, count=len(rows))
+
+    # Age reference per farmer: a reported age, else one estimated from the
+    # latest weight on the growth curve; stale references (previous flock)
+    # fall back to the weight estimate as well
+    last_row = np.r_[np.flatnonzero(np.diff(farmer_index)), len(rows) - 1]
+    reference_day = day[last_row].copy()
+    reference_age = np.interp(weight[last_row], STANDARD_WEIGHT_G, STANDARD_AGE_DAYS)
+    reported = _load_age_references(db, farmer_ids.tolist())
+    for i, farmer_id in enumerate(farmer_ids.tolist()):
+        if farmer_id in reported:
+            age_days, reported_day = reported[farmer_id]
+            if age_days + (reference_day[i] - reported_day) <= max_age:
+                reference_age[i] = age_days + (reference_day[i] - reported_day)
+
+    age = reference_age[farmer_index] + (day - reference_day[farmer_index])
+    current_flock = age >= 0
+    intercept, slope = fit_consumption(farmer_index[current_flock], age[current_flock], consumption[current_flock], farmer_count)
+
+    # farmers x horizon projection
+    offsets = np.arange(1, horizon + 1)
+    future_age = reference_age[:, None] + (today.toordinal() - reference_day)[:, None] + offsets[None, :]
+    demand = np.maximum(intercept[:, None] + slope[:, None] * future_age, 0)
+    demand[(future_age > max_age) | (future_age < 0)] = 0
+    phase = feed_phase(future_age)
+
+    farmer_mills = _load_farmer_mills(db, farmer_ids.tolist())
+    mill_of_farmer = np.array([farmer_mills.get(farmer_id, -1) for farmer_id in farmer_ids.tolist()], dtype=np.int64)
+    assigned = mill_of_farmer >= 0
+    mill_ids, mill_index = np.unique(mill_of_farmer[assigned], return_inverse=True)
+
+    # mills x phases x days, accumulated in one scatter-add
+    totals = np.zeros((len(mill_ids), len(FEED_PHASES), horizon))
+    np.add.at(
+        totals,
+        (np.repeat(mill_index, horizon), phase[assigned].ravel(), np.tile(np.arange(horizon), int(assigned.sum()))),
+        demand[assigned].ravel()
+    )
+    farmers_per_mill = np.bincount(mill_index, minlength=len(mill_ids))
+
+    generated_at = datetime.utcnow()
+    forecasts = {}
+    for m, mill_id in enumerate(mill_ids.tolist()):
+        forecasts[mill_id] = {
+            "mill_id": mill_id,
+            "generated_at": generated_at,
+            "horizon_days": horizon,
+            "farmers_included": int(farmers_per_mill[m]),
+            "days": [
+                {
+                    "date": today + timedelta(days=int(offset)),
+                    "feed_types": {name: round(float(totals[m, p, d]), 2) for p, (_, name) in enumerate(FEED_PHASES)}
+                }
+                for d, offset in enumerate(offsets)
+            ],
+            "totals": {name: round(float(totals[m, p].sum()), 2) for p, (_, name) in enumerate(FEED_PHASES)},
+        }
+    return forecasts
+
+
+def _refresh() -> Dict[int, dict]:
+    db = SessionLocal()
+    try:
+        return compute_forecasts(db)
+    finally:
+        db.close()
+
+
+def get_mill_forecast(mill_id: int) -> dict:
+    """Cached forecast for one mill (all mills are computed together).
+
+    The cache is TTL-only: new routine data and farmer-mill assignments show
+    up within settings.forecast_ttl_seconds, in every worker alike.
+    """
+    forecasts = _forecast_cache.get_or_compute("all", _refresh)
+    return forecasts.get(mill_id) or {
+        "mill_id": mill_id,
+        "generated_at": datetime.utcnow(),
+        "horizon_days": settings.forecast_horizon_days,
+        "farmers_included": 0,
+        "days": [
+            {
+                "date": date.today() + timedelta(days=offset),
+                "feed_types": {name: 0.0 for _, name in FEED_PHASES}
+            }
+            for offset in range(1, settings.forecast_horizon_days + 1)
+        ],
+        "totals": {name: 0.0 for _, name in FEED_PHASES},
+    }
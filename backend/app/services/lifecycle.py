@@ -0,0 +1,25 @@
+from app.services import statements
+from app.services.events import event_bus
+from app.services.counters import counter_reconciler
+from app.services.audit import audit_log
+from app.services.log_partitions import log_maintenance
+from app.services.columnar import analytics_refresher
+
+
+def start_background_services():
+    """Start the background workers; called from every app's startup hook"""
+    event_bus.start()
+    counter_reconciler.start()
+    audit_log.start()
+    log_maintenance.start()
+    analytics_refresher.start()
+
+
+def stop_background_services():
+    """Stop the background workers, flushing queued audit entries"""
+    statements.shutdown()
+    event_bus.stop()
+    counter_reconciler.stop()
+    audit_log.stop()
+    log_maintenance.stop()
+    analytics_refresher.stop()
@@ -0,0 +1,369 @@
+import csv
+import enum
+import gzip
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional
+from sqlalchemy import Column, Index, MetaData, Table, and_, delete, func, insert, inspect, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import engine
+from app.models.admin import AdminLog, AdminAction
+
+# admin_logs is split by month of created_at. On PostgreSQL it is a native
+# RANGE-partitioned table with one partition per month plus a default
+# partition; on SQLite the admin_logs table only holds the current month and
+# closed months are rotated into admin_logs_pYYYYMM tables of the same shape.
+# Months past settings.admin_log_retention_months are exported to gzipped
+# CSV in settings.admin_log_archive_dir and dropped.
+
+TABLE = AdminLog.__table__
+DEFAULT_PARTITION = "admin_logs_default"
+_PARTITION_NAME = re.compile(r"^admin_logs_p(\d{4})(\d{2})$")
+# Serialises maintenance across workers on PostgreSQL
+_ADVISORY_LOCK_KEY = 480_220_048
+_EXPORT_CHUNK = 5000
+
+_partition_tables = {}
+_partition_tables_lock = threading.Lock()
+
+
+class LogPartition(NamedTuple):
+    name: str
+    start: date
+    end: date  # exclusive
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"admin_logs_p{month:%Y%m}"
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _is_postgresql(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def _partition_table(name: str) -> Table:
+    """Table object for one monthly partition, with the admin_logs columns and indexes"""
+    with _partition_tables_lock:
+        table = _partition_tables.get(name)
+        if table is None:
+            table = Table(name, MetaData(), *[
+                Column(column.name, column.type, nullable=column.nullable, primary_key=column.primary_key, autoincrement=False)
+                for column in TABLE.columns
+            ])
+            for index in TABLE.indexes:
+                if [column.name for column in index.columns] != ["id"]:
+                    Index(index.name.replace(TABLE.name, name, 1), *[table.c[column.name] for column in index.columns])
+            _partition_tables[name] = table
+        return table
+
+
+def list_partitions(connection) -> List[LogPartition]:
+    """Monthly partitions, newest first"""
+    if _is_postgresql(connection):
+        names = connection.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:parent)"
+        ), {"parent": TABLE.name}).scalars().all()
+    else:
+        names = inspect(connection).get_table_names()
+
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            start = date(int(match.group(1)), int(match.group(2)), 1)
+            partitions.append(LogPartition(name, start, add_months(start, 1)))
+    return sorted(partitions, key=lambda partition: partition.start, reverse=True)
+
+
+def query_logs(
+    db: Session,
+    action: Optional[AdminAction] = None,
+    user_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> list:
+    """Admin log rows newest first, reading only the months in [start_date, end_date].
+
+    PostgreSQL prunes partitions itself. On SQLite the live table and then
+    the overlapping monthly tables are read newest first, stopping as soon
+    as `limit` rows are found; partitions that fall entirely inside `skip`
+    are only counted.
+    """
+    end = _midnight(end_date + timedelta(days=1)) if end_date else None
+
+    def filtered(table: Table):
+        statement = select(table)
+        if action:
+            statement = statement.where(table.c.action == action)
+        if user_id:
+            statement = statement.where(table.c.user_id == user_id)
+        if start_date:
+            statement = statement.where(table.c.created_at >= _midnight(start_date))
+        if end:
+            statement = statement.where(table.c.created_at < end)
+        return statement
+
+    if _is_postgresql(db.get_bind()):
+        return db.execute(filtered(TABLE).order_by(TABLE.c.created_at.desc()).offset(skip).limit(limit)).all()
+
+    tables = [TABLE] + [
+        _partition_table(partition.name)
+        for partition in list_partitions(db.connection())
+        if (end is None or _midnight(partition.start) < end)
+        and (start_date is None or partition.end > start_date)
+    ]
+    rows = []
+    for table in tables:
+        statement = filtered(table)
+        if skip:
+            matching = db.execute(select(func.count()).select_from(statement.subquery())).scalar()
+            if matching <= skip:
+                skip -= matching
+                continue
+        rows.extend(db.execute(
+            statement.order_by(table.c.created_at.desc()).offset(skip).limit(limit - len(rows))
+        ).all())
+        skip = 0
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+# PostgreSQL
+
+def _lock(connection):
+    if _is_postgresql(connection):
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+
+
+def _create_pg_partition(connection, month: date) -> bool:
+    """Attach the partition for one month; returns False if it already exists"""
+    name = partition_name(month)
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar():
+        return False
+    bounds = {"start": month, "end": add_months(month, 1)}
+    in_month = "created_at >= :start AND created_at < :end"
+    connection.execute(text(f"CREATE TABLE {name} (LIKE {TABLE.name} INCLUDING DEFAULTS)"))
+    # Rows that landed in the default partition before this month existed
+    connection.execute(text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_month}"), bounds)
+    connection.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_month}"), bounds)
+    connection.execute(text(
+        f"ALTER TABLE {TABLE.name} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+    return True
+
+
+def _partition_pg_table(connection) -> bool:
+    """Convert a plain admin_logs table (as created by create_all) into a
+    partitioned one, moving its rows; returns False if already partitioned"""
+    relkind = connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": TABLE.name}
+    ).scalar()
+    if relkind != "r":
+        return False
+
+    legacy = f"{TABLE.name}_unpartitioned"
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": TABLE.name}).scalar()
+    connection.execute(text(f"ALTER TABLE {TABLE.name} RENAME TO {legacy}"))
+    connection.execute(text(f"ALTER TABLE {legacy} RENAME CONSTRAINT {TABLE.name}_pkey TO {legacy}_pkey"))
+    for index in TABLE.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    connection.execute(text(f"UPDATE {legacy} SET created_at = now() WHERE created_at IS NULL"))
+
+    # The partition key has to be part of the primary key
+    connection.execute(text(
+        f"CREATE TABLE {TABLE.name} (LIKE {legacy} INCLUDING DEFAULTS, "
+        f"PRIMARY KEY (id, created_at), FOREIGN KEY (user_id) REFERENCES users (id)) "
+        f"PARTITION BY RANGE (created_at)"
+    ))
+    if sequence:
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE.name}.id"))
+    connection.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE.name} DEFAULT"))
+    months = connection.execute(text(f"SELECT DISTINCT date_trunc('month', created_at)::date FROM {legacy}")).scalars().all()
+    for month in months:
+        _create_pg_partition(connection, month)
+    connection.execute(text(f"INSERT INTO {TABLE.name} SELECT * FROM {legacy}"))
+    for index in TABLE.indexes:
+        index.create(connection)
+    connection.execute(text(f"DROP TABLE {legacy}"))
+    return True
+
+
+# SQLite
+
+def _sqlite_autoincrement(connection) -> bool:
+    """Rebuild an admin_logs table created without AUTOINCREMENT, so ids of
+    rotated-out rows are never handed out again"""
+    sql = connection.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": TABLE.name}
+    ).scalar()
+    if sql is None or "AUTOINCREMENT" in sql.upper():
+        return False
+
+    legacy = f"{TABLE.name}_unpartitioned"
+    columns = [column.name for column in TABLE.columns]
+    connection.execute(text(f"ALTER TABLE {TABLE.name} RENAME TO {legacy}"))
+    for index in TABLE.indexes:
+        connection.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    TABLE.create(connection)
+    connection.execute(text(f"INSERT INTO {TABLE.name} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {legacy}"))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+    return True
+
+
+def _rotate_sqlite(connection, current: date) -> List[str]:
+    """Move rows of months before `current` into their monthly tables"""
+    month_label = func.strftime("%Y-%m", TABLE.c.created_at)
+    labels = connection.execute(
+        select(month_label).where(TABLE.c.created_at < _midnight(current)).distinct()
+    ).scalars().all()
+
+    rotated = []
+    for label in sorted(label for label in labels if label):
+        month = date(int(label[:4]), int(label[5:7]), 1)
+        table = _partition_table(partition_name(month))
+        table.create(connection, checkfirst=True)
+        in_month = and_(TABLE.c.created_at >= _midnight(month), TABLE.c.created_at < _midnight(add_months(month, 1)))
+        connection.execute(insert(table).from_select(
+            [column.name for column in TABLE.columns],
+            select(*TABLE.columns).where(in_month)
+        ))
+        connection.execute(delete(TABLE).where(in_month))
+        rotated.append(table.name)
+    return rotated
+
+
+# Retention
+
+def _csv_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _export(connection, table: Table) -> tuple:
+    """Write one partition to <archive dir>/<name>.csv.gz; returns (path, rows)"""
+    os.makedirs(settings.admin_log_archive_dir, exist_ok=True)
+    path = os.path.join(settings.admin_log_archive_dir, f"{table.name}.csv.gz")
+    partial = f"{path}.partial"
+    rows = 0
+    result = connection.execution_options(stream_results=True).execute(select(table).order_by(table.c.id))
+    with gzip.open(partial, "wt", newline="") as archive:
+        writer = csv.writer(archive)
+        writer.writerow(result.keys())
+        for chunk in result.partitions(_EXPORT_CHUNK):
+            writer.writerows([_csv_value(value) for value in row] for row in chunk)
+            rows += len(chunk)
+    os.replace(partial, path)
+    return path, rows
+
+
+def archive_expired_partitions(bind: Engine, today: Optional[date] = None) -> List[dict]:
+    """Export and drop the monthly partitions older than the retention period"""
+    if settings.admin_log_retention_months <= 0:
+        return []
+    today = today or datetime.utcnow().date()
+    cutoff = add_months(month_start(today), -settings.admin_log_retention_months)
+    with bind.connect() as connection:
+        expired = [partition for partition in list_partitions(connection) if partition.end <= cutoff]
+
+    archived = []
+    for partition in reversed(expired):
+        with bind.begin() as connection:
+            _lock(connection)
+            # Another worker may have archived it while we waited for the lock
+            if partition not in list_partitions(connection):
+                continue
+            path, rows = _export(connection, _partition_table(partition.name))
+            if _is_postgresql(connection):
+                connection.execute(text(f"ALTER TABLE {TABLE.name} DETACH PARTITION {partition.name}"))
+            connection.execute(text(f"DROP TABLE {partition.name}"))
+        archived.append({"partition": partition.name, "month": partition.start.strftime("%Y-%m"), "rows": rows, "file": path})
+    return archived
+
+
+def maintain_partitions(bind: Engine = engine, today: Optional[date] = None) -> dict:
+    """Bring the admin_logs partitions up to date and apply retention.
+
+    PostgreSQL: converts a plain table on first run and creates the
+    partitions for this month and settings.admin_log_partitions_ahead more.
+    SQLite: rotates closed months out of the live table.
+    """
+    today = today or datetime.utcnow().date()
+    current = month_start(today)
+    result = {"converted": False, "created": [], "rotated": []}
+    with bind.begin() as connection:
+        _lock(connection)
+        if _is_postgresql(connection):
+            result["converted"] = _partition_pg_table(connection)
+            for offset in range(settings.admin_log_partitions_ahead + 1):
+                month = add_months(current, offset)
+                if _create_pg_partition(connection, month):
+                    result["created"].append(partition_name(month))
+        else:
+            result["converted"] = _sqlite_autoincrement(connection)
+            result["rotated"] = _rotate_sqlite(connection, current)
+
+    result["archived"] = archive_expired_partitions(bind, today)
+    with bind.connect() as connection:
+        result["partitions"] = [
+            {"name": partition.name, "month": partition.start.strftime("%Y-%m")}
+            for partition in list_partitions(connection)
+        ]
+    result["maintained_at"] = datetime.utcnow()
+    return result
+
+
+class LogMaintenance:
+    """Background thread running maintain_partitions() at startup and then
+    every settings.admin_log_maintenance_seconds"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                result = maintain_partitions()
+                if result["archived"]:
+                    print(f"🗄️ Archived {len(result['archived'])} admin log partitions")
+            except Exception as e:
+                print(f"⚠️ Admin log partition maintenance failed: {e}")
+            self._stop.wait(settings.admin_log_maintenance_seconds)
+
+    def start(self):
+        if self._thread is None and settings.admin_log_maintenance_seconds > 0:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="admin-log-maintenance", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+
+log_maintenance = LogMaintenance()
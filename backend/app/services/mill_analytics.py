@@ -0,0 +1,101 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.mill import FeedOrder, FeedOrderItem, FeedType, OrderStatus
+from app.services.cache import TTLCache
+from app.services.orders import OPEN_ORDER_STATUSES
+from app.services.sql_helpers import hours_between, period_bucket
+
+_dashboard_cache = TTLCache(settings.mill_dashboard_ttl_seconds)
+
+
+def _date_range(query, start_date: Optional[date], end_date: Optional[date]):
+    if start_date:
+        query = query.filter(FeedOrder.created_at >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        query = query.filter(FeedOrder.created_at < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    return query
+
+
+def compute_mill_dashboard(
+    db: Session,
+    mill_id: int,
+    period: str,
+    start_date: Optional[date],
+    end_date: Optional[date]
+) -> dict:
+    """Order, revenue, backlog and delivery-time figures for one mill, each a single GROUP BY"""
+    status_rows = _date_range(
+        db.query(FeedOrder.status, func.count(FeedOrder.id)).filter(FeedOrder.mill_id == mill_id),
+        start_date, end_date
+    ).group_by(FeedOrder.status).all()
+    status_counts = {order_status.value: 0 for order_status in OrderStatus}
+    status_counts.update({order_status.value: count for order_status, count in status_rows})
+
+    bucket = period_bucket(db, FeedOrder.created_at, period).label("period")
+    revenue_rows = _date_range(
+        db.query(
+            bucket,
+            func.count(FeedOrder.id).label("order_count"),
+            func.coalesce(func.sum(FeedOrder.total_amount), 0).label("revenue")
+        ).filter(
+            FeedOrder.mill_id == mill_id,
+            FeedOrder.status != OrderStatus.CANCELLED
+        ),
+        start_date, end_date
+    ).group_by(bucket).order_by(bucket).all()
+
+    # The backlog is current, so it ignores the date range
+    pending_rows = db.query(
+        FeedOrderItem.feed_type_id,
+        FeedType.name.label("feed_type_name"),
+        func.coalesce(func.sum(FeedOrderItem.quantity), 0).label("quantity_kg")
+    ).join(FeedOrder, FeedOrder.id == FeedOrderItem.order_id).join(
+        FeedType, FeedType.id == FeedOrderItem.feed_type_id
+    ).filter(
+        FeedOrder.mill_id == mill_id,
+        FeedOrder.status.in_(OPEN_ORDER_STATUSES)
+    ).group_by(FeedOrderItem.feed_type_id, FeedType.name).order_by(FeedType.name).all()
+
+    delivery = _date_range(
+        db.query(
+            func.count(FeedOrder.id).label("delivered_count"),
+            func.avg(hours_between(db, FeedOrder.dispatched_at, FeedOrder.actual_delivery_date)).label("avg_hours")
+        ).filter(
+            FeedOrder.mill_id == mill_id,
+            FeedOrder.status == OrderStatus.DELIVERED,
+            FeedOrder.dispatched_at.isnot(None),
+            FeedOrder.actual_delivery_date.isnot(None)
+        ),
+        start_date, end_date
+    ).one()
+
+    return {
+        "mill_id": mill_id,
+        "period": period,
+        "generated_at": datetime.utcnow(),
+        "status_counts": status_counts,
+        "revenue": [
+            {"period": row.period, "order_count": row.order_count, "revenue": float(row.revenue)}
+            for row in revenue_rows
+        ],
+        "pending_feed": [row._asdict() for row in pending_rows],
+        "delivered_with_dispatch_time": delivery.delivered_count,
+        "avg_dispatch_to_delivery_hours": round(float(delivery.avg_hours), 2) if delivery.avg_hours is not None else None,
+    }
+
+
+def get_mill_dashboard(
+    db: Session,
+    mill_id: int,
+    period: str = "month",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """Mill dashboard, cached per mill and filter for settings.mill_dashboard_ttl_seconds"""
+    return _dashboard_cache.get_or_compute(
+        (mill_id, period, start_date, end_date),
+        lambda: compute_mill_dashboard(db, mill_id, period, start_date, end_date)
+    )
@@ -0,0 +1,167 @@
+import csv
+import io
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import case, func, literal, or_, update
+from sqlalchemy.orm import Session
+from app.models.mill import FeedOrder, OrderStatus
+from app.services.counters import adjust_counters, order_status_counter
+
+# Status changes a mill may make; anything else is rejected per order
+ALLOWED_TRANSITIONS = {
+    OrderStatus.PENDING: {OrderStatus.PROCESSING, OrderStatus.DISPATCHED, OrderStatus.CANCELLED},
+    OrderStatus.PROCESSING: {OrderStatus.DISPATCHED, OrderStatus.CANCELLED},
+    OrderStatus.DISPATCHED: {OrderStatus.DELIVERED},
+    OrderStatus.DELIVERED: set(),
+    OrderStatus.CANCELLED: set(),
+}
+
+# Orders still waiting on the mill
+OPEN_ORDER_STATUSES = [OrderStatus.PENDING, OrderStatus.PROCESSING]
+
+DISPATCH_SHEET_COLUMNS = ("order_number", "status", "notes")
+
+
+def parse_status(value: str) -> Optional[OrderStatus]:
+    """Map a status value or name from a dispatch sheet to OrderStatus"""
+    value = (value or "").strip().lower()
+    for order_status in OrderStatus:
+        if value in (order_status.value, order_status.name.lower()):
+            return order_status
+    return None
+
+
+def parse_dispatch_sheet(content: bytes) -> List[dict]:
+    """Parse a CSV dispatch sheet (order_number, status[, notes]) into transitions.
+
+    Rows with an unknown status keep `status` as None and the raw value in
+    `raw_status` so they can be reported back per row.
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    fieldnames = [name.strip().lower() for name in (reader.fieldnames or [])]
+    missing = [name for name in DISPATCH_SHEET_COLUMNS[:2] if name not in fieldnames]
+    if missing:
+        raise ValueError(f"Dispatch sheet is missing columns: {', '.join(missing)}")
+    
+    transitions = []
+    for row in reader:
+        row = {(key or "").strip().lower(): (value or "").strip() for key, value in row.items()}
+        if not row.get("order_number") and not row.get("status"):
+            continue
+        transitions.append({
+            "order_number": row.get("order_number") or None,
+            "status": parse_status(row.get("status")),
+            "raw_status": row.get("status"),
+            "notes": row.get("notes") or None
+        })
+    return transitions
+
+
+def apply_transitions(db: Session, mill_id: int, transitions: List[dict]) -> List[dict]:
+    """Validate and apply many order status transitions for one mill.
+
+    Each transition names an order by `order_id` or `order_number` and gives
+    the target `status` (and optional `notes`). Current statuses are read in
+    one SELECT; the valid transitions are applied with a single UPDATE that
+    re-checks mill and current status, so an order changed concurrently is
+    reported as a conflict. Returns one result per transition, in order.
+    The caller commits.
+    """
+    order_ids = {t["order_id"] for t in transitions if t.get("order_id") is not None}
+    order_numbers = {t["order_number"] for t in transitions if t.get("order_number")}
+    
+    conditions = []
+    if order_ids:
+        conditions.append(FeedOrder.id.in_(order_ids))
+    if order_numbers:
+        conditions.append(FeedOrder.order_number.in_(order_numbers))
+    rows = db.query(FeedOrder.id, FeedOrder.order_number, FeedOrder.farmer_id, FeedOrder.status).filter(
+        FeedOrder.mill_id == mill_id,
+        or_(*conditions)
+    ).all() if conditions else []
+    by_id = {row.id: row for row in rows}
+    by_number = {row.order_number: row for row in rows}
+    
+    results = []
+    pending: Dict[int, dict] = {}  # order id -> result awaiting the UPDATE
+    for transition in transitions:
+        order = by_id.get(transition.get("order_id")) or by_number.get(transition.get("order_number"))
+        target = transition.get("status")
+        result = {
+            "order_id": order.id if order else transition.get("order_id"),
+            "order_number": order.order_number if order else transition.get("order_number"),
+            "farmer_id": order.farmer_id if order else None,
+            "from_status": order.status if order else None,
+            "to_status": target,
+            "outcome": "updated",
+            "detail": None
+        }
+        results.append(result)
+        
+        if target is None:
+            result["outcome"], result["detail"] = "invalid_status", f"Unknown status '{transition.get('raw_status')}'"
+        elif order is None:
+            result["outcome"], result["detail"] = "not_found", "Order not found"
+        elif order.id in pending:
+            result["outcome"], result["detail"] = "duplicate", "Order appears more than once"
+        elif target not in ALLOWED_TRANSITIONS[order.status]:
+            result["outcome"] = "invalid_transition"
+            result["detail"] = f"Cannot change status from {order.status.value} to {target.value}"
+        else:
+            pending[order.id] = {**result, "notes": transition.get("notes")}
+    
+    if pending:
+        status_type = FeedOrder.status.type
+        now = datetime.utcnow()
+        from_status = case(
+            {order_id: literal(item["from_status"], status_type) for order_id, item in pending.items()},
+            value=FeedOrder.id
+        )
+        to_status = case(
+            {order_id: literal(item["to_status"], status_type) for order_id, item in pending.items()},
+            value=FeedOrder.id
+        )
+        values = {"status": to_status, "updated_at": func.now(), "version": FeedOrder.version + 1}
+        
+        # Dispatch stamps dispatched_at (and, as before, actual_delivery_date);
+        # delivery replaces actual_delivery_date with the delivery time
+        dispatched = [order_id for order_id, item in pending.items() if item["to_status"] == OrderStatus.DISPATCHED]
+        delivered = [order_id for order_id, item in pending.items() if item["to_status"] == OrderStatus.DELIVERED]
+        if dispatched:
+            values["dispatched_at"] = case(
+                (FeedOrder.id.in_(dispatched), now),
+                else_=FeedOrder.dispatched_at
+            )
+        if dispatched or delivered:
+            values["actual_delivery_date"] = case(
+                (FeedOrder.id.in_(dispatched + delivered), now),
+                else_=FeedOrder.actual_delivery_date
+            )
+        notes = {order_id: item["notes"] for order_id, item in pending.items() if item["notes"]}
+        if notes:
+            values["notes"] = case(notes, value=FeedOrder.id, else_=FeedOrder.notes)
+        
+        updated_ids = set(db.scalars(
+            update(FeedOrder)
+            .where(
+                FeedOrder.mill_id == mill_id,
+                FeedOrder.id.in_(pending),
+                FeedOrder.status == from_status
+            )
+            .values(**values)
+            .returning(FeedOrder.id)
+            .execution_options(synchronize_session=False)
+        ).all())
+        
+        deltas = defaultdict(int)
+        for order_id in updated_ids:
+            deltas[order_status_counter(pending[order_id]["from_status"])] -= 1
+            deltas[order_status_counter(pending[order_id]["to_status"])] += 1
+        adjust_counters(db, deltas)
+        
+        for result in results:
+            if result["outcome"] == "updated" and result["order_id"] not in updated_ids:
+                result["outcome"], result["detail"] = "conflict", "Order status changed concurrently"
+    
+    return results
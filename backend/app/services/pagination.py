@@ -0,0 +1,22 @@
+from typing import Any, List, Optional, Tuple
+
+
+def keyset_page(query, id_column, cursor: Optional[int], limit: int, descending: bool = True) -> Tuple[List[Any], Optional[int]]:
+    """Fetch one keyset page of `query` and the cursor for the next page.
+
+    The query must be ordered by `id_column` alone, in the same direction;
+    any other sort key (e.g. `created_at`, which concurrent transactions can
+    assign out of id order) would skip or repeat rows at page boundaries.
+    Works for ORM entities and column projections that include an `id`
+    column. The returned cursor is the id of the last row, or None on the
+    last page.
+    """
+    if cursor is not None:
+        query = query.filter(id_column < cursor if descending else id_column > cursor)
+
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = rows[-1].id if has_more and rows else None
+    return rows, next_cursor
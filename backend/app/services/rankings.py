@@ -0,0 +1,249 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+from app.config import settings
+from app.database import SessionLocal
+from app.models.production import ProductionReport
+
+ALL = "*"
+POPULATIONS = ("all", "approved")
+
+# metric name -> (report column, histogram range, bin count, lower value is better)
+METRICS = {
+    "fcr": (ProductionReport.fcr_percent, (0.0, 4.0), 800, True),
+    "mortality": (ProductionReport.total_mortality_percent, (0.0, 100.0), 1000, True),
+    "weight": (ProductionReport.avg_weight_kg, (0.0, 5.0), 1000, False),
+}
+
+
+class QuantileSketch:
+    """Fixed-range histogram sketch.
+
+    Sketches over the same range merge by adding counts and support removal,
+    so they can follow report deletions and rejections. Ranks are mid-ranks
+    at bin resolution and cost O(1) once the cumulative counts are cached.
+    """
+
+    def __init__(self, low: float, high: float, bins: int):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self._cumulative: Optional[np.ndarray] = None
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) if self._cumulative is None else int(self._cumulative[-1])
+
+    def bin_index(self, value: float) -> int:
+        position = (value - self.low) / (self.high - self.low) * self.bins
+        return min(max(int(position), 0), self.bins - 1)
+
+    def add(self, value: float, count: int = 1):
+        self.counts[self.bin_index(value)] += count
+        self._cumulative = None
+
+    def merge(self, other: "QuantileSketch"):
+        self.counts += other.counts
+        self._cumulative = None
+
+    def rank(self, value: float) -> float:
+        """Mid-rank of value: the fraction of observations below its bin plus
+        half of those in it, so ties with value count as half below"""
+        if self._cumulative is None:
+            self._cumulative = np.cumsum(self.counts)
+        total = self._cumulative[-1]
+        if total == 0:
+            return 0.0
+        index = self.bin_index(value)
+        below = self._cumulative[index - 1] if index > 0 else 0
+        # Positions within a bin are not kept, so its observations cannot be ordered against value
+        return float((below + self.counts[index] * 0.5) / total)
+
+
+def _month(value: Optional[datetime]) -> str:
+    return value.strftime("%Y-%m") if value else ALL
+
+
+def _place(value: Optional[str]) -> str:
+    return value.strip().lower() if value else ALL
+
+
+SketchKey = Tuple[str, str, str, str]  # population, metric, place, month
+RankingEntry = Tuple[str, str, Dict[str, float]]  # place, month, metric values
+
+RANKING_COLUMNS = [
+    ProductionReport.place,
+    ProductionReport.hatch_date,
+    *[column for column, _, _, _ in METRICS.values()]
+]
+
+
+def ranking_entry(report) -> RankingEntry:
+    """Capture the ranked values of a report or RANKING_COLUMNS row.
+
+    Take entries before committing so that recording them afterwards does
+    not reload expired ORM objects.
+    """
+    values = {metric: getattr(report, column.key) for metric, (column, _, _, _) in METRICS.items()}
+    return _place(report.place), _month(report.hatch_date), values
+
+
+class RankingIndex:
+    """Per-region and per-month sketches of report FCR, mortality and weight.
+
+    Built from the database on first use and rebuilt periodically; between
+    rebuilds it is updated incrementally as reports are created, approved,
+    rejected or deleted in this process. Changes recorded while a rebuild
+    is scanning are buffered and replayed onto the new sketches.
+    """
+
+    def __init__(self):
+        self._sketches: Dict[SketchKey, QuantileSketch] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # One rebuild at a time; _pending collects observations while it runs
+        self._rebuild_lock = threading.Lock()
+        self._pending: Optional[list] = None
+
+    def _sketch(self, key: SketchKey) -> QuantileSketch:
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            _, (low, high), bins, _ = METRICS[key[1]]
+            sketch = self._sketches[key] = QuantileSketch(low, high, bins)
+        return sketch
+
+    def _update(self, population: str, place: str, month: str, values: Dict[str, float], count: int):
+        for metric, value in values.items():
+            if value is None:
+                continue
+            for place_key in (place, ALL):
+                for month_key in (month, ALL):
+                    self._sketch((population, metric, place_key, month_key)).add(value, count)
+
+    def _stale(self) -> bool:
+        return self._built_at is None or time.time() - self._built_at > settings.ranking_rebuild_seconds
+
+    def _ensure_built(self):
+        if not self._stale():
+            return
+        # Until the first build completes callers wait for it; afterwards they
+        # keep using the current sketches while another request rebuilds
+        if not self._rebuild_lock.acquire(blocking=self._built_at is None):
+            return
+        try:
+            if self._stale():
+                self._rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def rebuild(self):
+        """Rebuild all sketches from the database with a single projected scan"""
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._pending = []
+        try:
+            sketches = self._build()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._sketches = sketches
+            for entries, populations, count in self._pending:
+                self._apply(entries, populations, count)
+            self._pending = None
+            self._built_at = time.time()
+
+    @staticmethod
+    def _build() -> Dict[SketchKey, QuantileSketch]:
+        db = SessionLocal()
+        try:
+            rows = db.query(*RANKING_COLUMNS, ProductionReport.is_approved).all()
+        finally:
+            db.close()
+
+        sketches: Dict[SketchKey, QuantileSketch] = {}
+        groups: Dict[Tuple[str, str], list] = {}
+        for row in rows:
+            groups.setdefault((_place(row[0]), _month(row[1])), []).append(row)
+
+        for (place, month), group in groups.items():
+            approved = np.array([bool(row[-1]) for row in group])
+            for offset, metric in enumerate(METRICS, start=2):
+                _, (low, high), bins, _ = METRICS[metric]
+                values = np.array([row[offset] for row in group], dtype=float)
+                valid = ~np.isnan(values)
+                values = np.where(valid, values, low)
+                indexes = np.clip(((values - low) / (high - low) * bins).astype(np.int64), 0, bins - 1)
+                for population, mask in (("all", valid), ("approved", valid & approved)):
+                    counts = np.bincount(indexes[mask], minlength=bins)
+                    for place_key in (place, ALL):
+                        for month_key in (month, ALL):
+                            key = (population, metric, place_key, month_key)
+                            sketch = sketches.get(key)
+                            if sketch is None:
+                                sketch = sketches[key] = QuantileSketch(low, high, bins)
+                            sketch.counts += counts
+        return sketches
+
+    def _apply(self, entries: Iterable[RankingEntry], populations: Iterable[str], count: int):
+        for place, month, values in entries:
+            for population in populations:
+                self._update(population, place, month, values, count)
+
+    def _observe(self, entries: Iterable[RankingEntry], populations: Iterable[str], count: int):
+        with self._lock:
+            if self._pending is not None:
+                # Possibly committed after the rebuild's scan; replayed once it is swapped in
+                self._pending.append((list(entries), populations, count))
+            elif self._built_at is not None:
+                self._apply(entries, populations, count)
+            # Otherwise the first rebuild will include these reports
+
+    def record_created(self, entries: Iterable[RankingEntry]):
+        self._observe(entries, ("all",), 1)
+
+    def record_deleted(self, entries: Iterable[RankingEntry]):
+        self._observe(entries, ("all",), -1)
+
+    def record_approved(self, entries: Iterable[RankingEntry]):
+        self._observe(entries, ("approved",), 1)
+
+    def record_rejected(self, entries: Iterable[RankingEntry]):
+        self._observe(entries, ("approved",), -1)
+
+    def rank(
+        self,
+        metric: str,
+        value: float,
+        place: Optional[str] = None,
+        months: Optional[Iterable[str]] = None,
+        approved_only: bool = False
+    ) -> Tuple[float, int]:
+        """Return (fraction of lots <= value, sample size)"""
+        self._ensure_built()
+        population = "approved" if approved_only else "all"
+        place_key = _place(place)
+        with self._lock:
+            if months is None:
+                sketch = self._sketches.get((population, metric, place_key, ALL))
+            else:
+                _, (low, high), bins, _ = METRICS[metric]
+                sketch = QuantileSketch(low, high, bins)
+                for month in months:
+                    part = self._sketches.get((population, metric, place_key, month))
+                    if part is not None:
+                        sketch.merge(part)
+            if sketch is None:
+                return 0.0, 0
+            return sketch.rank(value), sketch.total
+
+
+report_rankings = RankingIndex()
@@ -0,0 +1,123 @@
+import csv
+import io
+import tempfile
+from datetime import date, datetime
+from typing import Iterator, Optional
+from app.database import SessionLocal
+from app.models.production import ProductionReport, CostDetail
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    ProductionReport.id,
+    ProductionReport.report_number,
+    ProductionReport.farmer_id,
+    ProductionReport.farmer_name,
+    ProductionReport.place,
+    ProductionReport.hatch_date,
+    ProductionReport.chicks_housed,
+    ProductionReport.mortality_nos,
+    ProductionReport.total_mortality_percent,
+    ProductionReport.bird_lifted,
+    ProductionReport.bird_weight_kg,
+    ProductionReport.fcr_percent,
+    ProductionReport.avg_weight_kg,
+    ProductionReport.lot_grade,
+    ProductionReport.production_cost_per_kg,
+    ProductionReport.basic_rate,
+    ProductionReport.final_amount,
+    ProductionReport.is_approved,
+    ProductionReport.approved_at,
+    CostDetail.item.label("cost_item"),
+    CostDetail.quantity.label("cost_quantity"),
+    CostDetail.rate.label("cost_rate"),
+    CostDetail.amount.label("cost_amount"),
+]
+
+EXPORT_HEADER = [column.key for column in EXPORT_COLUMNS]
+
+
+def filter_reports(
+    query,
+    farmer_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    is_approved: Optional[bool] = None
+):
+    """Apply the common admin report filters to a query"""
+    if farmer_id:
+        query = query.filter(ProductionReport.farmer_id == farmer_id)
+    
+    if start_date:
+        query = query.filter(ProductionReport.hatch_date >= start_date)
+    
+    if end_date:
+        query = query.filter(ProductionReport.hatch_date <= end_date)
+    
+    if is_approved is not None:
+        query = query.filter(ProductionReport.is_approved == is_approved)
+    
+    return query
+
+
+def iter_export_rows(**filters) -> Iterator[tuple]:
+    """Yield one row per report cost detail, streaming from the database.
+
+    Uses its own session because the response body is produced after the
+    request handler has returned.
+    """
+    db = SessionLocal()
+    try:
+        query = db.query(*EXPORT_COLUMNS).outerjoin(
+            CostDetail, CostDetail.production_report_id == ProductionReport.id
+        )
+        query = filter_reports(query, **filters)
+        query = query.order_by(ProductionReport.id, CostDetail.id).yield_per(EXPORT_BATCH_SIZE)
+        for row in query:
+            yield tuple(row)
+    finally:
+        db.close()
+
+
+def stream_csv(**filters) -> Iterator[bytes]:
+    """Stream the report export as CSV in batches of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    
+    for count, row in enumerate(iter_export_rows(**filters), start=1):
+        writer.writerow(row)
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue().encode("utf-8")
+
+
+def _xlsx_value(value):
+    # Excel cannot store timezone-aware datetimes
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def stream_xlsx(**filters) -> Iterator[bytes]:
+    """Stream the report export as an XLSX workbook.
+
+    Rows are written with openpyxl's write-only mode into a spooled temporary
+    file, which is then streamed back in chunks.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Production Reports")
+    sheet.append(EXPORT_HEADER)
+    for row in iter_export_rows(**filters):
+        sheet.append([_xlsx_value(value) for value in row])
+    
+    with tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024) as output:
+        workbook.save(output)
+        output.seek(0)
+        while chunk := output.read(64 * 1024):
+            yield chunk
@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from app.config import settings
+
+EXACT = "exact"
+ESTIMATED = "estimated"
+
+# Rows sampled per index by SQLite's ANALYZE, keeping it cheap on big tables
+_ANALYSIS_LIMIT = 1000
+
+_analyzed_at: Dict[str, float] = {}
+_analyze_lock = threading.Lock()
+
+
+def _refresh_sqlite_statistics(db: Session, table_names: Iterable[str]):
+    """ANALYZE the tables whose sqlite_stat1 rows are older than
+    settings.row_estimate_analyze_seconds in this process"""
+    now = time.monotonic()
+    with _analyze_lock:
+        stale = [
+            name for name in table_names
+            if now - _analyzed_at.get(name, float("-inf")) > settings.row_estimate_analyze_seconds
+        ]
+        if not stale:
+            return
+        db.execute(text(f"PRAGMA analysis_limit = {_ANALYSIS_LIMIT}"))
+        for name in stale:
+            db.execute(text(f"ANALYZE {name}"))
+            _analyzed_at[name] = now
+        db.commit()
+
+
+def estimate_rows(db: Session, table_name: str) -> Optional[int]:
+    """Planner row estimate for a table, or None if no statistics exist yet.
+
+    PostgreSQL: pg_class.reltuples, kept current by autovacuum/ANALYZE.
+    SQLite: the row count recorded in sqlite_stat1 by ANALYZE.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"), {"name": table_name}
+        ).scalar()
+        # -1 until the table is first vacuumed or analyzed
+        return int(estimate) if estimate is not None and estimate >= 0 else None
+
+    try:
+        stat = db.execute(
+            text("SELECT stat FROM sqlite_stat1 WHERE tbl = :name LIMIT 1"), {"name": table_name}
+        ).scalar()
+    except OperationalError:
+        # sqlite_stat1 only exists once ANALYZE has run
+        return None
+    return int(stat.split()[0]) if stat else None
+
+
+def table_counts(db: Session, models: Iterable, exact: bool = False) -> Tuple[Dict[str, int], Dict[str, str]]:
+    """Row counts per table name and whether each is exact or estimated.
+
+    Unless `exact` is set, counts come from the planner statistics; tables
+    without statistics yet fall back to COUNT(*), all in one query.
+    """
+    models = list(models)
+    counts: Dict[str, int] = {}
+    accuracy: Dict[str, str] = {}
+    if not exact:
+        if db.get_bind().dialect.name == "sqlite":
+            _refresh_sqlite_statistics(db, [model.__tablename__ for model in models])
+        for model in models:
+            estimate = estimate_rows(db, model.__tablename__)
+            if estimate is not None:
+                counts[model.__tablename__] = estimate
+                accuracy[model.__tablename__] = ESTIMATED
+
+    remaining = [model for model in models if model.__tablename__ not in counts]
+    if remaining:
+        row = db.execute(select(*[
+            select(func.count()).select_from(model).scalar_subquery().label(model.__tablename__)
+            for model in remaining
+        ])).one()
+        for model in remaining:
+            counts[model.__tablename__] = getattr(row, model.__tablename__)
+            accuracy[model.__tablename__] = EXACT
+    return counts, accuracy
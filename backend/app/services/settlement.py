@@ -0,0 +1,291 @@
+from datetime import date
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import bindparam, func, tuple_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+from app.models.production import ProductionReport, CostDetail
+from app.models.settlement import SettlementRule
+
+# Report columns read by the engine, in array order
+INPUT_COLUMNS = [
+    ProductionReport.id,
+    ProductionReport.report_number,
+    ProductionReport.chicks_housed,
+    ProductionReport.mortality_nos,
+    ProductionReport.shortage,
+    ProductionReport.bird_weight_kg,
+    ProductionReport.avg_weight_kg,
+    ProductionReport.fcr_percent,
+    ProductionReport.total_mortality_percent,
+]
+
+# Fields written back by the engine and compared in the diff
+OUTPUT_FIELDS = [
+    "lot_grade",
+    "production_cost_per_kg",
+    "basic_rate",
+    "performance_bonus",
+    "balance",
+    "shorting_bird_kg",
+    "extra_mortality",
+    "minimum_growing_charge",
+    "final_amount",
+]
+
+# Cost detail rows that carry the sum of the other rows
+TOTAL_ITEMS = ("TOTAL",)
+
+
+def get_rule(db: Session, version: Optional[int] = None) -> Optional[SettlementRule]:
+    """Get a settlement rule by version, or the latest version"""
+    query = db.query(SettlementRule)
+    if version is not None:
+        return query.filter(SettlementRule.version == version).first()
+    return query.order_by(SettlementRule.version.desc()).first()
+
+
+def _load_inputs(
+    db: Session,
+    report_ids: Optional[List[int]],
+    place: Optional[str],
+    start_date: Optional[date],
+    end_date: Optional[date]
+):
+    """Load unapproved report inputs and their cost totals with two queries"""
+    query = db.query(
+        *INPUT_COLUMNS,
+        *[getattr(ProductionReport, field) for field in OUTPUT_FIELDS],
+        ProductionReport.version
+    ).filter(
+        ProductionReport.is_approved == False
+    )
+    if report_ids:
+        query = query.filter(ProductionReport.id.in_(report_ids))
+    if place:
+        query = query.filter(ProductionReport.place == place)
+    if start_date:
+        query = query.filter(ProductionReport.hatch_date >= start_date)
+    if end_date:
+        query = query.filter(ProductionReport.hatch_date <= end_date)
+    rows = query.order_by(ProductionReport.id).all()
+
+    cost_query = db.query(
+        CostDetail.production_report_id,
+        func.sum(CostDetail.amount)
+    ).join(ProductionReport, ProductionReport.id == CostDetail.production_report_id).filter(
+        ProductionReport.is_approved == False,
+        func.upper(CostDetail.item).notin_(TOTAL_ITEMS)
+    )
+    if report_ids:
+        cost_query = cost_query.filter(CostDetail.production_report_id.in_(report_ids))
+    costs = dict(cost_query.group_by(CostDetail.production_report_id).all())
+
+    return rows, costs
+
+
+def compute_settlements(
+    rule: SettlementRule,
+    chicks_housed: np.ndarray,
+    mortality_nos: np.ndarray,
+    shortage: np.ndarray,
+    bird_weight_kg: np.ndarray,
+    avg_weight_kg: np.ndarray,
+    fcr: np.ndarray,
+    mortality_percent: np.ndarray,
+    total_cost: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """Vectorized settlement calculation for many reports at once.
+
+    Growing charge per kg = basic rate + grade bonus - share of the production
+    cost above (or below) the standard cost. Shortage birds are deducted at
+    the standard cost and mortality above the allowance at the extra
+    mortality rate. The final amount never falls below the minimum growing
+    charge.
+    """
+    weight = bird_weight_kg
+    has_weight = weight > 0
+    cost_per_kg = np.divide(total_cost, weight, out=np.zeros_like(total_cost), where=has_weight)
+
+    # Grade: first slab whose FCR and mortality limits are both met; the
+    # last slab is the fallback.
+    slabs = rule.grade_slabs
+    grade_index = np.full(len(weight), len(slabs) - 1)
+    unassigned = np.ones(len(weight), dtype=bool)
+    for index, slab in enumerate(slabs):
+        match = unassigned & (fcr <= slab["max_fcr"]) & (mortality_percent <= slab["max_mortality_percent"])
+        grade_index[match] = index
+        unassigned &= ~match
+    grades = np.array([slab["grade"] for slab in slabs], dtype=object)[grade_index]
+    grade_bonus = np.array([slab.get("bonus_per_kg", 0) for slab in slabs], dtype=float)[grade_index]
+
+    cost_difference = cost_per_kg - rule.standard_cost_per_kg
+    performance_adjustment = cost_difference * rule.performance_share
+    balance = rule.basic_rate + grade_bonus - performance_adjustment
+
+    shorting_kg = shortage * avg_weight_kg
+    shorting_amount = shorting_kg * rule.standard_cost_per_kg
+
+    allowed_mortality = chicks_housed * rule.allowed_mortality_percent / 100
+    extra_mortality = np.maximum(mortality_nos - allowed_mortality, 0)
+    extra_mortality_amount = extra_mortality * rule.extra_mortality_rate
+
+    gross_amount = balance * weight - shorting_amount - extra_mortality_amount
+    minimum_charge = rule.minimum_growing_charge_per_kg * weight
+    final_amount = np.maximum(gross_amount, minimum_charge)
+
+    return {
+        "lot_grade": grades,
+        "production_cost_per_kg": cost_per_kg,
+        "grade_bonus": grade_bonus,
+        "cost_difference": cost_difference,
+        "performance_adjustment": performance_adjustment,
+        "balance": balance,
+        "shorting_kg": shorting_kg,
+        "shorting_amount": shorting_amount,
+        "allowed_mortality": allowed_mortality,
+        "extra_mortality": extra_mortality,
+        "extra_mortality_amount": extra_mortality_amount,
+        "minimum_charge": minimum_charge,
+        "final_amount": final_amount,
+    }
+
+
+def _g(value: float) -> str:
+    return f"{value:.10g}"
+
+
+def _report_values(rule: SettlementRule, result: Dict[str, np.ndarray], weight: np.ndarray, i: int) -> dict:
+    """Settlement values for one report in the stored column format"""
+    return {
+        "lot_grade": result["lot_grade"][i],
+        "production_cost_per_kg": float(result["production_cost_per_kg"][i]),
+        "basic_rate": rule.basic_rate,
+        # " / " rather than "-" so negative amounts do not read as "80--80--40"
+        "performance_bonus": f"{_g(rule.standard_cost_per_kg)} / {_g(result['cost_difference'][i])} / {_g(result['performance_adjustment'][i])}",
+        "balance": float(result["balance"][i]),
+        "shorting_bird_kg": f"{_g(result['shorting_kg'][i])} {_g(rule.standard_cost_per_kg)} {_g(result['shorting_amount'][i])}",
+        "extra_mortality": f"{_g(result['allowed_mortality'][i])} {_g(result['extra_mortality'][i])} {_g(result['extra_mortality_amount'][i])}",
+        "minimum_growing_charge": f"{_g(rule.minimum_growing_charge_per_kg)}*{_g(weight[i])} {_g(result['minimum_charge'][i])}",
+        "final_amount": float(result["final_amount"][i]),
+    }
+
+
+def _changed(before, after) -> bool:
+    if isinstance(after, float) and before is not None:
+        return not np.isclose(before, after, rtol=0, atol=1e-6)
+    return before != after
+
+
+def _lock_current(db: Session, updates: List[dict]) -> set:
+    """Ids of the reports still unapproved at the version they were read,
+    locked (on PostgreSQL) until the caller commits"""
+    rows = db.query(ProductionReport.id).filter(
+        tuple_(ProductionReport.id, ProductionReport.version).in_(
+            [(values["id"], values["version"]) for values in updates]
+        ),
+        ProductionReport.is_approved == False
+    ).with_for_update().all()
+    return {row.id for row in rows}
+
+
+def _write_settlements(db: Session, updates: List[dict]):
+    """One executemany UPDATE guarded by id, version and approval state"""
+    if not updates:
+        return
+    fields = [key for key in updates[0] if key not in ("id", "version")]
+    statement = update(ProductionReport.__table__).where(
+        ProductionReport.id == bindparam("report_id"),
+        ProductionReport.version == bindparam("read_version"),
+        ProductionReport.is_approved == False
+    ).values(
+        version=ProductionReport.version + 1,
+        **{field: bindparam(field) for field in fields}
+    )
+    result = db.connection().execute(statement, [
+        {"report_id": values["id"], "read_version": values["version"], **{field: values[field] for field in fields}}
+        for values in updates
+    ])
+    # Rows were locked above; only a writer racing the lock on SQLite gets here
+    if result.supports_sane_multi_rowcount() and result.rowcount != len(updates):
+        raise StaleDataError(f"{len(updates) - result.rowcount} reports changed while settlements were applied")
+
+
+def recompute_settlements(
+    db: Session,
+    rule: SettlementRule,
+    report_ids: Optional[List[int]] = None,
+    place: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    apply: bool = False
+) -> dict:
+    """Recompute settlement fields for unapproved reports and return a before/after diff.
+
+    With apply=True the changed reports are written back with one
+    versioned executemany UPDATE; the caller commits. Reports approved or
+    edited since they were read are left untouched and listed in
+    skipped_report_ids.
+    """
+    rows, costs = _load_inputs(db, report_ids, place, start_date, end_date)
+    count = len(rows)
+
+    def column(index, dtype=float):
+        return np.fromiter((row[index] or 0 for row in rows), dtype=dtype, count=count)
+
+    weight = column(5)
+    result = compute_settlements(
+        rule,
+        chicks_housed=column(2),
+        mortality_nos=column(3),
+        shortage=column(4),
+        bird_weight_kg=weight,
+        avg_weight_kg=column(6),
+        fcr=column(7),
+        mortality_percent=column(8),
+        total_cost=np.fromiter((costs.get(row[0], 0) or 0 for row in rows), dtype=float, count=count),
+    )
+
+    first_output = len(INPUT_COLUMNS)
+    diffs = []
+    updates = []
+    final_before = 0.0
+    for i, row in enumerate(rows):
+        values = _report_values(rule, result, weight, i)
+        before = dict(zip(OUTPUT_FIELDS, row[first_output:]))
+        final_before += before["final_amount"] or 0
+        changes = {
+            field: {"before": before[field], "after": values[field]}
+            for field in OUTPUT_FIELDS
+            if _changed(before[field], values[field])
+        }
+        if changes:
+            diffs.append({"id": row[0], "report_number": row[1], "changes": changes})
+            updates.append({
+                "id": row[0],
+                "version": row.version,
+                **values,
+                "performance_bonus_value": float(result["performance_adjustment"][i]),
+                "shorting_bird_value": float(result["shorting_amount"][i]),
+                "extra_mortality_value": float(result["extra_mortality_amount"][i]),
+                "minimum_growing_charge_value": float(result["minimum_charge"][i]),
+            })
+
+    skipped = []
+    if apply and updates:
+        current = _lock_current(db, updates)
+        skipped = [values["id"] for values in updates if values["id"] not in current]
+        updates = [values for values in updates if values["id"] in current]
+        diffs = [diff for diff in diffs if diff["id"] in current]
+        _write_settlements(db, updates)
+
+    return {
+        "rule_version": rule.version,
+        "applied": apply,
+        "reports_evaluated": count,
+        "reports_changed": len(diffs),
+        "skipped_report_ids": skipped,
+        "final_amount_before": final_before,
+        "final_amount_after": float(result["final_amount"].sum()) if count else 0.0,
+        "diffs": diffs,
+    }
@@ -0,0 +1,34 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+PERIODS = ("day", "week", "month")
+
+
+def hours_between(db: Session, start, end):
+    """SQL expression for the hours elapsed from `start` to `end`"""
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract("epoch", end - start) / 3600
+
+
+def period_bucket(db: Session, column, period: str):
+    """SQL expression labelling a timestamp with its day, week or month.
+
+    Days and weeks are rendered as 'YYYY-MM-DD' (weeks start on Monday) and
+    months as 'YYYY-MM', on both SQLite and PostgreSQL.
+    """
+    if period not in PERIODS:
+        raise ValueError(f"Unsupported period: {period}")
+    
+    if db.get_bind().dialect.name == "sqlite":
+        if period == "day":
+            return func.strftime("%Y-%m-%d", column)
+        if period == "week":
+            return func.date(column, "-6 days", "weekday 1")
+        return func.strftime("%Y-%m", column)
+    
+    if period == "day":
+        return func.to_char(column, "YYYY-MM-DD")
+    if period == "week":
+        return func.to_char(func.date_trunc("week", column), "YYYY-MM-DD")
+    return func.to_char(column, "YYYY-MM")
@@ -0,0 +1,176 @@
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Optional
+from app.config import settings
+from app.models.production import ProductionReport
+
+# Rendering happens in worker processes; concurrent requests for the same
+# statement wait on the same future instead of rendering it twice. Files are
+# keyed by a hash of the rendered content, so any edit to a report or its
+# cost details yields a new path and stale files are never served; a
+# successful render removes the report's older files.
+_executor: Optional[ProcessPoolExecutor] = None
+_in_flight: Dict[str, Future] = {}
+_lock = threading.RLock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Create the worker pool on first use (caller holds the lock)"""
+    global _executor
+    if _executor is None:
+        # Forking a threaded server process can deadlock the child on a held lock
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.statement_render_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _statement_path(report_id: int, payload: dict) -> str:
+    """Cache path keyed by report id and a hash of the statement content"""
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+    return os.path.join(settings.statement_cache_dir, f"report_{report_id}_{digest}.pdf")
+
+
+def _fmt(value) -> str:
+    if value is None or value == "":
+        return "-"
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    return str(value)
+
+
+def _statement_payload(report: ProductionReport) -> dict:
+    """Plain-data copy of a report that can be sent to a worker process"""
+    return {
+        "report_number": report.report_number,
+        "farmer_name": report.farmer_name,
+        "place": report.place,
+        "hatch_date": report.hatch_date.strftime("%d-%m-%Y") if report.hatch_date else "-",
+        "summary": [
+            ("Chicks Housed", _fmt(report.chicks_housed)),
+            ("Mortality (Nos)", _fmt(report.mortality_nos)),
+            ("Mortality %", _fmt(report.total_mortality_percent)),
+            ("Birds Lifted", _fmt(report.bird_lifted)),
+            ("Shortage", _fmt(report.shortage)),
+            ("Bird Weight (kg)", _fmt(report.bird_weight_kg)),
+            ("FCR", _fmt(report.fcr_percent)),
+            ("Lifting %", _fmt(report.lifting_percent)),
+            ("Avg Weight (kg)", _fmt(report.avg_weight_kg)),
+            ("Mean Age (days)", _fmt(report.mean_age_days)),
+            ("Lot Grade", _fmt(report.lot_grade)),
+        ],
+        "cost_details": [
+            (detail.item, _fmt(detail.quantity), _fmt(detail.rate), _fmt(detail.amount))
+            for detail in report.cost_details
+        ],
+        "settlement": [
+            ("Production Cost / kg", _fmt(report.production_cost_per_kg)),
+            ("Basic Rate", _fmt(report.basic_rate)),
+            ("Performance Bonus", _fmt(report.performance_bonus)),
+            ("Balance", _fmt(report.balance)),
+            ("Shorting Bird (kg)", _fmt(report.shorting_bird_kg)),
+            ("Extra Mortality", _fmt(report.extra_mortality)),
+            ("Minimum Growing Charge", _fmt(report.minimum_growing_charge)),
+            ("Final Amount", _fmt(report.final_amount)),
+        ],
+        "status": "APPROVED" if report.is_approved else "PENDING APPROVAL",
+    }
+
+
+def render_statement_pdf(payload: dict, path: str) -> str:
+    """Render a settlement statement PDF (runs in a worker process)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pdf = canvas.Canvas(tmp_path, pagesize=A4)
+    width, height = A4
+    y = height - 50
+
+    def line(text, x=50, size=10, bold=False, step=16):
+        nonlocal y
+        if y < 60:
+            pdf.showPage()
+            y = height - 50
+        pdf.setFont("Helvetica-Bold" if bold else "Helvetica", size)
+        pdf.drawString(x, y, text)
+        y -= step
+
+    line("Kukkuta Kendra - Settlement Statement", size=16, bold=True, step=24)
+    line(f"Report No: {payload['report_number']}    Status: {payload['status']}")
+    line(f"Farmer: {payload['farmer_name']}    Place: {payload['place']}    Hatch Date: {payload['hatch_date']}", step=24)
+
+    line("Production Summary", size=12, bold=True, step=18)
+    for label, value in payload["summary"]:
+        line(label, x=60, step=0)
+        line(value, x=300)
+    y -= 8
+
+    line("Cost Details", size=12, bold=True, step=18)
+    for x, heading in ((60, "Item"), (230, "Quantity"), (330, "Rate")):
+        line(heading, x=x, bold=True, step=0)
+    line("Amount", x=430, bold=True)
+    for item, quantity, rate, amount in payload["cost_details"]:
+        for x, value in ((60, item), (230, quantity), (330, rate)):
+            line(value, x=x, step=0)
+        line(amount, x=430)
+    y -= 8
+
+    line("Settlement", size=12, bold=True, step=18)
+    for label, value in payload["settlement"]:
+        line(label, x=60, bold=label == "Final Amount", step=0)
+        line(value, x=300, bold=label == "Final Amount")
+
+    pdf.save()
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_statement_pdf(report: ProductionReport, timeout: float = 60) -> str:
+    """Return the path of the cached statement PDF, rendering it if needed"""
+    payload = _statement_payload(report)
+    path = _statement_path(report.id, payload)
+    if os.path.exists(path):
+        return path
+
+    with _lock:
+        future = _in_flight.get(path)
+        if future is None:
+            os.makedirs(settings.statement_cache_dir, exist_ok=True)
+            future = _get_executor().submit(render_statement_pdf, payload, path)
+            _in_flight[path] = future
+            future.add_done_callback(lambda _: _forget(path))
+
+    future.result(timeout=timeout)
+    _remove_other_versions(report.id, path)
+    return path
+
+
+def _forget(path: str):
+    with _lock:
+        _in_flight.pop(path, None)
+
+
+def _remove_other_versions(report_id: int, keep: str):
+    """Delete the report's statements rendered from earlier content"""
+    for path in glob.glob(os.path.join(settings.statement_cache_dir, f"report_{report_id}_*.pdf")):
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def shutdown():
+    """Stop the render worker pool"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
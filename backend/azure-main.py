@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api import api_router
 from app.database import engine
 from app.models import Base
+from app.services.lifecycle import start_background_services, stop_background_services
 import os
 import logging
 
@@ -41,6 +42,18 @@ app.include_router(api_router, prefix="/api/v1")
 async def health_check():
     return {"status": "healthy", "service": "kukkuta-kendra-api"}
 
+# Startup event
+@app.on_event("startup")
+async def startup_event():
+    """Start the background workers"""
+    start_background_services()
+
+# Shutdown event
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the background workers"""
+    stop_background_services()
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -9,6 +9,7 @@ import os
 from app.config import settings
 from app.database import create_tables
 from app.api import api_router
+from app.services.lifecycle import start_background_services, stop_background_services
 
 # Create FastAPI app
 app = FastAPI(
@@ -76,12 +77,14 @@ async def root():
 async def startup_event():
     """Initialize database tables on startup"""
     create_tables()
+    start_background_services()
     print("🚀 Kukkuta Kendra API started successfully!")
 
 # Shutdown event
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
+    stop_background_services()
     print("🛑 Kukkuta Kendra API shutting down...")
 
 if __name__ == "__main__":
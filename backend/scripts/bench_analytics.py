@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the admin analytics aggregates
+Grows a scratch SQLite database from 1k to 1M farmers, feed orders and
+production reports and records the time and peak Python memory
+(tracemalloc) of each analytics call. The aggregates should stay flat as
+the row count grows; the old load-everything approach is measured up to
+--legacy-limit rows for comparison.
+
+Usage: python scripts/bench_analytics.py [sizes...] [--legacy-limit N]
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.farmer import Farmer
+from app.models.mill import FeedOrder, OrderStatus
+from app.models.production import ProductionReport
+from app.services.admin_stats import farmer_analytics, order_analytics, production_analytics
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+CHUNK = 50000
+FARM_TYPES = ["Broiler", "Layer", "Breeder", "Poultry"]
+
+
+def insert_rows(engine, start: int, stop: int):
+    """Add rows start..stop-1 to each benchmarked table"""
+    now = datetime.utcnow()
+    statuses = list(OrderStatus)
+    for chunk_start in range(start, stop, CHUNK):
+        ids = range(chunk_start, min(chunk_start + CHUNK, stop))
+        with engine.begin() as conn:
+            conn.execute(insert(Farmer), [{
+                "id": i + 1,
+                "user_id": i + 1,
+                "phone": "9999999999",
+                "address": "bench",
+                "farm_type": FARM_TYPES[i % len(FARM_TYPES)],
+                "is_verified": i % 3 == 0,
+                "created_at": now - timedelta(minutes=i % 100000)
+            } for i in ids])
+            conn.execute(insert(FeedOrder), [{
+                "id": i + 1,
+                "order_number": f"B{i:012d}",
+                "farmer_id": i + 1,
+                "mill_id": 1,
+                "status": statuses[i % len(statuses)],
+                "total_amount": float(random.randint(1000, 50000)),
+                "delivery_address": "bench",
+                "created_at": now - timedelta(minutes=i % 100000)
+            } for i in ids])
+            conn.execute(insert(ProductionReport), [{
+                "id": i + 1,
+                "farmer_id": i + 1,
+                "report_number": f"R{i:012d}",
+                "farmer_name": "Bench Farmer",
+                "place": "bench",
+                "hatch_date": now - timedelta(days=i % 365),
+                "total_mortality_percent": random.uniform(1, 8),
+                "chicks_housed": 5000,
+                "mortality_nos": 200,
+                "bird_lifted": 4800,
+                "bird_weight_kg": 9600.0,
+                "fcr_percent": random.uniform(1.4, 1.9),
+                "lifting_percent": 96.0,
+                "avg_weight_kg": random.uniform(1.8, 2.6),
+                "lot_grade": "A",
+                "production_cost_per_kg": 85.0,
+                "basic_rate": 6.0,
+                "final_amount": 60000.0,
+                "is_approved": i % 2 == 0
+            } for i in ids])
+
+
+def legacy_production_analytics(db):
+    """The previous implementation: hydrate every report, average in Python"""
+    reports = db.query(ProductionReport).all()
+    return sum(r.fcr_percent for r in reports) / len(reports) if reports else 0
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    args = sys.argv[1:]
+    legacy_limit = 100000
+    if "--legacy-limit" in args:
+        position = args.index("--legacy-limit")
+        legacy_limit = int(args[position + 1])
+        del args[position:position + 2]
+    sizes = [int(arg) for arg in args] or DEFAULT_SIZES
+    random.seed(42)
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_analytics.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine, tables=[Farmer.__table__, FeedOrder.__table__, ProductionReport.__table__])
+    Session = sessionmaker(bind=engine)
+
+    print(f"📊 Analytics benchmark ({path})")
+    print(f"  {'rows':>9} {'endpoint':<12} {'time (ms)':>10} {'peak (KiB)':>11}")
+    peaks = {}
+    loaded = 0
+    for size in sorted(sizes):
+        insert_rows(engine, loaded, size)
+        loaded = size
+        cases = [("farmers", farmer_analytics), ("orders", order_analytics), ("production", production_analytics)]
+        if size <= legacy_limit:
+            cases.append(("legacy prod", legacy_production_analytics))
+        for label, func in cases:
+            db = Session()
+            try:
+                # Warm up first so one-off statement compilation is not counted
+                func(db)
+                elapsed, peak = measure(lambda: func(db))
+            finally:
+                db.close()
+            peaks.setdefault(label, []).append(peak)
+            print(f"  {size:>9} {label:<12} {elapsed * 1000:10.1f} {peak / 1024:11.1f}")
+
+    for label in ("farmers", "orders", "production"):
+        growth = max(peaks[label]) / min(peaks[label])
+        print(f"  {label:<12} peak memory varies {growth:.2f}x across sizes")
+        assert growth < 2, f"{label} analytics memory grows with the row count"
+    print("✅ Aggregate analytics memory stays flat as the tables grow")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Database migration script for Kukkuta Kendra
+Brings an existing database up to date with the current models.
+Every step is idempotent, so the script can be re-run safely.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text, update
+from sqlalchemy.engine import Engine
+from app.database import SessionLocal, engine, create_tables
+from app.models.production import ProductionReport, CostDetail
+from app.models.mill import FeedOrder, OrderStatus
+from app.models.farmer import Farmer
+from app.models.admin import AdminLog, AdminAction
+from app.services.counters import reconcile_counters
+from app.services.log_partitions import maintain_partitions
+from app.services.costs import parse_cost_detail, parse_settlement_fields, SETTLEMENT_VALUE_FIELDS
+
+BATCH_SIZE = 1000
+
+
+def add_column(bind: Engine, model, column_name: str) -> bool:
+    """Add a model column to an existing table if it is missing"""
+    table = model.__table__
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    if column_name in existing:
+        return False
+    
+    column = table.c[column_name]
+    # Native enum types (PostgreSQL) must exist before the column
+    if hasattr(column.type, "create"):
+        column.type.create(bind, checkfirst=True)
+    column_type = column.type.compile(dialect=bind.dialect)
+    with bind.begin() as connection:
+        connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_name} {column_type}"))
+    print(f"  + {table.name}.{column_name}")
+    return True
+
+
+def add_typed_cost_columns(bind: Engine):
+    """Typed cost detail and settlement columns"""
+    for column_name in ("basis", "quantity_value", "rate_value"):
+        add_column(bind, CostDetail, column_name)
+    for column_name in SETTLEMENT_VALUE_FIELDS.values():
+        add_column(bind, ProductionReport, column_name)
+
+
+def backfill_typed_cost_columns(bind: Engine):
+    """Parse the text quantity/rate and settlement fields into the typed columns"""
+    db = SessionLocal(bind=bind)
+    try:
+        total = 0
+        while True:
+            rows = db.query(CostDetail.id, CostDetail.quantity, CostDetail.rate).filter(
+                CostDetail.basis.is_(None)
+            ).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            db.execute(
+                update(CostDetail),
+                [{"id": row.id, **parse_cost_detail(row.quantity, row.rate)} for row in rows]
+            )
+            db.commit()
+            total += len(rows)
+        print(f"  cost_details backfilled: {total}")
+        
+        total = 0
+        last_id = 0
+        text_columns = [getattr(ProductionReport, field) for field in SETTLEMENT_VALUE_FIELDS]
+        while True:
+            rows = db.query(ProductionReport.id, ProductionReport.version, *text_columns).filter(
+                ProductionReport.id > last_id,
+                ProductionReport.performance_bonus_value.is_(None)
+            ).order_by(ProductionReport.id).limit(BATCH_SIZE).all()
+            if not rows:
+                break
+            db.execute(
+                update(ProductionReport),
+                [
+                    {"id": row.id, "version": row.version, **parse_settlement_fields(row._asdict())}
+                    for row in rows
+                ]
+            )
+            db.commit()
+            total += len(rows)
+            last_id = rows[-1].id
+        print(f"  production_reports backfilled: {total}")
+    finally:
+        db.close()
+
+
+def add_version_columns(bind: Engine):
+    """Optimistic concurrency version columns"""
+    for model in (Farmer, FeedOrder, ProductionReport):
+        add_column(bind, model, "version")
+        table = model.__table__
+        with bind.begin() as connection:
+            connection.execute(update(table).where(table.c.version.is_(None)).values(version=1))
+
+
+def add_dispatched_at(bind: Engine):
+    """Dispatch timestamp for dispatch-to-delivery times"""
+    if add_column(bind, FeedOrder, "dispatched_at"):
+        # Dispatch used to stamp actual_delivery_date; keep that as the best
+        # available dispatch time for orders still out for delivery
+        table = FeedOrder.__table__
+        with bind.begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.status == OrderStatus.DISPATCHED, table.c.dispatched_at.is_(None))
+                .values(dispatched_at=table.c.actual_delivery_date)
+            )
+
+
+def add_feed_order_queue_index(bind: Engine):
+    """Index backing the mill work queue"""
+    for index in FeedOrder.__table__.indexes:
+        if index.name == "ix_feed_orders_mill_status_created":
+            index.create(bind, checkfirst=True)
+
+
+def add_created_at_indexes(bind: Engine):
+    """Indexes behind the recent activity counts in the system stats"""
+    for model, name in ((FeedOrder, "ix_feed_orders_created_at"), (ProductionReport, "ix_production_reports_created_at")):
+        for index in model.__table__.indexes:
+            if index.name == name:
+                index.create(bind, checkfirst=True)
+
+
+def add_updated_at_indexes(bind: Engine):
+    """Indexes behind the incremental analytics snapshot refresh"""
+    for model, name in ((FeedOrder, "ix_feed_orders_updated_at"), (ProductionReport, "ix_production_reports_updated_at")):
+        for index in model.__table__.indexes:
+            if index.name == name:
+                index.create(bind, checkfirst=True)
+
+
+def add_admin_actions(bind: Engine):
+    """Add new AdminAction members to the native PostgreSQL enum type"""
+    if bind.dialect.name != "postgresql":
+        return
+    enum_name = AdminLog.__table__.c.action.type.name
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for action in AdminAction:
+            connection.execute(text(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{action.name}'"))
+
+
+def seed_aggregate_counters(bind: Engine):
+    """Compute the aggregate counters from the existing rows"""
+    db = SessionLocal(bind=bind)
+    try:
+        result = reconcile_counters(db)
+    finally:
+        db.close()
+    print(f"  {len(result['repaired'])} of {result['checked']} counters set")
+
+
+def partition_admin_logs(bind: Engine):
+    """Partition admin_logs by month and add its log browsing indexes"""
+    result = maintain_partitions(bind)
+    if result["converted"]:
+        print("  admin_logs converted")
+    for index in AdminLog.__table__.indexes:
+        index.create(bind, checkfirst=True)
+    print(f"  {len(result['partitions'])} monthly partitions, {len(result['archived'])} archived")
+
+
+MIGRATIONS = [
+    ("Typed cost detail columns", add_typed_cost_columns),
+    # Runs before the backfill, whose versioned UPDATE reads the column
+    ("Optimistic concurrency version columns", add_version_columns),
+    ("Backfill typed cost detail columns", backfill_typed_cost_columns),
+    ("Feed order queue index", add_feed_order_queue_index),
+    ("Feed order dispatch timestamp", add_dispatched_at),
+    ("Seed aggregate counters", seed_aggregate_counters),
+    ("Admin audit actions", add_admin_actions),
+    ("Admin log partitions", partition_admin_logs),
+    ("Created-at indexes", add_created_at_indexes),
+    ("Updated-at indexes", add_updated_at_indexes),
+]
+
+
+def main():
+    """Run all migration steps in order"""
+    print("🚀 Migrating Kukkuta Kendra Database...")
+    
+    # New tables are created directly from the models
+    create_tables()
+    
+    for description, step in MIGRATIONS:
+        print(f"📋 {description}...")
+        step(engine)
+    
+    print("🎉 Database migration completed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before anything imports app.database
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="kukkuta-tests-"), "test.db")
+
+import pytest
+from fastapi.testclient import TestClient
+from app.auth.security import create_access_token
+from app.database import Base, SessionLocal, engine
+from app.models.farmer import Farmer
+from app.models.mill import FeedType, Mill
+from app.models.user import User, UserRole
+
+API = "/api/v1"
+
+
+@pytest.fixture(autouse=True)
+def tables():
+    """Fresh tables for every test"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    yield
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from main import app
+    return TestClient(app)
+
+
+def _user(db, email: str, role: UserRole) -> User:
+    user = User(email=email, hashed_password="x", full_name=email.split("@")[0], role=role, is_active=True)
+    db.add(user)
+    db.flush()
+    return user
+
+
+@pytest.fixture
+def accounts(db):
+    """An admin, a farmer with its profile and a mill, committed"""
+    admin = _user(db, "admin@example.com", UserRole.ADMIN)
+    farmer_user = _user(db, "farmer@example.com", UserRole.FARMER)
+    mill_user = _user(db, "mill@example.com", UserRole.MILL)
+    farmer = Farmer(user_id=farmer_user.id, phone="1", address="Farm", farm_type="Poultry")
+    mill = Mill(user_id=mill_user.id, name="Mill", address="Mill", phone="2", capacity_per_day=1000)
+    db.add_all([farmer, mill, FeedType(name="Starter", price_per_kg=42)])
+    db.commit()
+    return {"admin": admin, "farmer_user": farmer_user, "mill_user": mill_user, "farmer": farmer, "mill": mill}
+
+
+def auth_headers(user: User) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+
+def report_payload(farmer_id: int, **overrides) -> dict:
+    payload = {
+        "farmer_id": farmer_id,
+        "farmer_name": "Farmer",
+        "place": "Vizag",
+        "hatch_date": "2026-09-01T00:00:00",
+        "total_mortality_percent": 4.0,
+        "chicks_housed": 5000,
+        "mortality_nos": 200,
+        "bird_lifted": 4800,
+        "shortage": 0,
+        "bird_weight_kg": 10000.0,
+        "fcr_percent": 1.6,
+        "lifting_percent": 96.0,
+        "avg_weight_kg": 2.1,
+        "lot_grade": "A",
+        "production_cost_per_kg": 80.0,
+        "basic_rate": 6.0,
+        "final_amount": 60000.0,
+        "cost_details": [
+            {"item": "Chicks", "quantity": "5000", "rate": "35", "amount": 175000.0},
+            {"item": "Feed", "quantity": "ACTUAL", "rate": "", "amount": 600000.0},
+        ],
+    }
+    payload.update(overrides)
+    return payload
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from app.models.production import ProductionReport
+from app.services.analytics_series import SeriesCache, bucket_starts
+from conftest import API, auth_headers, report_payload
+
+STARTS = bucket_starts(date(2025, 1, 1), date(2025, 6, 30), "month")
+TODAY = date(2026, 1, 1)
+
+
+def _reports(cache, db):
+    return {label: raw["reports"] for label, raw in cache.buckets(db, "production", "month", STARTS, TODAY).items()}
+
+
+def test_closed_buckets_follow_writes_made_through_another_worker(client, accounts, db):
+    payload = report_payload(accounts["farmer"].id, hatch_date="2025-03-05T00:00:00")
+    client.post(f"{API}/production/reports", json=payload, headers=auth_headers(accounts["farmer_user"]))
+    other_worker = SeriesCache()
+    assert _reports(other_worker, db)["2025-03"] == 1
+
+    # Written outside other_worker's process state; only the generation counters tell it
+    report = db.query(ProductionReport).one()
+    report.hatch_date = datetime(2025, 4, 10)
+    db.commit()
+
+    buckets = _reports(other_worker, db)
+    assert buckets["2025-03"] == 0
+    assert buckets["2025-04"] == 1
+
+
+def test_closed_buckets_are_served_from_cache(client, accounts, db, monkeypatch):
+    cache = SeriesCache()
+    _reports(cache, db)
+    calls = []
+    query = SeriesCache._query
+    monkeypatch.setattr(SeriesCache, "_query", staticmethod(lambda *args: calls.append(args) or query(*args)))
+
+    assert set(_reports(cache, db).values()) == {0}
+    assert calls == []
@@ -0,0 +1,43 @@
+import threading
+from app.services.catalogue import FeedCatalogue
+
+
+class _InvalidatingLock:
+    """Runs invalidate() just before the real lock is taken, as a racing writer would"""
+
+    def __init__(self, catalogue: FeedCatalogue):
+        self.catalogue = catalogue
+        self.lock = threading.Lock()
+        self.armed = True
+
+    def __enter__(self):
+        if self.armed:
+            self.armed = False
+            self.catalogue._version += 1
+            self.catalogue._snapshot = None
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+
+
+def test_snapshot_reloads_when_invalidated_while_waiting(accounts):
+    catalogue = FeedCatalogue()
+    catalogue.snapshot()
+    catalogue._loaded_at = 0.0  # expired
+    catalogue._lock = _InvalidatingLock(catalogue)
+
+    snapshot = catalogue.snapshot()
+
+    assert snapshot is not None
+    assert [entry["name"] for entry in snapshot.available] == ["Starter"]
+    assert snapshot.version == 1
+
+
+def test_snapshot_is_reused_until_invalidated(accounts):
+    catalogue = FeedCatalogue()
+    first = catalogue.snapshot()
+
+    assert catalogue.snapshot() is first
+    catalogue.invalidate()
+    assert catalogue.snapshot() is not first
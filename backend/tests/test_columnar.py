@@ -0,0 +1,48 @@
+import os
+import pytest
+from app.config import settings
+from app.services.columnar import ColumnarStore, drilldown
+from conftest import API, auth_headers, report_payload
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "analytics_store_dir", str(tmp_path))
+    return ColumnarStore()
+
+
+def _create(client, accounts, **overrides):
+    payload = report_payload(accounts["farmer"].id, **overrides)
+    response = client.post(f"{API}/production/reports", json=payload, headers=auth_headers(accounts["farmer_user"]))
+    assert response.status_code == 200
+
+
+def test_drilldown_groups_and_filters(client, accounts, store):
+    _create(client, accounts, place="Vizag", fcr_percent=1.5)
+    _create(client, accounts, place="Vizag", fcr_percent=1.7)
+    _create(client, accounts, place="Guntur", fcr_percent=1.9)
+    store.refresh(["production"])
+
+    result = drilldown(store.snapshot("production"), ["place"], ["fcr_percent"])
+
+    assert [(row["place"], row["count"]) for row in result["rows"]] == [("Guntur", 1), ("Vizag", 2)]
+    assert result["rows"][1]["fcr_percent"]["avg"] == pytest.approx(1.6)
+    filtered = drilldown(store.snapshot("production"), ["month"], filters={"place": ["Guntur"]})
+    assert filtered["matched_rows"] == 1
+    with pytest.raises(ValueError):
+        drilldown(store.snapshot("production"), ["colour"])
+
+
+def test_incremental_refresh_adds_rows_and_prunes_versions(client, accounts, store):
+    _create(client, accounts)
+    store.refresh(["production"])
+    for _ in range(2):
+        _create(client, accounts)
+        meta = store.refresh(["production"])["production"]
+
+    assert meta["full"] is False
+    assert store.load("production").rows == 3
+    root = os.path.join(settings.analytics_store_dir, "production")
+    versions = [name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))]
+    assert len(versions) == 2
+    assert store.load("production").version in versions
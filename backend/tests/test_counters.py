@@ -0,0 +1,59 @@
+from app.models.aggregate import AggregateCounter
+from app.services.counters import (
+    FARMERS_TOTAL, FARMERS_VERIFIED, MILLS_TOTAL, REPORTS_TOTAL, REPORTS_UNAPPROVED,
+    month_counter, read_counters, reconcile_counters
+)
+from app.models.production import ProductionReport
+from conftest import API, auth_headers, report_payload
+
+
+def _counter(db, name):
+    db.expire_all()
+    return read_counters(db, [name])[name]
+
+
+def test_orm_insert_update_delete_adjust_counters(accounts, db):
+    farmer = accounts["farmer"]
+    assert _counter(db, FARMERS_TOTAL) == 1
+    assert _counter(db, FARMERS_VERIFIED) == 0
+
+    farmer.is_verified = True
+    db.commit()
+    assert _counter(db, FARMERS_VERIFIED) == 1
+
+    db.delete(farmer)
+    db.commit()
+    assert _counter(db, FARMERS_TOTAL) == 0
+    assert _counter(db, FARMERS_VERIFIED) == 0
+
+
+def test_bulk_report_insert_and_approval_adjust_counters(client, accounts, db):
+    headers = auth_headers(accounts["farmer_user"])
+    created = client.post(f"{API}/production/reports", json=report_payload(accounts["farmer"].id), headers=headers).json()
+    report = db.get(ProductionReport, created["id"])
+
+    assert _counter(db, REPORTS_TOTAL) == 1
+    assert _counter(db, REPORTS_UNAPPROVED) == 1
+    assert _counter(db, month_counter("production_reports", report.created_at)) == 1
+
+    report.is_approved = True
+    db.commit()
+    assert _counter(db, REPORTS_UNAPPROVED) == 0
+
+
+def test_reconcile_repairs_drift_and_missing_counters(accounts, db):
+    db.query(AggregateCounter).filter(AggregateCounter.name == FARMERS_TOTAL).update(
+        {"value": AggregateCounter.value + 5}
+    )
+    db.query(AggregateCounter).filter(AggregateCounter.name == MILLS_TOTAL).delete()
+    db.add(AggregateCounter(name="generation.series.orders.2025-01", value=7))
+    db.commit()
+
+    result = reconcile_counters(db)
+
+    assert result["repaired"][FARMERS_TOTAL] == {"stored": 6, "actual": 1}
+    assert result["repaired"][MILLS_TOTAL] == {"stored": None, "actual": 1}
+    assert _counter(db, FARMERS_TOTAL) == 1
+    assert _counter(db, MILLS_TOTAL) == 1
+    assert _counter(db, "generation.series.orders.2025-01") == 7
+    assert reconcile_counters(db)["repaired"] == {}
@@ -0,0 +1,47 @@
+from datetime import date, datetime
+from app.models.mill import OrderStatus
+from app.services.dispatch_scheduler import DispatchScheduler, MillSchedule, ScheduledOrder
+
+
+def _order(order_id, quantity, status=OrderStatus.PENDING, requested=None):
+    return ScheduledOrder(order_id, f"FO{order_id}", status, quantity, requested, datetime(2026, 1, order_id))
+
+
+def test_plan_fills_days_in_priority_order():
+    schedule = MillSchedule([_order(1, 600), _order(2, 600, OrderStatus.PROCESSING), _order(3, 300)])
+
+    plan = schedule.plan(1000, date(2026, 1, 1))
+
+    assert [order["order_id"] for order in plan["orders"]] == [2, 1, 3]
+    assert [order["production_date"] for order in plan["orders"]] == [date(2026, 1, 1), date(2026, 1, 2), date(2026, 1, 2)]
+    assert [day["planned_quantity"] for day in plan["days"]] == [1000, 500]
+
+
+def test_add_and_remove_reschedule_the_queue():
+    schedule = MillSchedule([_order(1, 600), _order(2, 600)])
+    schedule.add(_order(3, 500, requested=date(2026, 1, 1)))
+    assert [order.order_id for order in schedule] == [3, 1, 2]
+    assert schedule.total_quantity == 1700
+
+    schedule.remove(3)
+    plan = schedule.plan(1000, date(2026, 1, 1), horizon_days=1)
+    assert [order["order_id"] for order in plan["orders"]] == [1]
+    assert plan["order_count"] == 2
+
+
+def test_load_racing_an_order_change_is_not_cached(db, monkeypatch):
+    scheduler = DispatchScheduler()
+    load_orders = DispatchScheduler.load_orders
+
+    def load_during_change(db, mill_id):
+        orders = load_orders(db, mill_id)
+        scheduler.order_added(mill_id, _order(1, 100))
+        return orders
+
+    monkeypatch.setattr(DispatchScheduler, "load_orders", staticmethod(load_during_change))
+    scheduler.get(db, 1)
+    assert 1 not in scheduler._schedules
+
+    monkeypatch.setattr(DispatchScheduler, "load_orders", staticmethod(load_orders))
+    scheduler.get(db, 1)
+    assert 1 in scheduler._schedules
@@ -0,0 +1,27 @@
+from app.models.farmer import Farmer
+from app.services import audit
+from app.services.counters import FARMERS_VERIFIED, read_counters
+from conftest import API, auth_headers
+
+
+def test_bulk_verify_touches_only_farmers_that_change(client, accounts, db, monkeypatch):
+    recorded = []
+    monkeypatch.setattr(audit.audit_log, "record", lambda *args: recorded.append(args[3]))
+    farmer = accounts["farmer"]
+    headers = auth_headers(accounts["admin"])
+    url = f"{API}/farmers/admin/bulk-verify"
+    version = farmer.version
+
+    first = client.put(url, params={"is_verified": True}, json=[farmer.id, 9999], headers=headers)
+    second = client.put(url, params={"is_verified": True}, json=[farmer.id], headers=headers)
+
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json()["farmer_ids"] == [farmer.id]
+    assert second.json()["updated_count"] == 0
+    assert recorded == [farmer.id]
+    db.expire_all()
+    assert db.get(Farmer, farmer.id).version == version + 1
+    assert read_counters(db, [FARMERS_VERIFIED])[FARMERS_VERIFIED] == 1
+
+    client.put(url, params={"is_verified": False}, json=[farmer.id], headers=headers)
+    assert read_counters(db, [FARMERS_VERIFIED])[FARMERS_VERIFIED] == 0
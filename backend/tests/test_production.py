@@ -0,0 +1,79 @@
+from app.models.production import ProductionReport
+from conftest import API, auth_headers, report_payload
+
+
+def _create(client, accounts):
+    response = client.post(
+        f"{API}/production/reports",
+        json=report_payload(accounts["farmer"].id),
+        headers=auth_headers(accounts["farmer_user"])
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_farmer_update_changes_figures_and_version(client, accounts):
+    report = _create(client, accounts)
+    headers = auth_headers(accounts["farmer_user"])
+
+    response = client.put(
+        f"{API}/production/reports/{report['id']}",
+        json={"fcr_percent": 1.7, "performance_bonus": "0.5 / -0.5 / -0.25"},
+        headers={**headers, "If-Match": f'"{report["version"]}"'}
+    )
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["fcr_percent"] == 1.7
+    assert body["performance_bonus_value"] == -0.25
+    assert body["version"] == report["version"] + 1
+
+
+def test_farmer_update_rejects_stale_if_match(client, accounts):
+    report = _create(client, accounts)
+    url = f"{API}/production/reports/{report['id']}"
+    headers = auth_headers(accounts["farmer_user"])
+    assert client.put(url, json={"place": "Guntur"}, headers=headers).status_code == 200
+
+    response = client.put(url, json={"place": "Ongole"}, headers={**headers, "If-Match": f'"{report["version"]}"'})
+
+    assert response.status_code == 409
+
+
+def test_farmer_update_rejects_approval_empty_and_null_fields(client, accounts):
+    report = _create(client, accounts)
+    url = f"{API}/production/reports/{report['id']}"
+    headers = auth_headers(accounts["farmer_user"])
+
+    assert client.put(url, json={"is_approved": True}, headers=headers).status_code == 422
+    assert client.put(url, json={}, headers=headers).status_code == 400
+    assert client.put(url, json={"fcr_percent": None}, headers=headers).status_code == 400
+
+
+def test_farmer_cannot_update_approved_report(client, accounts, db):
+    report = _create(client, accounts)
+    db.get(ProductionReport, report["id"]).is_approved = True
+    db.commit()
+
+    response = client.put(
+        f"{API}/production/reports/{report['id']}",
+        json={"place": "Guntur"},
+        headers=auth_headers(accounts["farmer_user"])
+    )
+
+    assert response.status_code == 400
+
+
+def test_create_conflict_returns_fixed_409(client, accounts, monkeypatch):
+    from app.api import production
+    monkeypatch.setattr(production, "_generate_report_number", lambda: "PR-DUPLICATE")
+    _create(client, accounts)
+
+    response = client.post(
+        f"{API}/production/reports",
+        json=report_payload(accounts["farmer"].id),
+        headers=auth_headers(accounts["farmer_user"])
+    )
+
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Production report conflicts with existing data"
@@ -0,0 +1,51 @@
+import pytest
+from app.services.rankings import QuantileSketch, report_rankings
+from conftest import API, auth_headers, report_payload
+
+
+def _sketch(*values):
+    sketch = QuantileSketch(0.0, 4.0, 800)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+def test_tied_values_rank_at_the_middle():
+    sketch = _sketch(1.6, 1.6, 1.6)
+
+    assert sketch.rank(1.6) == pytest.approx(0.5)
+    assert sketch.total == 3
+
+
+def test_rank_counts_lower_bins_fully():
+    sketch = _sketch(1.2, 1.4, 1.6, 1.8)
+
+    assert sketch.rank(1.0) == 0.0
+    assert sketch.rank(1.6) == pytest.approx((2 + 0.5) / 4)
+    assert sketch.rank(3.0) == 1.0
+
+
+def test_removal_and_merge():
+    sketch = _sketch(1.2, 1.6)
+    sketch.add(1.2, -1)
+    assert sketch.rank(1.4) == 0.0
+
+    sketch.merge(_sketch(1.2))
+    assert sketch.total == 2
+    assert sketch.rank(1.4) == pytest.approx(0.5)
+
+
+def test_ranking_endpoint_with_ties(client, accounts):
+    headers = auth_headers(accounts["farmer_user"])
+    for _ in range(3):
+        payload = report_payload(accounts["farmer"].id, fcr_percent=1.6)
+        assert client.post(f"{API}/production/reports", json=payload, headers=headers).status_code == 200
+    report_rankings.rebuild()
+
+    response = client.get(f"{API}/production/rankings", params={"metric": "fcr", "value": 1.6}, headers=headers)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["sample_size"] == 3
+    assert body["percentile"] == pytest.approx(50)
+    assert body["better_than_percent"] == pytest.approx(50)
@@ -0,0 +1,87 @@
+from sqlalchemy import update
+from app.models.production import ProductionReport
+from app.services import settlement
+from conftest import API, auth_headers, report_payload
+
+RULE = {
+    "name": "Standard",
+    "basic_rate": 6.0,
+    "standard_cost_per_kg": 85.0,
+    "grade_slabs": [
+        {"grade": "A", "max_fcr": 1.7, "max_mortality_percent": 5, "bonus_per_kg": 0.5},
+        {"grade": "B", "max_fcr": 99, "max_mortality_percent": 100},
+    ],
+}
+
+
+def _setup(client, accounts, count=2):
+    admin = auth_headers(accounts["admin"])
+    assert client.post(f"{API}/production/admin/settlement-rules", json=RULE, headers=admin).status_code == 200
+    farmer = auth_headers(accounts["farmer_user"])
+    ids = []
+    for _ in range(count):
+        response = client.post(f"{API}/production/reports", json=report_payload(accounts["farmer"].id), headers=farmer)
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+    return admin, ids
+
+
+def _recompute(client, admin, **body):
+    response = client.post(f"{API}/production/admin/settlements/recompute", json=body, headers=admin)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_dry_run_reports_diff_without_writing(client, accounts, db):
+    admin, ids = _setup(client, accounts)
+
+    result = _recompute(client, admin)
+
+    assert result["applied"] is False
+    assert result["reports_changed"] == 2
+    assert {diff["id"] for diff in result["diffs"]} == set(ids)
+    assert "final_amount" in result["diffs"][0]["changes"]
+    assert {report.final_amount for report in db.query(ProductionReport)} == {60000.0}
+
+
+def test_apply_writes_changes_and_bumps_version(client, accounts, db):
+    admin, ids = _setup(client, accounts)
+    dry_run = _recompute(client, admin)
+
+    result = _recompute(client, admin, apply=True)
+
+    assert result["reports_changed"] == 2
+    assert result["skipped_report_ids"] == []
+    expected = {diff["id"]: diff["changes"]["final_amount"]["after"] for diff in dry_run["diffs"]}
+    for report in db.query(ProductionReport):
+        assert report.final_amount == expected[report.id]
+        assert report.version == 2
+    assert _recompute(client, admin, apply=True)["reports_changed"] == 0
+
+
+def test_apply_skips_reports_changed_since_read(client, accounts, db, monkeypatch):
+    admin, ids = _setup(client, accounts)
+    load_inputs = settlement._load_inputs
+
+    def load_then_concurrent_edit(*args, **kwargs):
+        loaded = load_inputs(*args, **kwargs)
+        # Another writer bumps the first report between the read and the apply
+        db.execute(
+            update(ProductionReport)
+            .where(ProductionReport.id == ids[0])
+            .values(version=ProductionReport.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return loaded
+
+    monkeypatch.setattr(settlement, "_load_inputs", load_then_concurrent_edit)
+    result = _recompute(client, admin, apply=True)
+
+    assert result["skipped_report_ids"] == [ids[0]]
+    assert result["reports_changed"] == 1
+    assert [diff["id"] for diff in result["diffs"]] == [ids[1]]
+    db.expire_all()
+    skipped, applied = db.get(ProductionReport, ids[0]), db.get(ProductionReport, ids[1])
+    assert (skipped.final_amount, skipped.version) == (60000.0, 2)
+    assert applied.final_amount != 60000.0 and applied.version == 2
@@ -0,0 +1,30 @@
+import os
+import pytest
+from app.config import settings
+from app.services import statements
+from conftest import API, auth_headers, report_payload
+
+
+@pytest.fixture
+def statement_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "statement_cache_dir", str(tmp_path))
+    yield tmp_path
+    statements.shutdown()
+
+
+def test_edit_renders_new_statement_and_removes_old_one(client, accounts, statement_dir):
+    headers = auth_headers(accounts["farmer_user"])
+    report = client.post(f"{API}/production/reports", json=report_payload(accounts["farmer"].id), headers=headers).json()
+    url = f"{API}/production/reports/{report['id']}/statement"
+
+    assert client.get(url, headers=headers).status_code == 200
+    first = os.listdir(statement_dir)
+    assert client.get(url, headers=headers).status_code == 200
+    assert os.listdir(statement_dir) == first
+
+    cost = {"production_report_id": report["id"], "item": "Vaccine", "quantity": "5000", "rate": "1", "amount": 5000.0}
+    assert client.post(f"{API}/production/cost-details", json=cost, headers=headers).status_code == 200
+    assert client.get(url, headers=headers).status_code == 200
+
+    files = os.listdir(statement_dir)
+    assert len(files) == 1 and files != first